@@ -1,39 +1,32 @@
 import pygame
-import pandas as pd
 import math
-import random
+import numpy as np
+import cloud_data
+import cloud_noise
+import cloud_fonts
+import cloud_quality
+import cloud_sprites
+from cloud_clock import AnimationClock, RENDER_FPS
 
 # 读取数据
-df = pd.read_csv('cloud.csv', encoding='utf-8')
-data = []
-for i, row in df.iterrows():
-    if pd.isna(row['Month']) or pd.isna(row['Day']) or pd.isna(row['Value']):
-        continue
-    data.append({
-        'month': int(row['Month']),
-        'day': int(row['Day']),
-        'value': float(row['Value'])
-    })
-
-data.sort(key=lambda x: (x['month'], x['day']))
+data = cloud_data.load_days(cloud_data.CSV_FILE)
 
 WIDTH, HEIGHT = 700, 500
 CENTER = (WIDTH // 2, HEIGHT // 2 + 30)
+DAYS_PER_SECOND = 10  # 数据播放速度（天/秒）
+CAPTION = '云量云朵动画'
 
 values = [d['value'] for d in data]
 min_value = min(values)
 max_value = max(values)
 
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('云量云朵动画')
-font = pygame.font.SysFont('SimHei', 32)
-info_font = pygame.font.SysFont('SimHei', 24)
-clock = pygame.time.Clock()
+font = cloud_fonts.get_font('SimHei', 32)
+info_font = cloud_fonts.get_font('SimHei', 24)
 
 num_days = len(data)
-running = True
 current = 0
+anim_clock = AnimationClock(DAYS_PER_SECOND)
+governor = cloud_quality.QualityGovernor(__name__)
 
 # 云朵形状判定函数（椭圆+圆组合）
 def in_cloud_shape(x, y):
@@ -53,57 +46,88 @@ def in_cloud_shape(x, y):
     return False
 
 # 预生成云朵区域的点池（加速）
+pool_ids = np.arange(8000)
+pool_x = cloud_noise.randint(pool_ids, 0, CENTER[0]-160, CENTER[0]+160, channel=1)
+pool_y = cloud_noise.randint(pool_ids, 0, CENTER[1]-70, CENTER[1]+70, channel=2)
 cloud_points = []
-for _ in range(8000):
-    x = random.randint(CENTER[0]-160, CENTER[0]+160)
-    y = random.randint(CENTER[1]-70, CENTER[1]+70)
+for x, y in zip(pool_x.tolist(), pool_y.tolist()):
     if in_cloud_shape(x, y):
         cloud_points.append((x, y))
 
-while running:
+# 预生成噪声表：按 (浮点编号, 日期) 查表，代替每帧的 random 调用
+MAX_DOTS = 1200
+alpha_noise = cloud_noise.NoiseTable(MAX_DOTS, num_days, -20, 20, channel=3, integer=True)
+radius_noise = cloud_noise.NoiseTable(MAX_DOTS, num_days, 4, 8, channel=4, integer=True)
+
+def update():
+    # 推进时钟，返回是否需要重绘（浮点数量随插值连续变化，每帧都画）
+    global current
+    current = (current + anim_clock.tick()) % num_days
+    return True
+
+def draw(surface):
+    governor.begin()
     # 背景
-    screen.fill((135, 180, 255))
+    surface.fill((135, 180, 255))
 
     # 当前云量
     d = data[current]
-    cloud_ratio = (d['value'] - min_value) / (max_value - min_value) if max_value > min_value else 0
-    # 浮点数量（最少300，最多1200）
-    num_dots = int(300 + cloud_ratio * 900)
+    # 当天和下一天之间按时钟插值，渲染帧率高时浮点数量平滑变化
+    next_value = data[(current + 1) % num_days]['value']
+    value = d['value'] + (next_value - d['value']) * anim_clock.alpha
+    cloud_ratio = (value - min_value) / (max_value - min_value) if max_value > min_value else 0
+    # 浮点数量（最少300，最多1200），再按画质档位缩放
+    num_dots = governor.count(int(300 + cloud_ratio * 900))
+    alpha_jitter = alpha_noise.frame(current).tolist()
+    dot_radii = radius_noise.frame(current).tolist()
 
     # 画云朵浮点
     for i in range(num_dots):
         x, y = cloud_points[i % len(cloud_points)]
         # 颜色和透明度随云量变化
-        alpha = int(120 + 100 * cloud_ratio + random.randint(-20, 20))
+        alpha = int(120 + 100 * cloud_ratio + alpha_jitter[i])
         dot_color = (255, 255, 255, max(80, min(220, alpha)))
-        dot_radius = random.randint(4, 8)
-        # 用Surface画带透明度的小圆点
-        dot_surf = pygame.Surface((dot_radius*2, dot_radius*2), pygame.SRCALPHA)
-        pygame.draw.circle(dot_surf, dot_color, (dot_radius, dot_radius), dot_radius)
-        screen.blit(dot_surf, (x-dot_radius, y-dot_radius))
+        dot_radius = dot_radii[i]
+        # 用缓存的带透明度小圆点
+        dot_surf = cloud_sprites.circle_sprite(dot_radius, dot_color)
+        surface.blit(dot_surf, (x-dot_radius, y-dot_radius))
 
     # 半透明信息框
     info_box_width = 320
     info_box_height = 80
-    info_box = pygame.Surface((info_box_width, info_box_height), pygame.SRCALPHA)
-    info_box.fill((30, 30, 40, 180))
-    screen.blit(info_box, (CENTER[0]-info_box_width//2, 60))
+    info_box = cloud_sprites.box_sprite(info_box_width, info_box_height, (30, 30, 40, 180))
+    surface.blit(info_box, (CENTER[0]-info_box_width//2, 60))
 
     # 显示日期和云量
     info_text = f"{d['month']}月{d['day']}日"
     value_text = f"云量：{d['value']}%"
-    info_surface = font.render(info_text, True, (255,255,255))
-    value_surface = info_font.render(value_text, True, (200,220,255))
-    screen.blit(info_surface, (CENTER[0]-info_surface.get_width()//2, 70))
-    screen.blit(value_surface, (CENTER[0]-value_surface.get_width()//2, 110))
-
-    pygame.display.flip()
-    clock.tick(10)  # 动画速度
-
-    current = (current + 1) % num_days
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-pygame.quit()
+    info_surface = cloud_fonts.render_text(font, info_text, (255,255,255))
+    value_surface = cloud_fonts.render_text(info_font, value_text, (200,220,255))
+    surface.blit(info_surface, (CENTER[0]-info_surface.get_width()//2, 70))
+    surface.blit(value_surface, (CENTER[0]-value_surface.get_width()//2, 110))
+    governor.end()
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(CAPTION)
+    clock = pygame.time.Clock()
+
+    running = True
+    needs_redraw = True
+    while running:
+        if needs_redraw:
+            draw(screen)
+            pygame.display.flip()
+        clock.tick(RENDER_FPS)
+
+        needs_redraw = update()
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
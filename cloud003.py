@@ -1,25 +1,19 @@
 import pygame
-import pandas as pd
 import math
-import random
+import cloud_data
+import cloud_noise
+import cloud_fonts
+import cloud_picking
+import cloud_sprites
+import cloud_tiles
+from cloud_clock import AnimationClock, RENDER_FPS
 
 # 日期英文格式
 MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
                "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
 
 # 读取数据
-df = pd.read_csv('cloud.csv', encoding='utf-8')
-data = []
-for i, row in df.iterrows():
-    if pd.isna(row['Month']) or pd.isna(row['Day']) or pd.isna(row['Value']):
-        continue
-    data.append({
-        'month': int(row['Month']),
-        'day': int(row['Day']),
-        'value': float(row['Value'])
-    })
-
-data.sort(key=lambda x: (x['month'], x['day']))
+data = cloud_data.load_days(cloud_data.CSV_FILE)
 
 WIDTH, HEIGHT = 1000, 600
 LEFT_MARGIN = 120
@@ -28,22 +22,25 @@ TOP_MARGIN = 130
 BOTTOM_MARGIN = 190
 CLOUD_WIDTH = WIDTH - LEFT_MARGIN - RIGHT_MARGIN
 CLOUD_HEIGHT = HEIGHT - TOP_MARGIN - BOTTOM_MARGIN
+DAYS_PER_SECOND = 8  # 数据播放速度（天/秒）
+CAPTION = 'Average cloud cover in Hong Kong (percentage)'
+STRIP_PAD = 6  # 时间轴左右多露出的边，最左最右一列点不被切掉
+STRIP_TOP = TOP_MARGIN - 50
+STRIP_HEIGHT = CLOUD_HEIGHT + 100
+MAX_DAY_PIXELS = 48  # 最多放大到相邻两天相距这么多像素
+PAN_STEP = CLOUD_WIDTH // 4  # 方向键每次平移多少像素
 
 values = [d['value'] for d in data]
 min_value = min(values)
 max_value = max(values)
 num_days = len(data)
 
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('Average cloud cover in Hong Kong (percentage)')
-font = pygame.font.SysFont('Arial', 32)
-info_font = pygame.font.SysFont('Arial', 22)
-legend_font = pygame.font.SysFont('Arial', 18)
-clock = pygame.time.Clock()
+font = cloud_fonts.get_font('Arial', 32)
+info_font = cloud_fonts.get_font('Arial', 22)
+legend_font = cloud_fonts.get_font('Arial', 18)
 
-running = True
 current = 0
+anim_clock = AnimationClock(DAYS_PER_SECOND)
 
 # 蓝色主题颜色函数
 def get_blue_color(value):
@@ -74,7 +71,7 @@ def generate_cloud_points():
             base_y = TOP_MARGIN + y_ratio * CLOUD_HEIGHT
             # 波浪形状（正弦+噪声）
             wave = math.sin(day_idx/8 + y_ratio*math.pi*2) * 30
-            noise = random.uniform(-8, 8)
+            noise = cloud_noise.uniform(day_idx*50 + i, 0, -8, 8)
             y = base_y + wave + noise
             color = get_blue_color(value)
             cloud_points.append({
@@ -88,39 +85,150 @@ def generate_cloud_points():
 
 cloud_points = generate_cloud_points()
 
-while running:
-    screen.fill((0, 0, 0))
+# 每天的点在 cloud_points 里的起止位置，以及这一列最上和最下的点（画瓦片和拾取时只看相关的几天）
+day_starts = [0] * (num_days + 1)
+day_top = [math.inf] * num_days
+day_bottom = [-math.inf] * num_days
+for pt in cloud_points:
+    day_starts[pt['day_idx'] + 1] += 1
+    day_top[pt['day_idx']] = min(day_top[pt['day_idx']], pt['y'])
+    day_bottom[pt['day_idx']] = max(day_bottom[pt['day_idx']], pt['y'])
+for i in range(num_days):
+    day_starts[i + 1] += day_starts[i]
+
+# 缩放：第 level 级时间轴宽 CLOUD_WIDTH * 2^level，视口里显示从 view_offset 开始的 CLOUD_WIDTH 宽一段；
+# 第 0 级就是原来整条铺满的样子。点阵画在瓦片金字塔（cloud_tiles）里，平移、缩放只 blit 瓦片
+max_level = 0
+while max_level < 16 and CLOUD_WIDTH * 2 ** max_level / max(1, num_days-1) < MAX_DAY_PIXELS:
+    max_level += 1
+zoom_level = 0
+view_offset = 0
+follow = True       # 放大后视口跟着当前日期走；拖动后停止，按 F 恢复
+drag = None         # 拖动中：(按下时的鼠标 x, 按下时的 view_offset)
+view_moved = False
+
+def level_width(level):
+    return CLOUD_WIDTH * 2 ** level
+
+def day_x(day_idx, level):
+    # 第 level 级里这一天在时间轴上的横坐标（第一天为 0）
+    return day_idx / (num_days-1) * level_width(level) if num_days > 1 else 0
+
+def render_tile(tile, level, x0):
+    # 画第 level 级从 x0 开始的一块：只找横坐标落在这块（加上点的半径）里的几天
+    scale = (num_days-1) / level_width(level)
+    first = max(0, math.floor((x0 - 8) * scale))
+    last = min(num_days-1, math.ceil((x0 + tile.get_width() + 8) * scale))
+    if first > last:
+        return
+    for pt in cloud_points[day_starts[first]:day_starts[last + 1]]:
+        x = int(day_x(pt['day_idx'], level)) - x0
+        pygame.draw.circle(tile, pt['color'], (x, int(pt['y']) - STRIP_TOP), 4)
+
+tiles = cloud_tiles.TilePyramid(render_tile, STRIP_HEIGHT)
+strip_rect = pygame.Rect(LEFT_MARGIN - STRIP_PAD, STRIP_TOP, CLOUD_WIDTH + STRIP_PAD * 2, STRIP_HEIGHT)
+
+def set_view(level, offset):
+    # 换缩放级别 / 平移，偏移夹在时间轴范围内
+    global zoom_level, view_offset, view_moved
+    level = max(0, min(max_level, level))
+    offset = int(max(0, min(level_width(level) - CLOUD_WIDTH, offset)))
+    if (level, offset) != (zoom_level, view_offset):
+        zoom_level, view_offset = level, offset
+        view_moved = True
+
+def zoom_at(level, screen_x):
+    # 以屏幕上 screen_x 处的日期为中心缩放
+    level = max(0, min(max_level, level))
+    anchor = view_offset + screen_x - LEFT_MARGIN
+    set_view(level, anchor * 2 ** (level - zoom_level) - (screen_x - LEFT_MARGIN))
+
+def follow_current():
+    if follow and zoom_level > 0:
+        set_view(zoom_level, day_x(current, zoom_level) - CLOUD_WIDTH / 2)
+
+def build_index():
+    # 每天一整列点：宽度是相邻两列的间距，高度覆盖这一列最上和最下的点；只收视口里看得见的几天
+    col_w = level_width(zoom_level) / max(1, num_days-1)
+    first = max(0, math.floor((view_offset - col_w) / col_w))
+    last = min(num_days-1, math.ceil((view_offset + CLOUD_WIDTH + col_w) / col_w))
+    days = range(first, last + 1)
+    rects = [(LEFT_MARGIN + i*col_w - view_offset - col_w/2, day_top[i] - 6, col_w, day_bottom[i] - day_top[i] + 12) for i in days]
+    return cloud_picking.SpatialIndex.from_rects(days, rects)
+
+picker = cloud_picking.Picker(build_index)
+
+def handle_event(event):
+    # 鼠标悬停显示提示，点击选中某一天；滚轮缩放，拖动或方向键平移
+    global follow, drag
+    if event.type == pygame.MOUSEWHEEL:
+        x = (getattr(event, 'pos', None) or pygame.mouse.get_pos())[0]
+        zoom_at(zoom_level + (1 if event.y > 0 else -1), x)
+    elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and strip_rect.collidepoint(event.pos):
+        drag = (event.pos[0], view_offset)
+    elif event.type == pygame.MOUSEMOTION and drag is not None and event.pos[0] != drag[0]:
+        follow = False
+        set_view(zoom_level, drag[1] - (event.pos[0] - drag[0]))
+    elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+        drag = None
+    elif event.type == pygame.KEYDOWN:
+        if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            zoom_at(zoom_level + 1, LEFT_MARGIN + CLOUD_WIDTH // 2)
+        elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            zoom_at(zoom_level - 1, LEFT_MARGIN + CLOUD_WIDTH // 2)
+        elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+            follow = False
+            set_view(zoom_level, view_offset + (PAN_STEP if event.key == pygame.K_RIGHT else -PAN_STEP))
+        elif event.key == pygame.K_f:
+            follow = not follow
+        elif event.key in (pygame.K_0, pygame.K_HOME):
+            set_view(0, 0)
+    picker.handle_event(event, (num_days, zoom_level, view_offset))
+
+def update():
+    # 推进时钟；日期变化、视口移动或后台画好了新瓦片时才需要重绘
+    global current, view_moved
+    steps = anim_clock.tick()
+    current = (current + steps) % num_days
+    follow_current()
+    moved, view_moved = view_moved, False
+    new_tiles = tiles.poll()
+    return picker.poll() or steps > 0 or moved or new_tiles
+
+def draw(surface):
+    surface.fill((0, 0, 0))
 
     # 标题
     title_text = "Average cloud cover in Hong Kong (percentage)"
-    title_surface = font.render(title_text, True, (180, 200, 255))
-    screen.blit(title_surface, (WIDTH//2 - title_surface.get_width()//2, 30))
+    title_surface = cloud_fonts.render_text(font, title_text, (180, 200, 255))
+    surface.blit(title_surface, (WIDTH//2 - title_surface.get_width()//2, 30))
 
     # 当前日期英文
     d = data[current]
     month_name = MONTH_NAMES[d['month']-1]
     info_text = f"{month_name} {d['day']}"
     value_text = f"Cloud cover: {d['value']}%"
-    info_surface = info_font.render(info_text, True, (220, 230, 255))
-    value_surface = info_font.render(value_text, True, (120, 180, 255))
+    info_surface = cloud_fonts.render_text(info_font, info_text, (220, 230, 255))
+    value_surface = cloud_fonts.render_text(info_font, value_text, (120, 180, 255))
     info_box_width = max(info_surface.get_width(), value_surface.get_width()) + 40
     info_box_height = 60
-    info_box = pygame.Surface((info_box_width, info_box_height), pygame.SRCALPHA)
-    info_box.fill((30, 30, 60, 180))
-    screen.blit(info_box, (WIDTH//2 - info_box_width//2, HEIGHT - info_box_height - 30))
-    screen.blit(info_surface, (WIDTH//2 - info_surface.get_width()//2, HEIGHT - info_box_height - 10))
-    screen.blit(value_surface, (WIDTH//2 - value_surface.get_width()//2, HEIGHT - info_box_height + 22))
-
-    # 绘制云朵点阵
-    for pt in cloud_points:
-        # 当前日期高亮
-        if pt['day_idx'] == current:
-            radius = 6
-            color = tuple(min(255, int(c*1.2)) for c in pt['color'])
-        else:
-            radius = 4
-            color = pt['color']
-        pygame.draw.circle(screen, color, (int(pt['x']), int(pt['y'])), radius)
+    info_box = cloud_sprites.box_sprite(info_box_width, info_box_height, (30, 30, 60, 180))
+    surface.blit(info_box, (WIDTH//2 - info_box_width//2, HEIGHT - info_box_height - 30))
+    surface.blit(info_surface, (WIDTH//2 - info_surface.get_width()//2, HEIGHT - info_box_height - 10))
+    surface.blit(value_surface, (WIDTH//2 - value_surface.get_width()//2, HEIGHT - info_box_height + 22))
+
+    # 绘制云朵点阵：视口里的瓦片，当前日期的一列在上面高亮
+    tiles.blit(surface, strip_rect, zoom_level, view_offset - STRIP_PAD)
+    clip = surface.get_clip()
+    surface.set_clip(strip_rect)
+    x = LEFT_MARGIN + int(day_x(current, zoom_level)) - view_offset
+    for pt in cloud_points[day_starts[current]:day_starts[current + 1]]:
+        color = tuple(min(255, int(c*1.2)) for c in pt['color'])
+        pygame.draw.circle(surface, color, (x, int(pt['y'])), 6)
+    surface.set_clip(clip)
+    if zoom_level > 0:
+        zoom_text = cloud_fonts.render_text(legend_font, f"x{2 ** zoom_level}" + (" ..." if tiles.loading() else ""), (180, 200, 255))
+        surface.blit(zoom_text, (WIDTH - RIGHT_MARGIN - zoom_text.get_width(), HEIGHT - 120))
 
     # 图例（左下角）
     legend_x = 40
@@ -132,22 +240,49 @@ while running:
         ratio = i / legend_width
         value = min_value + ratio * (max_value - min_value)
         color = get_blue_color(value)
-        pygame.draw.rect(screen, color, (legend_x+i, legend_y, 1, legend_height))
+        pygame.draw.rect(surface, color, (legend_x+i, legend_y, 1, legend_height))
     # 图例文字
-    worse_text = legend_font.render("Lower", True, (180, 200, 255))
-    better_text = legend_font.render("Higher", True, (180, 200, 255))
-    screen.blit(worse_text, (legend_x, legend_y + legend_height + 4))
-    screen.blit(better_text, (legend_x + legend_width - better_text.get_width(), legend_y + legend_height + 4))
-    explain_text = legend_font.render("Cloud cover (density & color)", True, (180, 200, 255))
-    screen.blit(explain_text, (legend_x, legend_y + legend_height + 28))
+    worse_text = cloud_fonts.render_text(legend_font, "Lower", (180, 200, 255))
+    better_text = cloud_fonts.render_text(legend_font, "Higher", (180, 200, 255))
+    surface.blit(worse_text, (legend_x, legend_y + legend_height + 4))
+    surface.blit(better_text, (legend_x + legend_width - better_text.get_width(), legend_y + legend_height + 4))
+    explain_text = cloud_fonts.render_text(legend_font, "Cloud cover (density & color)", (180, 200, 255))
+    surface.blit(explain_text, (legend_x, legend_y + legend_height + 28))
+
+    # 悬停/选中的日期
+    picked = picker.active()
+    index = picker.index_for((num_days, zoom_level, view_offset))
+    if picked is not None and picked in index.slots:
+        d = data[picked]
+        rect = index.bounds(picked)
+        if picked == picker.selected:
+            pygame.draw.rect(surface, (220, 230, 255), rect, 1)
+        cloud_picking.draw_tooltip(surface, rect.midtop, [f"{MONTH_NAMES[d['month']-1]} {d['day']}", f"Cloud cover: {d['value']}%"], legend_font)
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(CAPTION)
+    clock = pygame.time.Clock()
+
+    running = True
+    needs_redraw = True
+    while running:
+        # 只有日期变化时才重绘，空闲帧只处理事件
+        if needs_redraw:
+            draw(screen)
+            pygame.display.flip()
+        clock.tick(RENDER_FPS)
 
-    pygame.display.flip()
-    clock.tick(8)
+        needs_redraw = update()
 
-    current = (current + 1) % num_days
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            else:
+                handle_event(event)
 
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+    pygame.quit()
 
-pygame.quit()
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,21 @@
 import pygame
-import pandas as pd
 import math
-import random
+import cloud_data
+import cloud_noise
+import cloud_fonts
+import cloud_quality
+from cloud_clock import AnimationClock, RENDER_FPS
 
 # 读取数据
-df = pd.read_csv('cloud.csv', encoding='utf-8')
-data = []
-for i, row in df.iterrows():
-    if pd.isna(row['Month']) or pd.isna(row['Day']) or pd.isna(row['Value']):
-        continue
-    data.append({
-        'month': int(row['Month']),
-        'day': int(row['Day']),
-        'value': float(row['Value'])
-    })
+data = cloud_data.load_days(cloud_data.CSV_FILE)
 
 WIDTH, HEIGHT = 800, 600
 CENTER = (WIDTH//2, HEIGHT//2)
 RADIUS_MIN = 80
 RADIUS_MAX = 180
+DAYS_PER_SECOND = 5  # 数据播放速度（天/秒），每天长出一片花瓣
+FUZZ_FPS = 30        # 毛刺抖动频率（次/秒）
+CAPTION = 'Average cloud cover in Hong Kong (percentage)'
 MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
                "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
 
@@ -27,14 +24,10 @@ min_value = min(values)
 max_value = max(values)
 num_days = len(data)
 
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('Average cloud cover in Hong Kong (percentage)')
 # 字体设置
-title_font = pygame.font.SysFont('Arial Black', 24)
-font = pygame.font.SysFont('Arial', 18)
-small_font = pygame.font.SysFont('Arial', 12)
-clock = pygame.time.Clock()
+title_font = cloud_fonts.get_font('Arial Black', 24)
+font = cloud_fonts.get_font('Arial', 18)
+small_font = cloud_fonts.get_font('Arial', 12)
 
 def get_color(value, highlight=False):
     ratio = (value - min_value) / (max_value - min_value) if max_value > min_value else 0
@@ -51,7 +44,16 @@ def get_radius(value):
     ratio = (value - min_value) / (max_value - min_value) if max_value > min_value else 0
     return RADIUS_MIN + ratio * (RADIUS_MAX - RADIUS_MIN)
 
-def draw_flower(grow_idx, grow_progress):
+# 花瓣毛刺噪声表：按 (花瓣*毛刺数+毛刺编号, 帧号) 查表，代替每帧的 random 调用
+FUZZ_LINES = 5
+FUZZ_PERIOD = 32
+fuzz_angle_noise = cloud_noise.NoiseTable(num_days*FUZZ_LINES, FUZZ_PERIOD, -0.06, 0.06, channel=1)
+fuzz_len_noise = cloud_noise.NoiseTable(num_days*FUZZ_LINES, FUZZ_PERIOD, 0, 10, channel=2, integer=True)
+
+def draw_flower(surface, grow_idx, grow_progress, frame=0):
+    fuzz_lines = governor.count(FUZZ_LINES)  # 每片花瓣的毛刺数随画质档位缩放
+    fuzz_angles = fuzz_angle_noise.frame(frame).tolist()
+    fuzz_lens = fuzz_len_noise.frame(frame).tolist()
     for i, d in enumerate(data):
         angle = 2 * math.pi * i / num_days - math.pi/2
         radius = get_radius(d['value'])
@@ -68,73 +70,91 @@ def draw_flower(grow_idx, grow_progress):
         y1 = CENTER[1] + math.sin(angle) * RADIUS_MIN
         x2 = CENTER[0] + math.cos(angle) * r
         y2 = CENTER[1] + math.sin(angle) * r
-        pygame.draw.line(screen, color, (x1, y1), (x2, y2), 2)
+        pygame.draw.line(surface, color, (x1, y1), (x2, y2), 2)
         # 花瓣末端毛刺
         if r > RADIUS_MIN + 6:
-            for j in range(5):
-                fuzz_angle = angle + (random.random()-0.5)*0.12
-                fuzz_len = r + 6 + random.randint(0, 10)
+            for j in range(fuzz_lines):
+                k = i*FUZZ_LINES + j
+                fuzz_angle = angle + fuzz_angles[k]
+                fuzz_len = r + 6 + fuzz_lens[k]
                 fx = CENTER[0] + math.cos(fuzz_angle) * fuzz_len
                 fy = CENTER[1] + math.sin(fuzz_angle) * fuzz_len
-                pygame.draw.line(screen, color, (x2, y2), (fx, fy), 1)
+                pygame.draw.line(surface, color, (x2, y2), (fx, fy), 1)
             # 花瓣末端圆点
-            pygame.draw.circle(screen, color, (int(x2), int(y2)), 3 if i!=grow_idx else 5)
+            pygame.draw.circle(surface, color, (int(x2), int(y2)), 3 if i!=grow_idx else 5)
 
-def draw_month_labels():
+def draw_month_labels(surface):
     for m in range(12):
         angle = 2 * math.pi * (sum([1 for d in data if d['month'] < m+1]) + 15) / num_days - math.pi/2
         label_radius = RADIUS_MAX + 20
         x = CENTER[0] + math.cos(angle) * label_radius
         y = CENTER[1] + math.sin(angle) * label_radius
-        label = small_font.render(MONTH_NAMES[m], True, (180, 200, 255))
-        screen.blit(label, (x-label.get_width()//2, y-label.get_height()//2))
+        label = cloud_fonts.render_text(small_font, MONTH_NAMES[m], (180, 200, 255))
+        surface.blit(label, (x-label.get_width()//2, y-label.get_height()//2))
 
-def draw_legend():
+def draw_legend(surface):
     legend_x = 30
     legend_y = HEIGHT - 60
     for i in range(80):
         ratio = i / 80
         value = min_value + ratio * (max_value - min_value)
         color = get_color(value)
-        pygame.draw.rect(screen, color, (legend_x+i, legend_y, 1, 10))
-    min_text = small_font.render(f"{min_value:.0f}%", True, (180, 200, 255))
-    max_text = small_font.render(f"{max_value:.0f}%", True, (180, 200, 255))
-    screen.blit(min_text, (legend_x-10, legend_y+12))
-    screen.blit(max_text, (legend_x+80-10, legend_y+12))
-    explain = small_font.render("Cloud cover (petal length & color)", True, (180, 200, 255))
-    screen.blit(explain, (legend_x, legend_y+26))
-
-running = True
+        pygame.draw.rect(surface, color, (legend_x+i, legend_y, 1, 10))
+    min_text = cloud_fonts.render_text(small_font, f"{min_value:.0f}%", (180, 200, 255))
+    max_text = cloud_fonts.render_text(small_font, f"{max_value:.0f}%", (180, 200, 255))
+    surface.blit(min_text, (legend_x-10, legend_y+12))
+    surface.blit(max_text, (legend_x+80-10, legend_y+12))
+    explain = cloud_fonts.render_text(small_font, "Cloud cover (petal length & color)", (180, 200, 255))
+    surface.blit(explain, (legend_x, legend_y+26))
+
 grow_idx = 0
 grow_progress = 0.0
-GROW_SPEED = 0.18  # 动画速度加快
+anim_clock = AnimationClock(DAYS_PER_SECOND)
+governor = cloud_quality.QualityGovernor(__name__)
 
-while running:
-    screen.fill((10, 18, 32))
+def update():
+    # 动画控制：每一步长完一片花瓣，步内进度就是时钟插值系数
+    global grow_idx, grow_progress
+    grow_idx = (grow_idx + anim_clock.tick()) % num_days
+    grow_progress = anim_clock.alpha
+    return True
+
+def draw(surface):
+    governor.begin()
+    surface.fill((10, 18, 32))
     # 标题
-    title = title_font.render("Average cloud cover in Hong Kong (percentage)", True, (220, 230, 255))
-    screen.blit(title, (WIDTH//2-title.get_width()//2, 18))
+    title = cloud_fonts.render_text(title_font, "Average cloud cover in Hong Kong (percentage)", (220, 230, 255))
+    surface.blit(title, (WIDTH//2-title.get_width()//2, 18))
     # 花朵动画
-    draw_flower(grow_idx, grow_progress)
+    draw_flower(surface, grow_idx, grow_progress, int(anim_clock.time * FUZZ_FPS))
     # 月份
-    draw_month_labels()
+    draw_month_labels(surface)
     # 年份
-    year_text = font.render("2025", True, (180, 200, 255))
-    screen.blit(year_text, (CENTER[0]-year_text.get_width()//2, CENTER[1]-year_text.get_height()//2))
+    year_text = cloud_fonts.render_text(font, "2025", (180, 200, 255))
+    surface.blit(year_text, (CENTER[0]-year_text.get_width()//2, CENTER[1]-year_text.get_height()//2))
     # 图例
-    draw_legend()
-    pygame.display.flip()
-    clock.tick(30)
-
-    # 动画控制
-    grow_progress += GROW_SPEED
-    if grow_progress >= 1.0:
-        grow_progress = 0.0
-        grow_idx += 1
-        if grow_idx >= num_days:
-            grow_idx = 0
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-pygame.quit()
+    draw_legend(surface)
+    governor.end()
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(CAPTION)
+    clock = pygame.time.Clock()
+
+    running = True
+    while running:
+        draw(screen)
+        pygame.display.flip()
+        clock.tick(RENDER_FPS)
+
+        # 动画控制
+        update()
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
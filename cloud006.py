@@ -1,10 +1,16 @@
 import pygame
-import pandas as pd
 import math
-import random
+import numpy as np
+import cloud_bloom
+import cloud_data
+import cloud_noise
+import cloud_fonts
+import cloud_quality
+import cloud_scaling
+from cloud_clock import AnimationClock, RENDER_FPS
 
 # ====== 可修改参数 ======
-CSV_FILE = 'cloud.csv'
+CSV_FILE = cloud_data.CSV_FILE
 WIDTH, HEIGHT = 900, 600
 TOP_MARGIN = 70
 BOTTOM_MARGIN = 90
@@ -37,20 +43,13 @@ TITLE_FONT_SIZE = 38
 LABEL_FONT_SIZE = 16
 VALUE_FONT_SIZE = 20
 LEGEND_FONT_SIZE = 14
-FPS = 30
+SIM_FPS = 30       # 粒子模拟步频（步/秒）；渲染帧率上限用 cloud_clock.RENDER_FPS
+ANIM_SPEED = 0.04  # 每步漂浮相位增量
+USE_BLOOM = True   # 用整帧泛光代替逐个柱子、粒子叠圆圈的发光；False 时恢复逐个发光
+CAPTION = 'The average daily cloud content in Hong Kong'
 
 # ====== 读取数据 ======
-df = pd.read_csv(CSV_FILE, encoding='utf-8')
-data = []
-for i, row in df.iterrows():
-    if pd.isna(row['Month']) or pd.isna(row['Day']) or pd.isna(row['Value']):
-        continue
-    data.append({
-        'month': int(row['Month']),
-        'day': int(row['Day']),
-        'value': float(row['Value'])
-    })
-data.sort(key=lambda x: (x['month'], x['day']))
+data = cloud_data.load_days(CSV_FILE)
 
 values = [d['value'] for d in data]
 min_value = min(values)
@@ -64,134 +63,182 @@ def lerp_color(c1, c2, t):
         int(c1[2] + (c2[2] - c1[2]) * t)
     )
 
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('The average daily cloud content in Hong Kong')
-
-def get_font(name, size, bold=False):
-    try:
-        return pygame.font.SysFont(name, size, bold=bold)
-    except:
-        return pygame.font.SysFont('arial', size, bold=bold)
-
-title_font = get_font(TITLE_FONT_NAME, TITLE_FONT_SIZE, True)
-label_font = get_font(LABEL_FONT_NAME, LABEL_FONT_SIZE, False)
-value_font = get_font(VALUE_FONT_NAME, VALUE_FONT_SIZE, True)
-legend_font = get_font(LEGEND_FONT_NAME, LEGEND_FONT_SIZE, True)
-clock = pygame.time.Clock()
+title_font = cloud_fonts.get_font(TITLE_FONT_NAME, TITLE_FONT_SIZE, True)
+label_font = cloud_fonts.get_font(LABEL_FONT_NAME, LABEL_FONT_SIZE, False)
+value_font = cloud_fonts.get_font(VALUE_FONT_NAME, VALUE_FONT_SIZE, True)
+legend_font = cloud_fonts.get_font(LEGEND_FONT_NAME, LEGEND_FONT_SIZE, True)
 
 # ====== 云朵粒子生成 ======
-def generate_cloud_particles(cx, cy, cloud_ratio, n_particles, t_anim):
-    particles = []
-    for i in range(n_particles):
-        angle = random.uniform(0, 2*math.pi)
-        r = random.uniform(0.5, 1.0)
-        cloud_radius = CLOUD_RADIUS_BASE + cloud_ratio * CLOUD_RADIUS_VAR
-        x = cx + cloud_radius * r * math.cos(angle)
-        y = cy + cloud_radius * r * math.sin(angle)
-        # 未来感漂浮动画
-        x += math.sin(t_anim + i*0.7) * PARTICLE_FLOAT * random.uniform(0.7, 1.2)
-        y += math.cos(t_anim + i*0.9) * PARTICLE_FLOAT * random.uniform(0.7, 1.2)
-        particles.append((x, y))
-    return particles
+# 每帧一次性算出所有云朵的粒子噪声（角度、半径、漂浮幅度），按 (粒子编号, 帧号) 确定
+NUM_CLOUDS = num_days + 2  # 每天一朵 + 图例两朵
+LEGEND_LOW_ID = num_days
+LEGEND_HIGH_ID = num_days + 1
+
+def particle_noise(frame):
+    ids = np.arange(NUM_CLOUDS * PARTICLE_MAX)
+    angle = cloud_noise.uniform(ids, frame, 0, 2*math.pi, channel=1)
+    r = cloud_noise.uniform(ids, frame, 0.5, 1.0, channel=2)
+    float_x = cloud_noise.uniform(ids, frame, 0.7, 1.2, channel=3)
+    float_y = cloud_noise.uniform(ids, frame, 0.7, 1.2, channel=4)
+    return np.stack([angle, r, float_x, float_y], axis=1).reshape(NUM_CLOUDS, PARTICLE_MAX, 4)
+
+def generate_cloud_particles(cx, cy, cloud_ratio, n_particles, t_anim, noise):
+    angle, r, float_x, float_y = noise[:n_particles].T
+    i = np.arange(n_particles)
+    cloud_radius = CLOUD_RADIUS_BASE + cloud_ratio * CLOUD_RADIUS_VAR
+    x = cx + cloud_radius * r * np.cos(angle)
+    y = cy + cloud_radius * r * np.sin(angle)
+    # 未来感漂浮动画
+    x += np.sin(t_anim + i*0.7) * PARTICLE_FLOAT * float_x
+    y += np.cos(t_anim + i*0.9) * PARTICLE_FLOAT * float_y
+    return list(zip(x.astype(int).tolist(), y.astype(int).tolist()))
 
 def draw_glow_rect(surface, color, rect, glow_color, glow_radius=16):
-    # 画发光柱体
+    # 画发光柱体；开了泛光时只画柱体，光晕由 draw() 最后的泛光统一加
+    if USE_BLOOM:
+        pygame.draw.rect(surface, color, rect, border_radius=8)
+        return
     x, y, w, h = rect
     glow_surf = pygame.Surface((w+glow_radius*2, h+glow_radius*2), pygame.SRCALPHA)
-    for i in range(glow_radius, 0, -2):
+    for i in range(glow_radius, 0, -governor.glow_step()):
         alpha = int(60 * (i/glow_radius))
         pygame.draw.rect(glow_surf, (*glow_color, alpha), (i, i, w, h), border_radius=8)
     surface.blit(glow_surf, (x-glow_radius, y-glow_radius))
     pygame.draw.rect(surface, color, rect, border_radius=8)
 
 def draw_glow_circle(surface, color, pos, radius, glow_color, glow_radius=18):
-    # 画发光云粒子
+    # 画发光云粒子；开了泛光时只画粒子本身
     x, y = pos
+    if USE_BLOOM:
+        pygame.draw.circle(surface, color, (x, y), radius)
+        return
     glow_surf = pygame.Surface((radius*2+glow_radius*2, radius*2+glow_radius*2), pygame.SRCALPHA)
-    for i in range(glow_radius, 0, -2):
+    for i in range(glow_radius, 0, -governor.glow_step()):
         alpha = int(80 * (i/glow_radius))
         pygame.draw.circle(glow_surf, (*glow_color, alpha), (radius+glow_radius, radius+glow_radius), radius+i)
     surface.blit(glow_surf, (x-radius-glow_radius, y-radius-glow_radius))
     pygame.draw.circle(surface, color, (x, y), radius)
 
-running = True
-t_anim = 0
-
-while running:
-    screen.fill(BG_COLOR)
-    t_anim += 0.04
-
-    # 标题
-    title = title_font.render("The average daily cloud content in Hong Kong", True, TITLE_COLOR)
-    screen.blit(title, (WIDTH//2-title.get_width()//2, 22))
+anim_clock = AnimationClock(SIM_FPS)
+scaler = cloud_scaling.ResolutionScaler((WIDTH, HEIGHT))
+governor = cloud_quality.QualityGovernor(__name__)
+
+def update():
+    # 推进粒子模拟时钟；粒子一直在漂浮，每帧都重绘
+    anim_clock.tick()
+    return True
+
+def scaled_rect(rect, s):
+    return tuple(int(v * s) for v in rect)
+
+def draw(surface):
+    governor.begin()
+    # 粒子数随画质档位缩放
+    particle_min = governor.count(PARTICLE_MIN)
+    particle_max = governor.count(PARTICLE_MAX)
+    # 漂浮相位按模拟时间连续插值，粒子噪声按模拟步刷新
+    t_anim = (anim_clock.steps + anim_clock.alpha) * ANIM_SPEED
+    frame_noise = particle_noise(anim_clock.steps)
+
+    # 场景（柱子、云朵、发光）：动态分辨率打开时画在缩小的画布上，坐标和半径乘 s
+    scene = scaler.begin(surface)
+    s = scaler.scale if scene is not surface else 1.0
+    scene.fill(BG_COLOR)
+    particle_size = max(1, round(PARTICLE_SIZE * s))
 
     # 柱状图+云朵
     plot_height = HEIGHT - TOP_MARGIN - BOTTOM_MARGIN
     bar_area_width = num_days * BAR_WIDTH + (num_days-1) * BAR_GAP
     start_x = (WIDTH - bar_area_width) // 2
+    bars = []
     for i, d in enumerate(data):
         ratio = (d['value'] - min_value) / (max_value - min_value + 1e-6)
         bar_x = start_x + i * (BAR_WIDTH + BAR_GAP)
         bar_h = int(ratio * plot_height * 0.85 + 30)
         bar_y = HEIGHT - BOTTOM_MARGIN - bar_h
+        bars.append((bar_x, bar_y))
         bar_color = lerp_color(BAR_COLOR_LOW, BAR_COLOR_HIGH, ratio)
         bar_glow = lerp_color(BAR_GLOW_COLOR, BAR_COLOR_HIGH, ratio)
-        draw_glow_rect(screen, bar_color, (bar_x, bar_y, BAR_WIDTH, bar_h), bar_glow, glow_radius=12)
+        draw_glow_rect(scene, bar_color, scaled_rect((bar_x, bar_y, BAR_WIDTH, bar_h), s), bar_glow, glow_radius=max(2, int(12 * s)))
         # 柱顶云朵
         cloud_cx = bar_x + BAR_WIDTH // 2
         cloud_cy = bar_y
-        n_particles = int(PARTICLE_MIN + ratio * (PARTICLE_MAX - PARTICLE_MIN))
+        n_particles = int(particle_min + ratio * (particle_max - particle_min))
         cloud_color = lerp_color(CLOUD_COLOR_LOW, CLOUD_COLOR_HIGH, ratio)
         cloud_glow = lerp_color(CLOUD_GLOW_COLOR, CLOUD_COLOR_HIGH, ratio)
-        particles = generate_cloud_particles(cloud_cx, cloud_cy, ratio, n_particles, t_anim)
+        particles = generate_cloud_particles(cloud_cx, cloud_cy, ratio, n_particles, t_anim, frame_noise[i])
         for px, py in particles:
-            draw_glow_circle(screen, cloud_color, (int(px), int(py)), PARTICLE_SIZE, cloud_glow, glow_radius=8)
-        # 日期标注
-        date_text = label_font.render(f"{d['month']:02d}-{d['day']:02d}", True, LABEL_COLOR)
-        screen.blit(date_text, (bar_x + BAR_WIDTH//2 - date_text.get_width()//2, HEIGHT - BOTTOM_MARGIN + 8))
-        # 云量标注
-        value_text = value_font.render(f"{int(d['value'])}%", True, VALUE_COLOR)
-        screen.blit(value_text, (bar_x + BAR_WIDTH//2 - value_text.get_width()//2, bar_y - 28))
+            draw_glow_circle(scene, cloud_color, (int(px * s), int(py * s)), particle_size, cloud_glow, glow_radius=max(2, int(8 * s)))
 
-    # 图例
+    # 图例柱子和云朵
     legend_y = HEIGHT - 54
     # 低云量柱+云
     low_ratio = 0
     low_bar_color = lerp_color(BAR_COLOR_LOW, BAR_COLOR_HIGH, low_ratio)
     low_bar_glow = lerp_color(BAR_GLOW_COLOR, BAR_COLOR_HIGH, low_ratio)
-    draw_glow_rect(screen, low_bar_color, (LEFT_MARGIN, legend_y, BAR_WIDTH, 22), low_bar_glow, glow_radius=8)
+    draw_glow_rect(scene, low_bar_color, scaled_rect((LEFT_MARGIN, legend_y, BAR_WIDTH, 22), s), low_bar_glow, glow_radius=max(2, int(8 * s)))
     low_cloud_color = lerp_color(CLOUD_COLOR_LOW, CLOUD_COLOR_HIGH, low_ratio)
     low_cloud_glow = lerp_color(CLOUD_GLOW_COLOR, CLOUD_COLOR_HIGH, low_ratio)
-    low_particles = generate_cloud_particles(LEFT_MARGIN + BAR_WIDTH//2, legend_y, low_ratio, PARTICLE_MIN, t_anim)
+    low_particles = generate_cloud_particles(LEFT_MARGIN + BAR_WIDTH//2, legend_y, low_ratio, particle_min, t_anim, frame_noise[LEGEND_LOW_ID])
     for px, py in low_particles:
-        draw_glow_circle(screen, low_cloud_color, (int(px), int(py)), PARTICLE_SIZE, low_cloud_glow, glow_radius=5)
-    low_text = legend_font.render("Low", True, low_bar_color)
-    screen.blit(low_text, (LEFT_MARGIN + BAR_WIDTH//2 - low_text.get_width()//2, legend_y+26))
-
+        draw_glow_circle(scene, low_cloud_color, (int(px * s), int(py * s)), particle_size, low_cloud_glow, glow_radius=max(2, int(5 * s)))
     # 高云量柱+云
     high_ratio = 1
     high_bar_color = lerp_color(BAR_COLOR_LOW, BAR_COLOR_HIGH, high_ratio)
     high_bar_glow = lerp_color(BAR_GLOW_COLOR, BAR_COLOR_HIGH, high_ratio)
-    draw_glow_rect(screen, high_bar_color, (WIDTH-RIGHT_MARGIN-BAR_WIDTH, legend_y, BAR_WIDTH, 22), high_bar_glow, glow_radius=8)
+    draw_glow_rect(scene, high_bar_color, scaled_rect((WIDTH-RIGHT_MARGIN-BAR_WIDTH, legend_y, BAR_WIDTH, 22), s), high_bar_glow, glow_radius=max(2, int(8 * s)))
     high_cloud_color = lerp_color(CLOUD_COLOR_LOW, CLOUD_COLOR_HIGH, high_ratio)
     high_cloud_glow = lerp_color(CLOUD_GLOW_COLOR, CLOUD_COLOR_HIGH, high_ratio)
-    high_particles = generate_cloud_particles(WIDTH-RIGHT_MARGIN-BAR_WIDTH//2, legend_y, high_ratio, PARTICLE_MAX, t_anim)
+    high_particles = generate_cloud_particles(WIDTH-RIGHT_MARGIN-BAR_WIDTH//2, legend_y, high_ratio, particle_max, t_anim, frame_noise[LEGEND_HIGH_ID])
     for px, py in high_particles:
-        draw_glow_circle(screen, high_cloud_color, (int(px), int(py)), PARTICLE_SIZE, high_cloud_glow, glow_radius=5)
-    high_text = legend_font.render("High", True, high_bar_color)
-    screen.blit(high_text, (WIDTH-RIGHT_MARGIN-BAR_WIDTH//2 - high_text.get_width()//2, legend_y+26))
-
-    # 图例说明
-    legend_label = legend_font.render("Cloud content (bar height & cloud size)", True, LEGEND_COLOR)
-    screen.blit(legend_label, (WIDTH//2-legend_label.get_width()//2, legend_y+38))
+        draw_glow_circle(scene, high_cloud_color, (int(px * s), int(py * s)), particle_size, high_cloud_glow, glow_radius=max(2, int(5 * s)))
+    if USE_BLOOM:
+        # 整个场景一次泛光，金字塔层数随画质档位减少
+        cloud_bloom.bloom(scene, levels=governor.count(cloud_bloom.BLOOM_LEVELS))
+    scaler.present(surface)
 
-    pygame.display.flip()
-    clock.tick(FPS)
+    # 以下文字始终按窗口原始分辨率画
+    # 标题
+    title = cloud_fonts.render_text(title_font, "The average daily cloud content in Hong Kong", TITLE_COLOR)
+    surface.blit(title, (WIDTH//2-title.get_width()//2, 22))
 
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+    for d, (bar_x, bar_y) in zip(data, bars):
+        # 日期标注
+        date_text = cloud_fonts.render_text(label_font, f"{d['month']:02d}-{d['day']:02d}", LABEL_COLOR)
+        surface.blit(date_text, (bar_x + BAR_WIDTH//2 - date_text.get_width()//2, HEIGHT - BOTTOM_MARGIN + 8))
+        # 云量标注
+        value_text = cloud_fonts.render_text(value_font, f"{int(d['value'])}%", VALUE_COLOR)
+        surface.blit(value_text, (bar_x + BAR_WIDTH//2 - value_text.get_width()//2, bar_y - 28))
 
-pygame.quit()
+    # 图例文字
+    low_text = cloud_fonts.render_text(legend_font, "Low", low_bar_color)
+    surface.blit(low_text, (LEFT_MARGIN + BAR_WIDTH//2 - low_text.get_width()//2, legend_y+26))
+    high_text = cloud_fonts.render_text(legend_font, "High", high_bar_color)
+    surface.blit(high_text, (WIDTH-RIGHT_MARGIN-BAR_WIDTH//2 - high_text.get_width()//2, legend_y+26))
 
+    # 图例说明
+    legend_label = cloud_fonts.render_text(legend_font, "Cloud content (bar height & cloud size)", LEGEND_COLOR)
+    surface.blit(legend_label, (WIDTH//2-legend_label.get_width()//2, legend_y+38))
+    governor.end()
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(CAPTION)
+    clock = pygame.time.Clock()
+
+    running = True
+    while running:
+        draw(screen)
+        pygame.display.flip()
+        clock.tick(RENDER_FPS)
+        update()
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
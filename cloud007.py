@@ -1,10 +1,15 @@
 import pygame
-import pandas as pd
-import random
+import functools
 import math
+import numpy as np
+import cloud_data
+import cloud_noise
+import cloud_fonts
+import cloud_scaling
+from cloud_clock import AnimationClock, RENDER_FPS
 
 # ====== 可修改参数 ======
-CSV_FILE = 'cloud.csv'
+CSV_FILE = cloud_data.CSV_FILE
 WINDOW_WIDTH = 1400
 WINDOW_HEIGHT = 600
 BG_COLOR = (245, 245, 255)
@@ -23,46 +28,26 @@ CLOUD_WIDTH = 60
 CLOUD_HEIGHT = 38
 PARTICLE_RADIUS = 5
 PARTICLE_JITTER = 8  # 手绘感抖动
+JITTER_FPS = 30      # 抖动刷新频率（次/秒），和渲染帧率无关
 CLOUD_SPACING = 40   # 云朵之间距离
 TOP_MARGIN = 110
 BOTTOM_MARGIN = 120
 LEFT_MARGIN = 80
 RIGHT_MARGIN = 80
+CAPTION = 'The average daily cloud content in Hong Kong'
+SCROLL_STEP = 49     # 滚轮每格滚动的像素（半行）
+SCROLLBAR_COLOR = (200, 205, 230)
 
 # ====== 数据读取与处理 ======
-df = pd.read_csv(CSV_FILE, encoding='utf-8')
-df.columns = [col.strip().lower().replace(' ', '_') for col in df.columns]
-print(df.columns)  # 调试用，确认列名
-
-def get_col(cols, candidates):
-    for c in candidates:
-        if c in cols:
-            return c
-    raise Exception(f"列名不匹配，请检查csv文件！候选：{candidates}")
-
-cols = list(df.columns)
-year_col = get_col(cols, ['year', '年/year'])
-month_col = get_col(cols, ['month', '月/month'])
-day_col = get_col(cols, ['day', '日/day'])
-value_col = get_col(cols, ['value', '數值/value'])
-
-
-dates = [f"{int(row[year_col])}-{int(row[month_col]):02d}-{int(row[day_col]):02d}" for _, row in df.iterrows()]
-values = [float(row[value_col]) for _, row in df.iterrows()]
+dates, values = cloud_data.load_series(CSV_FILE)
 n_points = len(values)
 min_val, max_val = min(values), max(values)
 
-# ====== pygame初始化 ======
-pygame.init()
-screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-pygame.display.set_caption('The average daily cloud content in Hong Kong')
-
-title_font = pygame.font.SysFont(FONT_NAME, TITLE_FONT_SIZE, bold=True)
-label_font = pygame.font.SysFont(FONT_NAME, LABEL_FONT_SIZE)
-tick_font = pygame.font.SysFont(FONT_NAME, TICK_FONT_SIZE)
-legend_font = pygame.font.SysFont(FONT_NAME, LEGEND_FONT_SIZE)
-
-clock = pygame.time.Clock()
+# ====== 字体 ======
+title_font = cloud_fonts.get_font(FONT_NAME, TITLE_FONT_SIZE, bold=True)
+label_font = cloud_fonts.get_font(FONT_NAME, LABEL_FONT_SIZE)
+tick_font = cloud_fonts.get_font(FONT_NAME, TICK_FONT_SIZE)
+legend_font = cloud_fonts.get_font(FONT_NAME, LEGEND_FONT_SIZE)
 
 def lerp_color(c1, c2, t):
     return (
@@ -71,75 +56,179 @@ def lerp_color(c1, c2, t):
         int(c1[2] + (c2[2] - c1[2]) * t)
     )
 
-def draw_cloud_particles(center_x, center_y, value, n_particles, color_low, color_high):
-    # 椭圆分布，带手绘抖动
-    for i in range(n_particles):
-        angle = random.uniform(0, 2 * math.pi)
-        r = random.uniform(0.5, 1.0)
-        a = CLOUD_WIDTH * r * random.uniform(0.85, 1.15) / 2
-        b = CLOUD_HEIGHT * r * random.uniform(0.85, 1.15) / 2
-        x = center_x + a * math.cos(angle) + random.uniform(-PARTICLE_JITTER, PARTICLE_JITTER)
-        y = center_y + b * math.sin(angle) + random.uniform(-PARTICLE_JITTER, PARTICLE_JITTER)
-        # 渐变色
-        t = (value - min_val) / (max_val - min_val + 1e-6)
-        color = lerp_color(color_low, color_high, t)
-        pygame.draw.circle(screen, color, (int(x), int(y)), PARTICLE_RADIUS)
-
-def draw():
-    screen.fill(BG_COLOR)
+# 粒子噪声按 (粒子编号, 帧号) 确定；每帧只给可见的云朵算
+PARTICLE_MAX = 70
+NUM_CLOUDS = n_points + 2  # 每天一朵 + 图例两朵
+LEGEND_LOW_ID = n_points
+LEGEND_HIGH_ID = n_points + 1
+
+def particle_noise(frame, clouds):
+    clouds = np.asarray(clouds)
+    ids = (clouds[:, None] * PARTICLE_MAX + np.arange(PARTICLE_MAX)).ravel()
+    angle = cloud_noise.uniform(ids, frame, 0, 2 * math.pi, channel=1)
+    r = cloud_noise.uniform(ids, frame, 0.5, 1.0, channel=2)
+    stretch_a = cloud_noise.uniform(ids, frame, 0.85, 1.15, channel=3)
+    stretch_b = cloud_noise.uniform(ids, frame, 0.85, 1.15, channel=4)
+    jitter_x = cloud_noise.uniform(ids, frame, -PARTICLE_JITTER, PARTICLE_JITTER, channel=5)
+    jitter_y = cloud_noise.uniform(ids, frame, -PARTICLE_JITTER, PARTICLE_JITTER, channel=6)
+    noise = np.stack([angle, r, stretch_a, stretch_b, jitter_x, jitter_y], axis=1)
+    return noise.reshape(len(clouds), PARTICLE_MAX, 6)
+
+def draw_cloud_particles(surface, center_x, center_y, value, n_particles, color_low, color_high, noise, scale=1.0):
+    # 椭圆分布，带手绘抖动；scale 为动态分辨率下场景画布的缩放
+    angle, r, stretch_a, stretch_b, jitter_x, jitter_y = noise[:n_particles].T
+    a = CLOUD_WIDTH * r * stretch_a / 2
+    b = CLOUD_HEIGHT * r * stretch_b / 2
+    xs = ((center_x + a * np.cos(angle) + jitter_x) * scale).astype(int).tolist()
+    ys = ((center_y + b * np.sin(angle) + jitter_y) * scale).astype(int).tolist()
+    # 渐变色
+    t = (value - min_val) / (max_val - min_val + 1e-6)
+    color = lerp_color(color_low, color_high, t)
+    radius = max(1, round(PARTICLE_RADIUS * scale))
+    for x, y in zip(xs, ys):
+        pygame.draw.circle(surface, color, (x, y), radius)
+
+# ====== 网格布局（只算一次） ======
+# 每行放得下几朵就放几朵，按行号算位置；滚动时只画和可视区域相交的行
+COLUMNS = (WINDOW_WIDTH - RIGHT_MARGIN - LEFT_MARGIN) // (CLOUD_WIDTH + CLOUD_SPACING) + 1
+ROW_HEIGHT = CLOUD_HEIGHT + 60
+FIRST_ROW_Y = 80                                        # 第一行中心到可视区域顶部的距离
+ROW_ABOVE = CLOUD_HEIGHT // 2 + PARTICLE_JITTER + PARTICLE_RADIUS   # 一行在中心以上占的高度
+ROW_BELOW = CLOUD_HEIGHT // 2 + 10 + TICK_FONT_SIZE + 4             # 中心以下（含日期）
+n_rows = (n_points + COLUMNS - 1) // COLUMNS
+grid_rect = pygame.Rect(0, TOP_MARGIN, WINDOW_WIDTH, WINDOW_HEIGHT - BOTTOM_MARGIN - TOP_MARGIN)
+content_height = FIRST_ROW_Y + (n_rows - 1) * ROW_HEIGHT + ROW_BELOW
+max_scroll = max(0, content_height - grid_rect.height)
+cloud_x = [LEFT_MARGIN + (i % COLUMNS) * (CLOUD_WIDTH + CLOUD_SPACING) for i in range(n_points)]
+n_particles = [int(10 + (v - min_val) / (max_val - min_val + 1e-6) * 60) for v in values]
+
+scroll_y = 0
+dirty = False
+
+def row_center(row):
+    # 行中心在内容坐标里的位置，加上滚动偏移后才是屏幕位置
+    return FIRST_ROW_Y + row * ROW_HEIGHT
+
+def visible_rows():
+    top = scroll_y - FIRST_ROW_Y - ROW_BELOW
+    bottom = scroll_y + grid_rect.height - FIRST_ROW_Y + ROW_ABOVE
+    return max(0, top // ROW_HEIGHT + 1), min(n_rows, bottom // ROW_HEIGHT + 1)
+
+@functools.lru_cache(maxsize=64)
+def row_labels(row):
+    # 一整行的日期标注渲染成一条，滚动时整条 blit
+    strip = pygame.Surface((WINDOW_WIDTH, TICK_FONT_SIZE + 8), pygame.SRCALPHA)
+    for i in range(row * COLUMNS, min(n_points, (row + 1) * COLUMNS)):
+        date_text = cloud_fonts.render_text(tick_font, dates[i], LABEL_COLOR)
+        strip.blit(date_text, (cloud_x[i] - date_text.get_width() // 2, 0))
+    return strip
+
+def scroll_to(y):
+    global scroll_y, dirty
+    y = min(max(int(y), 0), max_scroll)
+    if y != scroll_y:
+        scroll_y = y
+        dirty = True
+
+def handle_event(event):
+    # 滚轮、方向键、翻页键滚动
+    if event.type == pygame.MOUSEWHEEL:
+        scroll_to(scroll_y - event.y * SCROLL_STEP)
+    elif event.type == pygame.KEYDOWN:
+        page = grid_rect.height - ROW_HEIGHT
+        moves = {pygame.K_UP: -SCROLL_STEP, pygame.K_DOWN: SCROLL_STEP,
+                 pygame.K_PAGEUP: -page, pygame.K_PAGEDOWN: page}
+        if event.key in moves:
+            scroll_to(scroll_y + moves[event.key])
+        elif event.key == pygame.K_HOME:
+            scroll_to(0)
+        elif event.key == pygame.K_END:
+            scroll_to(max_scroll)
+
+anim_clock = AnimationClock(JITTER_FPS)
+scaler = cloud_scaling.ResolutionScaler((WINDOW_WIDTH, WINDOW_HEIGHT))
+
+def update():
+    # 推进抖动时钟；抖动刷新或滚动之后才需要重绘
+    global dirty
+    changed, dirty = dirty, False
+    return anim_clock.tick() > 0 or changed
+
+def draw(surface):
+    r0, r1 = visible_rows()
+    visible = list(range(r0 * COLUMNS, min(n_points, r1 * COLUMNS)))
+    frame_noise = particle_noise(anim_clock.steps, visible + [LEGEND_LOW_ID, LEGEND_HIGH_ID])
+    legend_x = LEFT_MARGIN
+    legend_y = WINDOW_HEIGHT - BOTTOM_MARGIN + 40
 
+    # 云朵粒子（场景）：只画可见行，滚动偏移在画的时候加上
+    scene = scaler.begin(surface)
+    s = scaler.scale if scene is not surface else 1.0
+    scene.fill(BG_COLOR)
+    scene.set_clip(pygame.Rect(0, int(grid_rect.top * s), scene.get_width(), int(grid_rect.height * s)))
+    origin = grid_rect.top - scroll_y
+    for k, i in enumerate(visible):
+        y_cloud = origin + row_center(i // COLUMNS)
+        draw_cloud_particles(scene, cloud_x[i], y_cloud, values[i], n_particles[i], PARTICLE_COLOR_LOW, PARTICLE_COLOR_HIGH, frame_noise[k], s)
+    scene.set_clip(None)
+    # 图例云朵：低含量、高含量
+    draw_cloud_particles(scene, legend_x + 60, legend_y, min_val, 15, PARTICLE_COLOR_LOW, PARTICLE_COLOR_HIGH, frame_noise[-2], s)
+    draw_cloud_particles(scene, legend_x + 180, legend_y, max_val, 70, PARTICLE_COLOR_LOW, PARTICLE_COLOR_HIGH, frame_noise[-1], s)
+    scaler.present(surface)
+
+    # 以下文字和 HUD 始终按窗口原始分辨率画
     # 标题
-    title_surf = title_font.render('The average daily cloud content in Hong Kong', True, TITLE_COLOR)
+    title_surf = cloud_fonts.render_text(title_font, 'The average daily cloud content in Hong Kong', TITLE_COLOR)
     title_rect = title_surf.get_rect(center=(WINDOW_WIDTH // 2, TOP_MARGIN // 2))
-    screen.blit(title_surf, title_rect)
-
-    # 云朵粒子
-    start_x = LEFT_MARGIN
-    y_cloud = TOP_MARGIN + 80
-    for i in range(n_points):
-        x_cloud = start_x + i * (CLOUD_WIDTH + CLOUD_SPACING)
-        if x_cloud > WINDOW_WIDTH - RIGHT_MARGIN:
-            # 换行显示
-            y_cloud += CLOUD_HEIGHT + 60
-            start_x = LEFT_MARGIN
-            x_cloud = start_x
-        value = values[i]
-        # 粒子数量与云含量成正比
-        n_particles = int(10 + (value - min_val) / (max_val - min_val + 1e-6) * 60)
-        draw_cloud_particles(x_cloud, y_cloud, value, n_particles, PARTICLE_COLOR_LOW, PARTICLE_COLOR_HIGH)
-        # 日期标注
-        date_text = tick_font.render(dates[i], True, LABEL_COLOR)
-        screen.blit(date_text, (x_cloud - date_text.get_width() // 2, y_cloud + CLOUD_HEIGHT // 2 + 10))
-        start_x = x_cloud + CLOUD_WIDTH + CLOUD_SPACING
+    surface.blit(title_surf, title_rect)
+
+    # 日期标注
+    surface.set_clip(grid_rect)
+    for row in range(r0, r1):
+        surface.blit(row_labels(row), (0, origin + row_center(row) + CLOUD_HEIGHT // 2 + 10))
+    surface.set_clip(None)
+
+    # 滚动条
+    if max_scroll:
+        bar_h = max(20, grid_rect.height * grid_rect.height // content_height)
+        bar_y = grid_rect.top + (grid_rect.height - bar_h) * scroll_y // max_scroll
+        pygame.draw.rect(surface, SCROLLBAR_COLOR, (WINDOW_WIDTH - RIGHT_MARGIN // 2, bar_y, 6, bar_h), border_radius=3)
 
     # 图例
-    legend_x = LEFT_MARGIN
-    legend_y = WINDOW_HEIGHT - BOTTOM_MARGIN + 40
-    # 低含量云朵
-    draw_cloud_particles(legend_x + 60, legend_y, min_val, 15, PARTICLE_COLOR_LOW, PARTICLE_COLOR_HIGH)
-    min_text = legend_font.render('Lower', True, PARTICLE_COLOR_LOW)
-    screen.blit(min_text, (legend_x + 30, legend_y + CLOUD_HEIGHT // 2 + 18))
-    # 高含量云朵
-    draw_cloud_particles(legend_x + 180, legend_y, max_val, 70, PARTICLE_COLOR_LOW, PARTICLE_COLOR_HIGH)
-    max_text = legend_font.render('Higher', True, PARTICLE_COLOR_HIGH)
-    screen.blit(max_text, (legend_x + 160, legend_y + CLOUD_HEIGHT // 2 + 18))
+    min_text = cloud_fonts.render_text(legend_font, 'Lower', PARTICLE_COLOR_LOW)
+    surface.blit(min_text, (legend_x + 30, legend_y + CLOUD_HEIGHT // 2 + 18))
+    max_text = cloud_fonts.render_text(legend_font, 'Higher', PARTICLE_COLOR_HIGH)
+    surface.blit(max_text, (legend_x + 160, legend_y + CLOUD_HEIGHT // 2 + 18))
     # 图例说明
-    legend_label = legend_font.render('Cloud Content (%)', True, LABEL_COLOR)
-    screen.blit(legend_label, (legend_x + 80, legend_y - 28))
+    legend_label = cloud_fonts.render_text(legend_font, 'Cloud Content (%)', LABEL_COLOR)
+    surface.blit(legend_label, (legend_x + 80, legend_y - 28))
 
     # Y轴标签
-    label_surf = label_font.render('Each cloud: one day', True, LABEL_COLOR)
-    screen.blit(label_surf, (LEFT_MARGIN, TOP_MARGIN - 40))
+    label_surf = cloud_fonts.render_text(label_font, 'Each cloud: one day', LABEL_COLOR)
+    surface.blit(label_surf, (LEFT_MARGIN, TOP_MARGIN - 40))
+    if max_scroll:
+        rows_surf = cloud_fonts.render_text(tick_font, f'Rows {r0 + 1}-{r1} of {n_rows}  (wheel / arrow keys to scroll)', LABEL_COLOR)
+        surface.blit(rows_surf, (WINDOW_WIDTH - RIGHT_MARGIN - rows_surf.get_width(), TOP_MARGIN - 36))
 
 def main():
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption(CAPTION)
+    clock = pygame.time.Clock()
+
     running = True
+    needs_redraw = True
     while running:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-        draw()
-        pygame.display.flip()
-        clock.tick(30)
+            else:
+                handle_event(event)
+        if update() or needs_redraw:
+            draw(screen)
+            pygame.display.flip()
+            needs_redraw = False
+        clock.tick(RENDER_FPS)
     pygame.quit()
 
 if __name__ == '__main__':
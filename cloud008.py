@@ -1,147 +1,267 @@
 import pygame
-import pandas as pd
+import bisect
+import datetime
 import math
+import numpy as np
+import cloud_data
+import cloud_fonts
+import cloud_layout
+import cloud_stats
+from cloud_clock import RENDER_FPS
 
 # ====== 可修改参数 ======
-CSV_FILE = 'cloud.csv'
-WINDOW_WIDTH = 1200
-WINDOW_HEIGHT = 700
-BG_COLOR = (10, 10, 20)
-TITLE_COLOR = (255, 255, 255)
-AXIS_COLOR = (180, 180, 180)
-LABEL_COLOR = (220, 220, 220)
+CSV_FILE = cloud_data.CSV_FILE
+WINDOW_WIDTH, WINDOW_HEIGHT = cloud_layout.CHART_SIZE
+BG_COLOR = cloud_layout.CHART_BG
+TITLE_COLOR = cloud_layout.CHART_TITLE_COLOR
+AXIS_COLOR = cloud_layout.CHART_AXIS_COLOR
+LABEL_COLOR = cloud_layout.CHART_LABEL_COLOR
 FONT_NAME = 'arial'
 TITLE_FONT_SIZE = 36
 LABEL_FONT_SIZE = 20
 TICK_FONT_SIZE = 16
 LEGEND_FONT_SIZE = 18
-POINT_RADIUS = 7
-LINE_WIDTH = 3
+POINT_RADIUS = cloud_layout.CHART_POINT_RADIUS
+LINE_WIDTH = cloud_layout.CHART_LINE_WIDTH
+CAPTION = cloud_layout.CHART_TITLE
 
 # 渐变色（低云量到高云量）
-COLOR_LOW = (255, 120, 80)   # 橙色
-COLOR_HIGH = (80, 180, 255)  # 蓝色
-
-df = pd.read_csv(CSV_FILE, encoding='utf-8')
-df.columns = [col.strip().lower().replace(' ', '_') for col in df.columns]
-print(df.columns)  # 调试用，确认列名
-
-def get_col(cols, candidates):
-    for c in candidates:
-        if c in cols:
-            return c
-    raise Exception(f"列名不匹配,请检查csv文件,候选：{candidates}")
-
-cols = list(df.columns)
-year_col = get_col(cols, ['year', '年/year'])
-month_col = get_col(cols, ['month', '月/month'])
-day_col = get_col(cols, ['day', '日/day'])
-value_col = get_col(cols, ['value', '數值/value'])
-
-dates = [f"{int(row[year_col])}-{int(row[month_col]):02d}-{int(row[day_col]):02d}" for _, row in df.iterrows()]
-values = [float(row[value_col]) for _, row in df.iterrows()]
+COLOR_LOW = cloud_layout.CHART_COLOR_LOW
+COLOR_HIGH = cloud_layout.CHART_COLOR_HIGH
+
+# 趋势叠加层（滑动均值 + 百分位带）
+SHOW_TREND = True
+TREND_COLOR = cloud_layout.CHART_TREND_COLOR
+BAND_COLOR = cloud_layout.CHART_BAND_COLOR
+
+# 缩放和平移（滚轮缩放、左键拖动、R 复位）
+ZOOM_STEP = 1.25        # 滚轮每格缩放倍数
+MIN_VIEW_DAYS = 7       # 最多放大到一周
+DECIMATE_PX = 2         # 每个数据点至少占这么多像素，再密就按桶取最小/最大值降采样
+TICK_DAYS = [1, 2, 7, 14]               # X轴刻度间隔候选（天）
+TICK_MONTHS = [1, 2, 3, 6, 12, 24, 60, 120]  # 更长时按月/年对齐
+
+dates, values = cloud_data.load_series(CSV_FILE)
 n_points = len(values)
 min_val, max_val = min(values), max(values)
+trend = cloud_stats.RollingStats.from_values(values, [d[:7] for d in dates])
+
+# 日期索引：按日期序数二分查找可见范围（缺测日期没补时也成立）
+ordinals = [datetime.date.fromisoformat(d).toordinal() for d in dates]
+value_array = np.asarray(values, dtype=float)
 
-# ====== pygame初始化 ======
-pygame.init()
-screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-pygame.display.set_caption('The average daily cloud content in Hong Kong')
+def build_levels(v):
+    # 降采样金字塔：第 k 层每 2^k 个点一个桶，存 (最小值, 最大值, 均值)
+    levels = [None]
+    size = 2
+    while size < len(v):
+        pad = (-len(v)) % size
+        buckets = np.concatenate([v, np.full(pad, v[-1])]).reshape(-1, size)
+        levels.append((buckets.min(1), buckets.max(1), buckets.mean(1)))
+        size *= 2
+    return levels
+
+levels = build_levels(value_array)
 
 # ====== 字体设置 ======
-title_font = pygame.font.SysFont(FONT_NAME, TITLE_FONT_SIZE, bold=True)
-label_font = pygame.font.SysFont(FONT_NAME, LABEL_FONT_SIZE)
-tick_font = pygame.font.SysFont(FONT_NAME, TICK_FONT_SIZE)
-legend_font = pygame.font.SysFont(FONT_NAME, LEGEND_FONT_SIZE)
+title_font = cloud_fonts.get_font(FONT_NAME, TITLE_FONT_SIZE, bold=True)
+label_font = cloud_fonts.get_font(FONT_NAME, LABEL_FONT_SIZE)
+tick_font = cloud_fonts.get_font(FONT_NAME, TICK_FONT_SIZE)
+legend_font = cloud_fonts.get_font(FONT_NAME, LEGEND_FONT_SIZE)
 
 # ====== 坐标轴区域 ======
-LEFT_MARGIN = 120
-RIGHT_MARGIN = 80
-TOP_MARGIN = 100
-BOTTOM_MARGIN = 120
-plot_width = WINDOW_WIDTH - LEFT_MARGIN - RIGHT_MARGIN
-plot_height = WINDOW_HEIGHT - TOP_MARGIN - BOTTOM_MARGIN
+LEFT_MARGIN = cloud_layout.CHART_LEFT_MARGIN
+RIGHT_MARGIN = cloud_layout.CHART_RIGHT_MARGIN
+TOP_MARGIN = cloud_layout.CHART_TOP_MARGIN
+BOTTOM_MARGIN = cloud_layout.CHART_BOTTOM_MARGIN
+plot_width = cloud_layout.CHART_PLOT_WIDTH
+plot_height = cloud_layout.CHART_PLOT_HEIGHT
+plot_rect = pygame.Rect(LEFT_MARGIN, TOP_MARGIN, plot_width, plot_height)
+
+# ====== 视口 ======
+full_start, full_end = ordinals[0], max(ordinals[-1], ordinals[0] + 1)
+view_start, view_end = full_start, full_end   # 可见的日期范围（日期序数，可以是小数）
+y_lo, y_hi = min_val, max_val                 # 可见范围内的纵轴范围
+dragging = False
+dirty = False
+band_surf = None
 
 def get_x(i):
-    return LEFT_MARGIN + int(i * plot_width / (n_points - 1))
+    return LEFT_MARGIN + int((ordinals[i] - view_start) * plot_width / (view_end - view_start))
 
 def get_y(val):
-    return TOP_MARGIN + int((max_val - val) * plot_height / (max_val - min_val + 1e-6))
-
-def lerp_color(c1, c2, t):
-    return (
-        int(c1[0] + (c2[0] - c1[0]) * t),
-        int(c1[1] + (c2[1] - c1[1]) * t),
-        int(c1[2] + (c2[2] - c1[2]) * t)
-    )
-
-def smooth_curve(points, smoothness=0.2):
-    # 用贝塞尔曲线平滑折线
-    result = []
-    for i in range(len(points)-1):
-        p0 = points[i]
-        p1 = points[i+1]
-        mid = ((p0[0]+p1[0])//2, (p0[1]+p1[1])//2)
-        result.append(p0)
-        # 插入中点
-        for t in [smoothness, 1-smoothness]:
-            x = int(p0[0] * (1-t) + p1[0] * t)
-            y = int(p0[1] * (1-t) + p1[1] * t)
-            result.append((x, y))
-    result.append(points[-1])
-    return result
-
-def draw():
-    screen.fill(BG_COLOR)
+    return TOP_MARGIN + int((y_hi - val) * plot_height / (y_hi - y_lo + 1e-6))
+
+def ordinal_at(x):
+    return view_start + (x - LEFT_MARGIN) * (view_end - view_start) / plot_width
+
+lerp_color = cloud_layout.lerp_color
+smooth_curve = cloud_layout.smooth_curve
+
+def set_view(start, end):
+    # 限制在数据范围内，缩放不超过一周到全部
+    global view_start, view_end, dirty
+    span = min(max(end - start, MIN_VIEW_DAYS), full_end - full_start)
+    start = min(max(start, full_start), full_end - span)
+    if (start, start + span) != (view_start, view_end):
+        view_start, view_end = start, start + span
+        dirty = True
+
+def zoom(factor, anchor_x):
+    # 以鼠标所在日期为中心缩放
+    anchor = ordinal_at(anchor_x)
+    set_view(anchor - (anchor - view_start) / factor, anchor + (view_end - anchor) / factor)
+
+def handle_event(event):
+    global dragging
+    if event.type == pygame.MOUSEWHEEL:
+        x = (getattr(event, 'pos', None) or pygame.mouse.get_pos())[0]
+        zoom(ZOOM_STEP ** event.y, min(max(x, plot_rect.left), plot_rect.right))
+    elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and plot_rect.collidepoint(event.pos):
+        dragging = True
+    elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+        dragging = False
+    elif event.type == pygame.MOUSEMOTION and dragging and event.rel[0]:
+        shift = event.rel[0] * (view_end - view_start) / plot_width
+        set_view(view_start - shift, view_end - shift)
+    elif event.type == pygame.KEYDOWN and event.key in (pygame.K_r, pygame.K_HOME):
+        set_view(full_start, full_end)
+
+def visible_range():
+    # 二分查找可见的点，两边各多带一个点，让线能画到边框外再被裁掉
+    lo = max(0, bisect.bisect_left(ordinals, view_start) - 1)
+    hi = min(n_points, bisect.bisect_right(ordinals, view_end) + 1)
+    return lo, hi
+
+def decimation_level(count):
+    max_points = plot_width // DECIMATE_PX
+    if count <= max_points:
+        return 0
+    return min(len(levels) - 1, math.ceil(math.log2(count / max_points)))
+
+def date_ticks(start, end, max_ticks=cloud_layout.CHART_X_TICKS):
+    # [(日期序数, 标签)]：短范围按天，长范围对齐到月初/年初
+    span = end - start
+    for step in TICK_DAYS:
+        if span / step <= max_ticks:
+            first = math.ceil(start / step) * step
+            return [(o, datetime.date.fromordinal(o).isoformat()) for o in range(first, int(end) + 1, step)]
+    months = next((m for m in TICK_MONTHS if span / (m * 30.44) <= max_ticks), TICK_MONTHS[-1])
+    d = datetime.date.fromordinal(math.ceil(start))
+    m = d.year * 12 + d.month - 1 + (d.day != 1)
+    m = math.ceil(m / months) * months
+    ticks = []
+    while True:
+        o = datetime.date(m // 12, m % 12 + 1, 1).toordinal()
+        if o > end:
+            return ticks
+        ticks.append((o, f'{m // 12}' if months % 12 == 0 else f'{m // 12}-{m % 12 + 1:02d}'))
+        m += months
+
+def update():
+    # 静态图表，只有缩放/平移之后才需要重绘
+    global dirty
+    changed, dirty = dirty, False
+    return changed
+
+def draw(surface):
+    global y_lo, y_hi, band_surf
+    surface.fill(BG_COLOR)
+    i0, i1 = visible_range()
+    level = decimation_level(i1 - i0)
+    y_lo, y_hi = float(value_array[i0:i1].min()), float(value_array[i0:i1].max())
 
     # 标题
-    title_surf = title_font.render('The average daily cloud content in Hong Kong', True, TITLE_COLOR)
+    title_surf = cloud_fonts.render_text(title_font, CAPTION, TITLE_COLOR)
     title_rect = title_surf.get_rect(center=(WINDOW_WIDTH // 2, TOP_MARGIN // 2))
-    screen.blit(title_surf, title_rect)
+    surface.blit(title_surf, title_rect)
 
     # 坐标轴
-    pygame.draw.line(screen, AXIS_COLOR, (LEFT_MARGIN, TOP_MARGIN), (LEFT_MARGIN, WINDOW_HEIGHT - BOTTOM_MARGIN), 2)
-    pygame.draw.line(screen, AXIS_COLOR, (LEFT_MARGIN, WINDOW_HEIGHT - BOTTOM_MARGIN), (WINDOW_WIDTH - RIGHT_MARGIN, WINDOW_HEIGHT - BOTTOM_MARGIN), 2)
+    pygame.draw.line(surface, AXIS_COLOR, (LEFT_MARGIN, TOP_MARGIN), (LEFT_MARGIN, WINDOW_HEIGHT - BOTTOM_MARGIN), 2)
+    pygame.draw.line(surface, AXIS_COLOR, (LEFT_MARGIN, WINDOW_HEIGHT - BOTTOM_MARGIN), (WINDOW_WIDTH - RIGHT_MARGIN, WINDOW_HEIGHT - BOTTOM_MARGIN), 2)
 
-    # Y轴刻度和标签
-    n_ticks = 5
+    # Y轴刻度和标签（跟着可见范围）
+    n_ticks = cloud_layout.CHART_Y_TICKS
     for i in range(n_ticks + 1):
-        val = int(min_val + i * (max_val - min_val) / n_ticks)
+        val = int(y_lo + i * (y_hi - y_lo) / n_ticks)
         y = get_y(val)
-        tick_surf = tick_font.render(f'{val}', True, LABEL_COLOR)
-        screen.blit(tick_surf, (LEFT_MARGIN - 50, y - 10))
-        pygame.draw.line(screen, AXIS_COLOR, (LEFT_MARGIN - 8, y), (LEFT_MARGIN + 8, y), 2)
-    label_surf = label_font.render('Cloud Content (%)', True, LABEL_COLOR)
-    screen.blit(label_surf, (LEFT_MARGIN - 90, TOP_MARGIN - 40))
-
-    # X轴刻度和标签（只显示部分日期，防止重叠）
-    step = max(1, n_points // 8)
-    for i in range(0, n_points, step):
-        x = get_x(i)
-        tick_surf = tick_font.render(dates[i], True, LABEL_COLOR)
+        tick_surf = cloud_fonts.render_text(tick_font, f'{val}', LABEL_COLOR)
+        surface.blit(tick_surf, (LEFT_MARGIN - 50, y - 10))
+        pygame.draw.line(surface, AXIS_COLOR, (LEFT_MARGIN - 8, y), (LEFT_MARGIN + 8, y), 2)
+    label_surf = cloud_fonts.render_text(label_font, 'Cloud Content (%)', LABEL_COLOR)
+    surface.blit(label_surf, (LEFT_MARGIN - 90, TOP_MARGIN - 40))
+
+    # X轴刻度和标签（按可见范围挑间隔，防止重叠）
+    for o, text in date_ticks(view_start, view_end):
+        x = LEFT_MARGIN + int((o - view_start) * plot_width / (view_end - view_start))
+        tick_surf = cloud_fonts.render_text(tick_font, text, LABEL_COLOR)
         tick_rect = tick_surf.get_rect(center=(x, WINDOW_HEIGHT - BOTTOM_MARGIN + 25))
-        screen.blit(tick_surf, tick_rect)
-        pygame.draw.line(screen, AXIS_COLOR, (x, WINDOW_HEIGHT - BOTTOM_MARGIN - 8), (x, WINDOW_HEIGHT - BOTTOM_MARGIN + 8), 2)
-    label_surf = label_font.render('Date', True, LABEL_COLOR)
-    screen.blit(label_surf, (WINDOW_WIDTH - RIGHT_MARGIN - 60, WINDOW_HEIGHT - BOTTOM_MARGIN + 50))
-
-    # 数据点和渐变色
-    points = [(get_x(i), get_y(values[i])) for i in range(n_points)]
-    smooth_points = smooth_curve(points, smoothness=0.3)
-
-    # 绘制平滑曲线
-    for i in range(len(smooth_points)-1):
-        # 按云量渐变色
-        idx = min(i, n_points-1)
-        t = (values[idx] - min_val) / (max_val - min_val + 1e-6)
-        color = lerp_color(COLOR_LOW, COLOR_HIGH, t)
-        pygame.draw.line(screen, color, smooth_points[i], smooth_points[i+1], LINE_WIDTH)
+        surface.blit(tick_surf, tick_rect)
+        pygame.draw.line(surface, AXIS_COLOR, (x, WINDOW_HEIGHT - BOTTOM_MARGIN - 8), (x, WINDOW_HEIGHT - BOTTOM_MARGIN + 8), 2)
+    label_surf = cloud_fonts.render_text(label_font, 'Date', LABEL_COLOR)
+    surface.blit(label_surf, (WINDOW_WIDTH - RIGHT_MARGIN - 60, WINDOW_HEIGHT - BOTTOM_MARGIN + 50))
 
-    # 绘制数据点
-    for i, (x, y) in enumerate(points):
-        t = (values[i] - min_val) / (max_val - min_val + 1e-6)
-        color = lerp_color(COLOR_LOW, COLOR_HIGH, t)
-        pygame.draw.circle(screen, color, (x, y), POINT_RADIUS)
+    # 曲线只画在绘图区里（留出圆点半径；放大后左右边缘的线要正好切在坐标轴上）
+    clip = plot_rect.inflate(POINT_RADIUS * 2, POINT_RADIUS * 2)
+    if view_end - view_start < full_end - full_start:
+        clip.update(LEFT_MARGIN, clip.top, plot_width, clip.height)
+    surface.set_clip(clip)
+    step = 2 ** level
+
+    # 趋势带（百分位之间的半透明区域）
+    if SHOW_TREND:
+        lo_q, hi_q = cloud_stats.BAND_PERCENTILES
+        idx = range(i0, i1, step)
+        upper = [(get_x(i), get_y(trend.bands[hi_q][i])) for i in idx]
+        lower = [(get_x(i), get_y(trend.bands[lo_q][i])) for i in idx]
+        if band_surf is None:
+            band_surf = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+        band_surf.fill((0, 0, 0, 0))
+        if len(upper) > 1:
+            pygame.draw.polygon(band_surf, BAND_COLOR, upper + lower[::-1])
+        surface.blit(band_surf, (0, 0))
+
+    if level == 0:
+        # 数据点和渐变色
+        points = [(get_x(i), get_y(values[i])) for i in range(i0, i1)]
+        smooth_points = smooth_curve(points, smoothness=0.3)
+
+        # 绘制平滑曲线
+        for i in range(len(smooth_points)-1):
+            # 按云量渐变色
+            idx = i0 + min(i, len(points)-1)
+            t = (values[idx] - min_val) / (max_val - min_val + 1e-6)
+            color = lerp_color(COLOR_LOW, COLOR_HIGH, t)
+            pygame.draw.line(surface, color, smooth_points[i], smooth_points[i+1], LINE_WIDTH)
+
+        # 绘制数据点
+        for i, (x, y) in enumerate(points, i0):
+            t = (values[i] - min_val) / (max_val - min_val + 1e-6)
+            color = lerp_color(COLOR_LOW, COLOR_HIGH, t)
+            pygame.draw.circle(surface, color, (x, y), POINT_RADIUS)
+    else:
+        # 降采样：每个桶画一条最小值到最大值的竖线，再连成折线
+        mins, maxs, means = levels[level]
+        prev = None
+        for b in range(i0 // step, (i1 - 1) // step + 1):
+            x = get_x(min(b * step + step // 2, n_points - 1))
+            top, bottom = (x, get_y(maxs[b])), (x, get_y(mins[b]))
+            t = (means[b] - min_val) / (max_val - min_val + 1e-6)
+            color = lerp_color(COLOR_LOW, COLOR_HIGH, t)
+            if prev:
+                pygame.draw.line(surface, color, prev, top, LINE_WIDTH)
+            pygame.draw.line(surface, color, top, bottom, LINE_WIDTH)
+            prev = bottom
+
+    # 滑动均值
+    if SHOW_TREND:
+        mean_points = [(get_x(i), get_y(trend.mean[i])) for i in range(i0, i1, step)]
+        if len(mean_points) > 1:
+            pygame.draw.lines(surface, TREND_COLOR, False, mean_points, 2)
+    surface.set_clip(None)
+    if SHOW_TREND:
+        trend_label = cloud_fonts.render_text(legend_font, f'{cloud_stats.TREND_WINDOW}-day mean & {lo_q}-{hi_q}% band', TREND_COLOR)
+        surface.blit(trend_label, (WINDOW_WIDTH - RIGHT_MARGIN - trend_label.get_width(), TOP_MARGIN - 40))
 
     # 图例（渐变条）
     legend_x, legend_y = LEFT_MARGIN, WINDOW_HEIGHT - BOTTOM_MARGIN + 70
@@ -149,22 +269,40 @@ def draw():
     for i in range(legend_w):
         t = i / legend_w
         color = lerp_color(COLOR_LOW, COLOR_HIGH, t)
-        pygame.draw.rect(screen, color, (legend_x + i, legend_y, 1, legend_h))
+        pygame.draw.rect(surface, color, (legend_x + i, legend_y, 1, legend_h))
     # 图例文字
-    legend_text1 = legend_font.render('Lower', True, COLOR_LOW)
-    legend_text2 = legend_font.render('Higher', True, COLOR_HIGH)
-    screen.blit(legend_text1, (legend_x - 10, legend_y + legend_h + 5))
-    screen.blit(legend_text2, (legend_x + legend_w - 60, legend_y + legend_h + 5))
-    legend_label = legend_font.render('Cloud Content (%)', True, LABEL_COLOR)
-    screen.blit(legend_label, (legend_x + legend_w // 2 - 60, legend_y - 28))
+    legend_text1 = cloud_fonts.render_text(legend_font, 'Lower', COLOR_LOW)
+    legend_text2 = cloud_fonts.render_text(legend_font, 'Higher', COLOR_HIGH)
+    surface.blit(legend_text1, (legend_x - 10, legend_y + legend_h + 5))
+    surface.blit(legend_text2, (legend_x + legend_w - 60, legend_y + legend_h + 5))
+    legend_label = cloud_fonts.render_text(legend_font, 'Cloud Content (%)', LABEL_COLOR)
+    surface.blit(legend_label, (legend_x + legend_w // 2 - 60, legend_y - 28))
+    hint = cloud_fonts.render_text(tick_font, 'Wheel: zoom   Drag: pan   R: reset', AXIS_COLOR)
+    surface.blit(hint, (WINDOW_WIDTH - RIGHT_MARGIN - hint.get_width(), legend_y + legend_h + 5))
 
 # ====== 主循环 ======
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-    draw()
-    pygame.display.flip()
-
-pygame.quit()
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption(CAPTION)
+    clock = pygame.time.Clock()
+
+    running = True
+    needs_redraw = True
+    while running:
+        # 先处理输入再画，缩放/平移在同一帧里就能看到
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            else:
+                handle_event(event)
+        if update() or needs_redraw:
+            draw(screen)
+            pygame.display.flip()
+            needs_redraw = False
+        clock.tick(RENDER_FPS)
+
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
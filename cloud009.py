@@ -1,12 +1,16 @@
 import pygame
-import pandas as pd
-import math
 import os
+import sys
+import cloud_data
+import cloud_fonts
+import cloud_ring
+import cloud_scaling
 
 # ====== 可修改参数 ======
-CSV_FILE = 'cloud.csv'
+CSV_FILE = cloud_data.CSV_FILE
 WIDTH, HEIGHT = 900, 1000
 CENTER = (WIDTH // 2, HEIGHT // 2)
+DAYS_PER_SECOND = 12  # 数据播放速度（天/秒）
 RING_RADIUS = 300
 
 BG_COLOR = (0, 0, 0)
@@ -16,6 +20,10 @@ VALUE_COLOR = (80, 255, 220)
 LOW_COLOR = (30, 60, 180)
 HIGH_COLOR = (120, 255, 255)
 GLOW_COLOR = (255, 255, 255)
+SHOW_TREND = True  # 环内画一圈滑动均值
+TREND_RADIUS_MIN = RING_RADIUS * 0.5
+TREND_RADIUS_MAX = RING_RADIUS * 0.8
+TREND_COLOR = VALUE_COLOR
 TITLE_FONT_NAME = 'bahnschrift'  # 未来感字体，可换成 'Orbitron', 'Arial Black', 'Segoe UI'
 INFO_FONT_NAME = 'bahnschrift'
 LEGEND_FONT_NAME = 'bahnschrift'
@@ -23,128 +31,89 @@ TITLE_FONT_SIZE = 38
 INFO_FONT_SIZE = 36
 VALUE_FONT_SIZE = 32
 LEGEND_FONT_SIZE = 22
+CAPTION = 'The average daily cloud content in Hong Kong'
+DIRTY_RECTS = True  # 每帧只重画、只提交变化的区域；False 时整屏重画再 flip
+COLOR_BY = 'value'  # 'anomaly'：按和多年同期均值的差上色；'zscore'：按标准分上色（半径仍按云量）
+PALETTE = [(0.0, LOW_COLOR), (0.5, HIGH_COLOR), (1.0, (255, 255, 255))]  # 深蓝 -> 青蓝 -> 白
 
-# ====== 读取数据 ======
-df = pd.read_csv(CSV_FILE, encoding='utf-8')
-data = []
-for i, row in df.iterrows():
-    if pd.isna(row['Month']) or pd.isna(row['Day']) or pd.isna(row['Value']):
-        continue
-    data.append({
-        'month': int(row['Month']),
-        'day': int(row['Day']),
-        'value': float(row['Value'])
-    })
-data.sort(key=lambda x: (x['month'], x['day']))
-
-values = [d['value'] for d in data]
-min_value = min(values)
-max_value = max(values)
-num_days = len(data)
-angle_step = 2 * math.pi / num_days
-
-def get_color(value):
-    # 云量越大，颜色越亮，低为深蓝，高为亮青蓝白
-    ratio = (value - min_value) / (max_value - min_value) if max_value > min_value else 0
-    # 深蓝 -> 青蓝 -> 白
-    if ratio < 0.5:
-        t = ratio * 2
-        r = int(LOW_COLOR[0] + (HIGH_COLOR[0] - LOW_COLOR[0]) * t)
-        g = int(LOW_COLOR[1] + (HIGH_COLOR[1] - LOW_COLOR[1]) * t)
-        b = int(LOW_COLOR[2] + (HIGH_COLOR[2] - LOW_COLOR[2]) * t)
-    else:
-        t = (ratio - 0.5) * 2
-        r = int(HIGH_COLOR[0] + (255 - HIGH_COLOR[0]) * t)
-        g = int(HIGH_COLOR[1] + (255 - HIGH_COLOR[1]) * t)
-        b = int(HIGH_COLOR[2] + (255 - HIGH_COLOR[2]) * t)
-    return (r, g, b)
-
-def get_radius(value):
-    # 云量越大，圆点越大
-    if max_value == min_value:
-        return 10
-    return 10 + (value - min_value) / (max_value - min_value) * 30
-
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('The average daily cloud content in Hong Kong')
-
-# 字体
-def get_font(name, size, bold=False):
-    try:
-        return pygame.font.SysFont(name, size, bold=bold)
-    except:
-        return pygame.font.SysFont('arial', size, bold=bold)
-
-title_font = get_font(TITLE_FONT_NAME, TITLE_FONT_SIZE, True)
-info_font = get_font(INFO_FONT_NAME, INFO_FONT_SIZE, True)
-value_font = get_font(INFO_FONT_NAME, VALUE_FONT_SIZE, True)
-legend_font = get_font(LEGEND_FONT_NAME, LEGEND_FONT_SIZE, True)
-clock = pygame.time.Clock()
+title_font = cloud_fonts.get_font(TITLE_FONT_NAME, TITLE_FONT_SIZE, True)
+info_font = cloud_fonts.get_font(INFO_FONT_NAME, INFO_FONT_SIZE, True)
+value_font = cloud_fonts.get_font(INFO_FONT_NAME, VALUE_FONT_SIZE, True)
+legend_font = cloud_fonts.get_font(LEGEND_FONT_NAME, LEGEND_FONT_SIZE, True)
 
-running = True
-current = 0
+def draw_title(surface):
+    title = cloud_fonts.render_text(title_font, "The average daily cloud content in Hong Kong", TITLE_COLOR)
+    surface.blit(title, (WIDTH//2-title.get_width()//2, 40))
 
-while running:
-    screen.fill(BG_COLOR)
-
-    # 标题
-    title = title_font.render("The average daily cloud content in Hong Kong", True, TITLE_COLOR)
-    screen.blit(title, (WIDTH//2-title.get_width()//2, 40))
-
-    # 绘制所有圆点
-    for i, d in enumerate(data):
-        angle = i * angle_step
-        x = CENTER[0] + RING_RADIUS * math.cos(angle - math.pi/2)
-        y = CENTER[1] + RING_RADIUS * math.sin(angle - math.pi/2)
-        color = get_color(d['value'])
-        radius = get_radius(d['value'])
-        if i == current:
-            # 高亮当前日期：外发光描边
-            for glow in range(1, 8):
-                alpha = max(0, 120 - glow*15)
-                glow_surf = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-                pygame.draw.circle(glow_surf, (*GLOW_COLOR, alpha), (int(x), int(y)), int(radius)+glow*2)
-                screen.blit(glow_surf, (0,0))
-            pygame.draw.circle(screen, color, (int(x), int(y)), int(radius))
-            pygame.draw.circle(screen, (255,255,255), (int(x), int(y)), int(radius), 2)
-        else:
-            pygame.draw.circle(screen, color, (int(x), int(y)), int(radius))
-
-    # 中间英文日期和云量，无背景
-    d = data[current]
-    info_text = f"{d['month']:02d}-{d['day']:02d}"
-    value_text = f"Cloud content: {d['value']:.0f}%"
-    info_surface = info_font.render(info_text, True, LABEL_COLOR)
-    value_surface = value_font.render(value_text, True, VALUE_COLOR)
-    screen.blit(info_surface, (CENTER[0]-info_surface.get_width()//2, CENTER[1]-40))
-    screen.blit(value_surface, (CENTER[0]-value_surface.get_width()//2, CENTER[1]+10))
+def draw_background(surface):
+    surface.fill(BG_COLOR)
+    draw_title(surface)
 
+def draw_legend(surface):
     # 下方图例
     legend_y = HEIGHT - 90
     # 低云量
-    low_color = get_color(min_value)
-    low_radius = get_radius(min_value)
-    pygame.draw.circle(screen, low_color, (CENTER[0]-100, legend_y), int(low_radius))
-    low_text = legend_font.render("Low", True, low_color)
-    screen.blit(low_text, (CENTER[0]-100-low_text.get_width()//2, legend_y+low_radius+8))
+    low_color = ring.color(ring.min_value)
+    low_radius = ring.radius(ring.min_value)
+    pygame.draw.circle(surface, low_color, (CENTER[0]-100, legend_y), int(low_radius))
+    low_text = cloud_fonts.render_text(legend_font, "Low", low_color)
+    surface.blit(low_text, (CENTER[0]-100-low_text.get_width()//2, legend_y+low_radius+8))
     # 高云量
-    high_color = get_color(max_value)
-    high_radius = get_radius(max_value)
-    pygame.draw.circle(screen, high_color, (CENTER[0]+100, legend_y), int(high_radius))
-    high_text = legend_font.render("High", True, high_color)
-    screen.blit(high_text, (CENTER[0]+100-high_text.get_width()//2, legend_y+high_radius+8))
+    high_color = ring.color(ring.max_value)
+    high_radius = ring.radius(ring.max_value)
+    pygame.draw.circle(surface, high_color, (CENTER[0]+100, legend_y), int(high_radius))
+    high_text = cloud_fonts.render_text(legend_font, "High", high_color)
+    surface.blit(high_text, (CENTER[0]+100-high_text.get_width()//2, legend_y+high_radius+8))
     # 图例说明
-    legend_label = legend_font.render("Cloud content (color & size)", True, (180, 220, 255))
-    screen.blit(legend_label, (CENTER[0]-legend_label.get_width()//2, legend_y+max(low_radius, high_radius)+32))
+    legend_label = cloud_fonts.render_text(legend_font, "Cloud content (color & size)", (180, 220, 255))
+    surface.blit(legend_label, (CENTER[0]-legend_label.get_width()//2, legend_y+max(low_radius, high_radius)+32))
 
-    pygame.display.flip()
-    clock.tick(12)  # 动画速度
+def draw_label(surface, d):
+    # 中间英文日期和云量，无背景
+    info_surface = cloud_fonts.render_text(info_font, f"{d['month']:02d}-{d['day']:02d}", LABEL_COLOR)
+    value_surface = cloud_fonts.render_text(value_font, f"Cloud content: {d['value']:.0f}%", VALUE_COLOR)
+    return [surface.blit(info_surface, (CENTER[0]-info_surface.get_width()//2, CENTER[1]-40)),
+            surface.blit(value_surface, (CENTER[0]-value_surface.get_width()//2, CENTER[1]+10))]
+
+def tooltip(d):
+    return [f"{d['month']:02d}-{d['day']:02d}", f"Cloud content: {d['value']:.0f}%"]
+
+ring = cloud_ring.Ring(CENTER, RING_RADIUS, PALETTE, (10, 30), DAYS_PER_SECOND, (TREND_RADIUS_MIN, TREND_RADIUS_MAX), TREND_COLOR,
+                       draw_background, draw_legend, draw_label, tooltip, legend_font,
+                       glow_color=GLOW_COLOR, glow_spread=14, select_color=GLOW_COLOR, show_trend=SHOW_TREND, color_by=COLOR_BY)
+anim_clock = ring.clock
+layer = ring.layer
+update = ring.update
+scaler = cloud_scaling.ResolutionScaler((WIDTH, HEIGHT))
+handle_event = ring.handle_event
+set_data = ring.set_data
+apply_dataset = ring.apply_dataset
+
+def draw(surface):
+    # 整帧重画（dashboard、DIRTY_RECTS = False）时经过动态分辨率：降了档就把环、圆点和光晕画在缩小的画布上再放大，
+    # 标题、图例和文字按窗口原始分辨率画。单独运行、只重画脏矩形时每帧本来就很省，用不上
+    scene = scaler.begin(surface)
+    if scene is surface:
+        ring.draw(surface)
+    else:
+        scene.fill(BG_COLOR)
+        ring.draw_scaled(scene, scaler.scale)
+    scaler.present(surface)
+    if scene is not surface:
+        draw_title(surface)
+        draw_legend(surface)
+        ring.draw_overlay(surface)
+
+def restyle():
+    # 改了 COLOR_BY 之后（dashboard --color-by）重新上色
+    ring.color_by = COLOR_BY
+    ring.restyle()
 
-    current = (current + 1) % num_days
+# ====== 读取数据 ======
+set_data(cloud_data.load_days(CSV_FILE))
 
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+def main():
+    cloud_ring.main(sys.modules[__name__])
 
-pygame.quit()
+if __name__ == '__main__':
+    main()
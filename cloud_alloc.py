@@ -0,0 +1,246 @@
+import argparse
+import collections
+import functools
+import importlib
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import pygame
+import cloud_fonts
+from cloud_views import ALL_VIEWS
+
+# ====== 可修改参数 ======
+SNAPSHOT_SECONDS = 10    # 多久拍一次 tracemalloc 快照并打印一次报告
+USE_TRACEMALLOC = True   # False 时只数 Surface：开销很小，帧率基本不受影响
+TRACE_DEPTH = 10         # tracemalloc 记录的调用栈深度，要够深才能把共用模块（泛光、缓存）里的分配算到视图头上
+TOP_SITES = 8            # 每个视图列出多少个分配最多的位置
+RUN_SECONDS = 30
+WRAPPED_FUNCTIONS = [    # 除了 pygame.Surface(...) 之外，这些函数每次调用也会新建一个 Surface
+    ('transform', 'smoothscale'), ('transform', 'scale'), ('transform', 'rotate'),
+    ('transform', 'rotozoom'), ('transform', 'flip'), ('surfarray', 'make_surface'),
+]
+SITE_SKIP = ('cloud_alloc.py', 'cloud_sprites.py', 'cloud_fonts.py', 'functools.py')  # 这些文件里的创建算到调用它们的地方
+
+# 分配跟踪（排查 Surface 反复创建、长时间运行内存慢慢上涨）：
+# 把 pygame.Surface 和会新建 Surface 的函数换成包一层的版本，按视图、按调用位置统计每帧新建了多少个、多少字节；
+# 文字缓存（cloud_fonts.render_text）没命中时渲染出来的文字也算一次。
+# 同时开 tracemalloc，每隔 SNAPSHOT_SECONDS 拍一次快照，列出每个视图分配最多的代码行和上次以来涨得最多的行。
+# 只在调试时打开：tracemalloc 会让 NumPy 多的视图（泛光）慢好几倍，快照本身也要几十毫秒；
+# 只想看 Surface 个数和帧率时关掉它（USE_TRACEMALLOC / --surfaces-only）。tracemalloc 等视图导入、数据读完之后才开
+# （开着它导入 pandas 要慢几十倍，而且关心的是每帧的分配，不是启动时的）。
+
+_OriginalSurface = pygame.Surface
+_tracker = None
+
+
+class ViewStats:
+    def __init__(self, name):
+        self.name = name
+        self.frames = 0
+        self.surfaces = 0
+        self.bytes = 0
+        self.frame_surfaces = 0   # 当前帧到目前为止
+        self.max_frame_surfaces = 0
+        self.sites = collections.Counter()        # 位置 -> 个数
+        self.site_bytes = collections.Counter()   # 位置 -> 字节
+
+    def end_frame(self):
+        self.frames += 1
+        self.max_frame_surfaces = max(self.max_frame_surfaces, self.frame_surfaces)
+        self.frame_surfaces = 0
+
+
+def _site(frame):
+    # 第一个不在 SITE_SKIP 里的调用位置，如 'cloud001.py:92 draw'
+    while frame is not None and os.path.basename(frame.f_code.co_filename) in SITE_SKIP:
+        frame = frame.f_back
+    if frame is None:
+        return '?'
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+class Tracker:
+    def __init__(self, default_view, files=None, interval=SNAPSHOT_SECONDS, top=TOP_SITES, trace=USE_TRACEMALLOC):
+        self.default_view = default_view
+        self.trace = trace
+        self.files = dict(files or {})   # 视图名 -> 源文件，用来从 tracemalloc 快照里筛出这个视图的分配
+        self.interval = interval
+        self.top = top
+        self.stack = []
+        self.stats = {}
+        self.snapshot = None
+        self.next_snapshot = time.perf_counter() + interval
+
+    def view(self):
+        return self.stack[-1] if self.stack else self.default_view
+
+    def stats_for(self, name):
+        if name not in self.stats:
+            self.stats[name] = ViewStats(name)
+        return self.stats[name]
+
+    def record(self, surface, frame):
+        s = self.stats_for(self.view())
+        size = surface.get_width() * surface.get_height() * surface.get_bytesize()
+        site = _site(frame)
+        s.surfaces += 1
+        s.frame_surfaces += 1
+        s.bytes += size
+        s.sites[site] += 1
+        s.site_bytes[site] += size
+
+    def present(self):
+        # 一帧画完（display.flip / display.update）：单独运行的视图在这里结束一帧；到时间了拍快照
+        if not self.stack:
+            self.stats_for(self.default_view).end_frame()
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_DEPTH)
+            self.next_snapshot = time.perf_counter() + self.interval
+        elif time.perf_counter() >= self.next_snapshot:
+            self.next_snapshot = time.perf_counter() + self.interval
+            self.report()
+
+    def take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+
+    def report(self, final=False):
+        snapshot = self.take_snapshot() if tracemalloc.is_tracing() else None
+        title = f"====== 分配统计{'（结束）' if final else ''}"
+        if snapshot is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            title += f"：tracemalloc 当前 {current / 1e6:.1f} MB，峰值 {peak / 1e6:.1f} MB"
+        print(title + ' ======')
+        for s in sorted(self.stats.values(), key=lambda s: -s.bytes):
+            frames = max(1, s.frames)
+            print(f"[{s.name}] {s.frames} 帧，每帧新建 Surface {s.surfaces / frames:.1f} 个 / {s.bytes / frames / 1024:.1f} KB，"
+                  f"单帧最多 {s.max_frame_surfaces} 个")
+            for site, n in s.sites.most_common(self.top):
+                print(f"    {n / frames:8.2f} 个/帧 {s.site_bytes[site] / frames / 1024:9.1f} KB/帧  {site}")
+            path = self.files.get(s.name)
+            if path and snapshot is not None:
+                # tracemalloc：调用栈里经过这个视图文件的分配，按代码行汇总
+                traces = snapshot.filter_traces([tracemalloc.Filter(True, path, all_frames=True)])
+                for stat in traces.statistics('lineno')[:self.top]:
+                    frame = stat.traceback[0]
+                    print(f"    {stat.size / 1024:9.1f} KB 常驻 {stat.count:6d} 块  {os.path.basename(frame.filename)}:{frame.lineno}")
+        if snapshot is not None and self.snapshot is not None:
+            # 上次快照以来涨得最多的行：长时间运行内存一直涨时看这里
+            growth = [d for d in snapshot.compare_to(self.snapshot, 'lineno') if d.size_diff > 0]
+            if growth:
+                print("  上次快照以来增长最多：")
+                for d in growth[:self.top]:
+                    frame = d.traceback[0]
+                    print(f"    +{d.size_diff / 1024:8.1f} KB  {os.path.basename(frame.filename)}:{frame.lineno}")
+        self.snapshot = snapshot
+
+
+class TrackedSurface(_OriginalSurface):
+    # 代替 pygame.Surface：照常创建，顺便记一笔
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if _tracker is not None:
+            _tracker.record(self, sys._getframe(1))
+
+
+def _wrap_creator(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        result = func(*args, **kwargs)
+        if _tracker is not None and isinstance(result, _OriginalSurface):
+            _tracker.record(result, sys._getframe(1))
+        return result
+    return wrapper
+
+def _wrap_cached(cached):
+    # lru_cache 包着的函数：只有没命中、真的新建了 Surface 时才记
+    @functools.wraps(cached)
+    def wrapper(*args, **kwargs):
+        misses = cached.cache_info().misses
+        result = cached(*args, **kwargs)
+        if _tracker is not None and cached.cache_info().misses != misses:
+            _tracker.record(result, sys._getframe(1))
+        return result
+    return wrapper
+
+def _wrap_present(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        result = func(*args, **kwargs)
+        if _tracker is not None:
+            _tracker.present()
+        return result
+    return wrapper
+
+def _wrap_view(name, func, frame=False):
+    # 视图的 update()/draw()：期间新建的 Surface 都算到这个视图头上；draw() 算一帧
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _tracker.stack.append(name)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _tracker.stack.pop()
+            if frame:
+                _tracker.stats_for(name).end_frame()
+    return wrapper
+
+
+def install(default_view='main', interval=SNAPSHOT_SECONDS, top=TOP_SITES, trace=USE_TRACEMALLOC):
+    # 打开跟踪；要在创建窗口之前调用。tracemalloc 在第一帧画完时才开
+    global _tracker
+    if _tracker is not None:
+        return _tracker
+    _tracker = Tracker(default_view, interval=interval, top=top, trace=trace)
+    pygame.Surface = TrackedSurface
+    for module_name, name in WRAPPED_FUNCTIONS:
+        module = getattr(pygame, module_name)
+        if hasattr(module, name):
+            setattr(module, name, _wrap_creator(getattr(module, name)))
+    cloud_fonts.render_text = _wrap_cached(cloud_fonts.render_text)
+    pygame.display.flip = _wrap_present(pygame.display.flip)
+    pygame.display.update = _wrap_present(pygame.display.update)
+    return _tracker
+
+def track_view(module, name=None):
+    # 多个视图在同一个进程里（dashboard）：分别记账
+    name = name or module.__name__
+    _tracker.files[name] = module.__file__
+    module.update = _wrap_view(name, module.update)
+    module.draw = _wrap_view(name, module.draw, frame=True)
+
+def report(final=True):
+    if _tracker is not None:
+        _tracker.report(final)
+
+def run_view(name, seconds=RUN_SECONDS, interval=SNAPSHOT_SECONDS, top=TOP_SITES, trace=USE_TRACEMALLOC):
+    # 单独运行一个视图 seconds 秒，期间定时打印报告，结束时再打印一次
+    tracker = install(name, interval, top, trace)
+    module = importlib.import_module(name)
+    tracker.files[name] = module.__file__
+    # 到点就发 QUIT：不跟着画帧走，空闲时不重画的视图（cloud008 只在缩放、平移后才提交）也能按时结束
+    timer = threading.Timer(seconds, pygame.event.post, [pygame.event.Event(pygame.QUIT)])
+    timer.daemon = True
+    timer.start()
+    try:
+        module.main()
+    finally:
+        timer.cancel()
+    report()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='运行一个视图，统计每帧新建的 Surface 和 tracemalloc 分配最多的位置')
+    parser.add_argument('view', choices=ALL_VIEWS)
+    parser.add_argument('--seconds', type=float, default=RUN_SECONDS, help='运行多久')
+    parser.add_argument('--interval', type=float, default=SNAPSHOT_SECONDS, help='多久打印一次报告')
+    parser.add_argument('--top', type=int, default=TOP_SITES, help='每个视图列出多少个位置')
+    parser.add_argument('--surfaces-only', action='store_true', help='不开 tracemalloc，只数 Surface（几乎不影响帧率）')
+    args = parser.parse_args(argv)
+    run_view(args.view, args.seconds, args.interval, args.top, USE_TRACEMALLOC and not args.surfaces_only)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+import argparse
+import datetime
+import functools
+import json
+import os
+import struct
+import zlib
+import numpy as np
+import pandas as pd
+import cloud_data
+
+# ====== 可修改参数 ======
+ARCHIVE_EXT = '.cca'     # 归档文件扩展名；视图的 CSV_FILE 指向它就从归档读。'xxx.cca#站点' 指定站点，不写用第一个
+MISSING = 255            # 缺测 / 不完整的值
+ZLIB_LEVEL = 9
+MAGIC = b'CLDARCH1'
+TRAILER = struct.Struct('<Q8s')   # 文件末尾：索引的位置 + MAGIC
+
+# 云量归档：按"站点 × 年份"分块存，每块是这一年从第一天到最后一天逐日（或逐小时）的 uint8 云量（0~100，255 = 缺测），
+# 每块在 原样 / 游程编码 / 差分后 zlib 三种写法里挑最小的。
+# 文件末尾是一个 JSON 索引：站点 -> 年份 -> (偏移, 长度, 编码, 第一天, 天数)，
+# 读一段日期时直接按年份查索引、seek 过去，只解压这段日期用到的块，不用像 CSV 那样从头解析。
+#
+#   MAGIC | 块 | 块 | ... | 索引(JSON) | 索引偏移(u64) MAGIC
+
+
+# ====== 编码 ======
+
+def encode_rle(values):
+    # (长度, 值) 成对存，长度超过 255 的游程拆开
+    if len(values) == 0:
+        return b''
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(values)) + 1])
+    lengths = np.diff(np.concatenate([starts, [len(values)]]))
+    pieces = (lengths + 254) // 255
+    run_values = np.repeat(values[starts], pieces)
+    run_lengths = np.full(len(run_values), 255, dtype=np.int64)
+    last = np.cumsum(pieces) - 1
+    run_lengths[last] = lengths - (pieces - 1) * 255
+    return np.column_stack([run_lengths, run_values]).astype(np.uint8).tobytes()
+
+def decode_rle(data):
+    pairs = np.frombuffer(data, dtype=np.uint8).reshape(-1, 2)
+    return np.repeat(pairs[:, 1], pairs[:, 0])
+
+def encode_delta(values):
+    # 相邻两天的差（按 uint8 回绕）再 zlib：云量变化平缓、缺测成段时差分后重复多
+    return zlib.compress(np.diff(values, prepend=np.uint8(0)).astype(np.uint8).tobytes(), ZLIB_LEVEL)
+
+def decode_delta(data):
+    return np.cumsum(np.frombuffer(zlib.decompress(data), dtype=np.uint8), dtype=np.uint8)
+
+CODECS = {
+    'raw': (lambda v: v.tobytes(), lambda b: np.frombuffer(b, dtype=np.uint8)),
+    'rle': (encode_rle, decode_rle),
+    'delta-zlib': (encode_delta, decode_delta),
+}
+
+def encode(values):
+    # 返回 (编码名, 字节)，挑最小的
+    values = np.ascontiguousarray(values, dtype=np.uint8)
+    return min(((name, enc(values)) for name, (enc, _) in CODECS.items()), key=lambda item: len(item[1]))
+
+def decode(codec, data):
+    return CODECS[codec][1](data)
+
+def quantize(values):
+    # 浮点云量（NaN = 缺测）-> uint8
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, MISSING, dtype=np.uint8)
+    ok = ~np.isnan(values)
+    out[ok] = np.clip(np.rint(values[ok]), 0, 100)
+    return out
+
+
+# ====== 写 ======
+
+class ArchiveWriter:
+    # 一块一块追加写，写完 close() 时补上索引；数据量很大时不用整个放在内存里
+    def __init__(self, path):
+        self.path = path
+        self.tmp = f'{path}.{os.getpid()}.tmp'
+        self.file = open(self.tmp, 'wb')
+        self.file.write(MAGIC)
+        self.index = {}
+
+    def add_chunk(self, station, first_day, values, per_day=1):
+        # first_day: datetime.date；values: 从 first_day 起逐日（per_day > 1 时逐小时）的 uint8，同一年内
+        station = str(station)
+        values = np.asarray(values, dtype=np.uint8)
+        entry = self.index.setdefault(station, {'per_day': per_day, 'chunks': {}})
+        if entry['per_day'] != per_day:
+            raise ValueError(f"站点 {station} 的每天数值个数不一致：{entry['per_day']} / {per_day}")
+        codec, data = encode(values)
+        offset = self.file.tell()
+        self.file.write(data)
+        entry['chunks'][str(first_day.year)] = [offset, len(data), codec, first_day.toordinal(), len(values) // per_day]
+
+    def close(self):
+        offset = self.file.tell()
+        self.file.write(json.dumps({'format': 1, 'stations': self.index}, separators=(',', ':')).encode('utf-8'))
+        self.file.write(TRAILER.pack(offset, MAGIC))
+        self.file.close()
+        os.replace(self.tmp, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+            os.remove(self.tmp)
+
+def add_series(writer, station, dates, values, per_day=1):
+    # dates 按天排好序（datetime64[D]，可以有缺的日期）；values 每天 per_day 个，NaN 为缺测。按年份切块
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    values = quantize(values).reshape(len(dates), per_day)
+    years = dates.astype('datetime64[Y]')
+    for year in np.unique(years):
+        sel = years == year
+        days = dates[sel]
+        first, last = days[0], days[-1]
+        chunk = np.full((int((last - first).astype(int)) + 1, per_day), MISSING, dtype=np.uint8)
+        chunk[(days - first).astype(int)] = values[sel]
+        writer.add_chunk(station, first.astype(datetime.date), chunk.ravel(), per_day)
+
+def write_frame(path, df, station='station'):
+    # df 列：[station,] year, month, day, [hour,] value（NaN 为缺测）。有 hour 列时按小时存
+    per_day = 24 if 'hour' in df.columns else 1
+    if 'station' not in df.columns:
+        df = df.assign(station=station)
+    df = df.assign(date=pd.to_datetime(df[['year', 'month', 'day']]))
+    with ArchiveWriter(path) as writer:
+        for name, group in df.groupby('station', sort=False):
+            if per_day > 1:
+                # 每天一行、24 个小时一列，缺的小时为 NaN
+                table = group.pivot_table(index='date', columns='hour', values='value', aggfunc='last', dropna=False)
+                table = table.reindex(columns=range(24))
+            else:
+                table = group.sort_values('date').drop_duplicates('date', keep='last').set_index('date')[['value']]
+            add_series(writer, name, table.index.to_numpy('datetime64[D]'), table.to_numpy(float), per_day)
+
+def csv_values(csv_file, keep_codes=None):
+    # 原始 CSV -> 列 [station,] year, month, day, value；完整度代码不在 keep_codes 里的算缺测（读的时候再按 FILL_METHOD 补）
+    keep_codes = keep_codes or cloud_data.COMPLETE_CODES
+    df = cloud_data.load_frame(csv_file)
+    value = pd.to_numeric(df['value'], errors='coerce').astype(float)
+    if 'data_completeness' in df.columns:
+        value = value.where(df['data_completeness'].astype(str).str.strip().isin(keep_codes))
+    keys = ['station'] if 'station' in df.columns else []
+    return df[keys + ['year', 'month', 'day']].assign(value=value)
+
+def build(path, csv_files):
+    # 多个 CSV 合成一个归档；CSV 里没有 station 列时用文件名当站点名
+    frames = []
+    for csv_file in csv_files:
+        df = csv_values(csv_file)
+        if 'station' not in df.columns:
+            df.insert(0, 'station', os.path.splitext(os.path.basename(csv_file))[0])
+        frames.append(df)
+    write_frame(path, pd.concat(frames, ignore_index=True))
+
+
+# ====== 读 ======
+
+def split_spec(spec):
+    # 'hk.cca#KP' -> ('hk.cca', 'KP')
+    path, _, station = spec.partition('#')
+    return path, station or None
+
+def is_archive(spec):
+    return split_spec(spec)[0].lower().endswith(ARCHIVE_EXT)
+
+@functools.lru_cache(maxsize=16)
+def _read_index(path, mtime):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"不是云量归档文件：{path}")
+        f.seek(-TRAILER.size, os.SEEK_END)
+        offset, magic = TRAILER.unpack(f.read(TRAILER.size))
+        if magic != MAGIC:
+            raise ValueError(f"归档文件不完整：{path}")
+        f.seek(offset)
+        return json.loads(f.read()[:-TRAILER.size])['stations']
+
+@functools.lru_cache(maxsize=256)
+def _read_chunk(path, mtime, offset, length, codec):
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        values = decode(codec, f.read(length))
+    values.flags.writeable = False
+    return values
+
+
+class Archive:
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self.index = _read_index(path, self.mtime)
+
+    @property
+    def stations(self):
+        return list(self.index)
+
+    def station(self, name=None):
+        if name is None:
+            return self.stations[0]
+        if name not in self.index:
+            raise KeyError(f"归档里没有站点 {name}，有：{', '.join(self.stations)}")
+        return name
+
+    def span(self, station=None):
+        # (第一天, 最后一天)，datetime.date
+        chunks = self.index[self.station(station)]['chunks'].values()
+        first = min(c[3] for c in chunks)
+        last = max(c[3] + c[4] - 1 for c in chunks)
+        return datetime.date.fromordinal(first), datetime.date.fromordinal(last)
+
+    def read(self, station=None, start=None, end=None, hourly=False):
+        # 返回 (日期 datetime64[D], 云量 float，缺测为 NaN)。只解压 start~end 覆盖的年份的块；
+        # 逐小时存的站点默认返回日平均，hourly=True 时返回 (天数, 24) 的逐小时值
+        entry = self.index[self.station(station)]
+        per_day = entry['per_day']
+        lo, hi = self.span(station)
+        start = max(lo, pd.Timestamp(start).date()) if start is not None else lo
+        end = min(hi, pd.Timestamp(end).date()) if end is not None else hi
+        n = max(0, (end - start).days + 1)
+        out = np.full((n, per_day), MISSING, dtype=np.uint8)
+        for year in range(start.year, end.year + 1):
+            chunk = entry['chunks'].get(str(year))
+            if chunk is None:
+                continue
+            offset, length, codec, first, count = chunk
+            # 这一块和请求区间的交集
+            a = max(first, start.toordinal())
+            b = min(first + count, end.toordinal() + 1)
+            if a >= b:
+                continue
+            values = _read_chunk(self.path, self.mtime, offset, length, codec).reshape(count, per_day)
+            out[a - start.toordinal():b - start.toordinal()] = values[a - first:b - first]
+        dates = np.datetime64(start, 'D') + np.arange(n)
+        values = np.where(out == MISSING, np.nan, out.astype(float))
+        if per_day > 1 and not hourly:
+            with np.errstate(invalid='ignore'):
+                counts = (~np.isnan(values)).sum(axis=1)
+                values = np.where(counts > 0, np.nansum(values, axis=1) / np.maximum(counts, 1), np.nan)
+        elif per_day == 1 and not hourly:
+            values = values[:, 0]
+        return dates, values
+
+def read_frame(spec, window=None):
+    # 和 cloud_data.load_frame 读 CSV 的结果同样的列，交给 clean_frame 清洗、补值
+    path, station = split_spec(spec)
+    start, end = window or (None, None)
+    dates, values = Archive(path).read(station, start, end)
+    index = pd.DatetimeIndex(dates)
+    return pd.DataFrame({
+        'year': index.year, 'month': index.month, 'day': index.day, 'value': values,
+        'data_completeness': np.where(np.isnan(values), '***', cloud_data.COMPLETE_CODES[0]),
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='云量归档：按站点、年份分块压缩，按日期区间随机读取')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('build', help='把一个或多个 CSV 合成归档（没有 station 列时文件名就是站点名）')
+    p.add_argument('archive')
+    p.add_argument('csv', nargs='+')
+    p = sub.add_parser('info', help='列出站点、年份和每块的编码、大小')
+    p.add_argument('archive')
+    p = sub.add_parser('read', help='读一段日期，打印成 CSV')
+    p.add_argument('spec', help='归档文件，可以带 #站点')
+    p.add_argument('--start')
+    p.add_argument('--end')
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        build(args.archive, args.csv)
+        raw = sum(os.path.getsize(f) for f in args.csv)
+        print(f"{args.archive}：{os.path.getsize(args.archive)} 字节（CSV 共 {raw} 字节）")
+    elif args.command == 'info':
+        archive = Archive(args.archive)
+        for station in archive.stations:
+            entry = archive.index[station]
+            lo, hi = archive.span(station)
+            print(f"{station}: {lo} ~ {hi}，每天 {entry['per_day']} 个值")
+            for year, (offset, length, codec, first, count) in sorted(entry['chunks'].items()):
+                print(f"    {year}: {count} 天，{codec} {length} 字节 @ {offset}")
+    else:
+        path, station = split_spec(args.spec)
+        dates, values = Archive(path).read(station, args.start, args.end)
+        print('Year,Month,Day,Value')
+        for date, value in zip(pd.DatetimeIndex(dates), values.tolist()):
+            print(f"{date.year},{date.month},{date.day},{'' if np.isnan(value) else f'{value:g}'}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import glob
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pygame
+import cloud_data
+from cloud_export import EXPORT_FPS, EXPORT_SECONDS, export_module, use_sim_time
+from cloud_views import ALL_VIEWS
+from dashboard import view_size
+
+# ====== 可修改参数 ======
+OUT_DIR = 'renders'
+SNAPSHOT_SECONDS = 5    # 快照取动画播放到第几秒的画面
+ANIMATION_EXT = 'mp4'   # 没有 ffmpeg 时自动改成动画 PNG
+
+# 每个工作进程常驻，处理多个 CSV：字体、文字和小图形缓存（cloud_fonts / cloud_sprites）
+# 在同一进程的任务之间一直复用。每个任务只把 cloud_data.CSV_FILE 指向新文件，再重新执行视图模块的顶层代码。
+
+_loaded = {}  # 本进程里每个视图当前加载的是哪个 CSV
+
+def _init_worker():
+    pygame.font.init()
+
+def load_view(name, csv_file):
+    if _loaded.get(name) == csv_file:
+        return sys.modules[name]
+    cloud_data.CSV_FILE = csv_file
+    if name in sys.modules:
+        module = importlib.reload(sys.modules[name])
+    else:
+        module = importlib.import_module(name)
+    _loaded[name] = csv_file
+    return module
+
+def render_snapshot(module, path, seconds=SNAPSHOT_SECONDS, fps=EXPORT_FPS):
+    # 按导出帧率快进到指定时间，只画最后一帧
+    surface = pygame.Surface(view_size(module))
+    sim_time = use_sim_time(module)
+    for i in range(int(seconds * fps) + 1):
+        sim_time[0] = i / fps
+        module.update()
+    module.draw(surface)
+    pygame.image.save(surface, path)
+    return path
+
+def render_job(name, csv_file, out_dir, animate, seconds, fps):
+    module = load_view(name, csv_file)
+    stem = os.path.splitext(os.path.basename(csv_file))[0]
+    if animate:
+        return export_module(module, os.path.join(out_dir, f'{stem}-{name}-anim.{ANIMATION_EXT}'), seconds, fps)[1]
+    return render_snapshot(module, os.path.join(out_dir, f'{stem}-{name}.png'), seconds, fps)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='用多个进程批量渲染一批 CSV（每个站点/年份一张快照或一段动画）')
+    parser.add_argument('view', choices=ALL_VIEWS)
+    parser.add_argument('pattern', help='CSV 文件的通配符，如 "stations/*.csv"（加引号，支持 **）')
+    parser.add_argument('--out-dir', default=OUT_DIR)
+    parser.add_argument('--animate', action='store_true', help='输出动画而不是单张快照')
+    parser.add_argument('--seconds', type=float, default=None,
+                        help=f'快照的时间点（默认 {SNAPSHOT_SECONDS}）或动画长度（默认 {EXPORT_SECONDS}）')
+    parser.add_argument('--fps', type=int, default=EXPORT_FPS)
+    parser.add_argument('--workers', type=int, default=0, help='工作进程数，0 为 CPU 核数')
+    args = parser.parse_args(argv)
+    files = sorted(glob.glob(args.pattern, recursive=True))
+    if not files:
+        parser.error(f"没有匹配的文件：{args.pattern}")
+    seconds = args.seconds if args.seconds is not None else (EXPORT_SECONDS if args.animate else SNAPSHOT_SECONDS)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    failed = []
+    with ProcessPoolExecutor(max_workers=args.workers or None, initializer=_init_worker) as pool:
+        jobs = {pool.submit(render_job, args.view, f, args.out_dir, args.animate, seconds, args.fps): f for f in files}
+        for job in as_completed(jobs):
+            try:
+                print(f"{jobs[job]} -> {job.result()}")
+            except Exception as e:
+                failed.append(jobs[job])
+                print(f"{jobs[job]} 失败：{e}")
+    elapsed = time.perf_counter() - start
+    done = len(files) - len(failed)
+    print(f"{args.view}: {done} 个文件, {elapsed:.1f} 秒, {done / elapsed:.2f} 文件/秒" + (f", {len(failed)} 个失败" if failed else ''))
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import functools
+import numpy as np
+import pygame
+
+# ====== 可修改参数 ======
+BLOOM_THRESHOLD = 100   # 亮度（0~255）超过它的像素才发光
+BLOOM_STRENGTH = 0.6    # 发光叠加回去的强度
+BLOOM_DOWNSAMPLE = 4    # 先缩小到 1/4 再处理，发光本来就是模糊的，不需要原分辨率
+BLOOM_LEVELS = 3        # 金字塔层数，每层再缩小一半，层数越多光晕越大
+LUMA = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)   # 亮度按人眼对 RGB 的敏感度加权
+BLUR_KERNEL = np.array([1, 4, 6, 4, 1], dtype=np.float32) / 16  # 每层的可分离二项式模糊核
+
+# 泛光后处理：从画好的一帧里取出亮的像素，缩小后在 NumPy 里按金字塔做可分离模糊，
+# 各层放大回来叠加，最后一次 BLEND_RGB_ADD 加回画面。
+# 耗时只和分辨率（和层数）有关，和画了多少根柱子、多少个粒子无关，用来代替逐个物体叠半透明圆圈的发光。
+
+
+def _blur(img):
+    # 水平、竖直各做一次一维卷积，边缘按最近像素延伸
+    r = len(BLUR_KERNEL) // 2
+    for axis in (0, 1):
+        pad = [(0, 0)] * img.ndim
+        pad[axis] = (r, r)
+        padded = np.pad(img, pad, mode='edge')
+        n = img.shape[axis]
+        out = np.zeros_like(img)
+        for k, w in enumerate(BLUR_KERNEL):
+            out += w * padded.take(np.arange(k, k + n), axis=axis)
+        img = out
+    return img
+
+def _half(img):
+    # 2x2 平均缩小一半（奇数边丢掉最后一行/列）
+    h, w = img.shape[0] // 2 * 2, img.shape[1] // 2 * 2
+    img = img[:h, :w]
+    return (img[0::2, 0::2] + img[1::2, 0::2] + img[0::2, 1::2] + img[1::2, 1::2]) * 0.25
+
+def _double(img, shape):
+    # 最近邻放大一倍再补齐到 shape；放大后再模糊一次抹掉块状感
+    img = img.repeat(2, axis=0).repeat(2, axis=1)
+    pad = [(0, max(0, shape[0] - img.shape[0])), (0, max(0, shape[1] - img.shape[1])), (0, 0)]
+    return np.pad(img, pad, mode='edge')[:shape[0], :shape[1]]
+
+def bright_pass(rgb, threshold=BLOOM_THRESHOLD):
+    # 软阈值：亮度刚过阈值的像素只贡献一点，越亮贡献越多
+    rgb = rgb.astype(np.float32)
+    lum = (rgb @ LUMA)[..., None]
+    return rgb * np.clip((lum - threshold) / max(1, 255 - threshold), 0, 1)
+
+def glow_array(rgb, threshold=BLOOM_THRESHOLD, levels=BLOOM_LEVELS):
+    # 输入已经缩小过的 (w, h, 3) 数组，返回同尺寸的光晕
+    level = _blur(bright_pass(rgb, threshold))
+    pyramid = [level]
+    for _ in range(levels - 1):
+        if min(level.shape[:2]) < 4:
+            break
+        level = _blur(_half(level))
+        pyramid.append(level)
+    total = pyramid[-1]
+    for level in reversed(pyramid[:-1]):
+        total = _blur(_double(total, level.shape)) + level
+    return total
+
+@functools.lru_cache(maxsize=16)
+def _work_surface(size):
+    return pygame.Surface(size)
+
+def bloom(surface, source=None, rect=None, threshold=BLOOM_THRESHOLD, strength=None,
+          downsample=BLOOM_DOWNSAMPLE, levels=BLOOM_LEVELS):
+    # 对 surface 的 rect 区域（默认整张）做泛光。source 给出时从它取亮像素（尺寸和 rect 一致），
+    # 比如只画了高亮圆点的发光层；不给就从 surface 自己取
+    strength = BLOOM_STRENGTH if strength is None else strength
+    rect = pygame.Rect(rect) if rect is not None else surface.get_rect()
+    rect = rect.clip(surface.get_rect())
+    if rect.width < downsample * 2 or rect.height < downsample * 2:
+        return rect
+    if source is None:
+        source = surface.subsurface(rect)
+    small_size = (rect.width // downsample, rect.height // downsample)
+    small = pygame.transform.smoothscale(source, small_size)
+    glow = glow_array(pygame.surfarray.array3d(small), threshold, levels) * strength
+    glow_surf = _work_surface(small_size)
+    pygame.surfarray.blit_array(glow_surf, np.clip(glow, 0, 255).astype(np.uint8))
+    surface.blit(pygame.transform.smoothscale(glow_surf, rect.size), rect.topleft, special_flags=pygame.BLEND_RGB_ADD)
+    return rect
+
+@functools.lru_cache(maxsize=16)
+def _emit_surface(size):
+    return pygame.Surface(size)
+
+def glow_circle(surface, pos, radius, color, spread=12, strength=1.0):
+    # 单个圆点的光晕（环形视图的高亮日期）：只在圆点周围的小块区域里做泛光
+    extent = int(radius) + spread * 2
+    rect = pygame.Rect(0, 0, extent * 2, extent * 2)
+    rect.center = (int(pos[0]), int(pos[1]))
+    emit = _emit_surface(rect.size)
+    emit.fill((0, 0, 0))
+    pygame.draw.circle(emit, color, (extent, extent), int(radius) + 2)
+    clipped = rect.clip(surface.get_rect())
+    if clipped.size != rect.size:
+        emit = emit.subsurface(clipped.move(-rect.x, -rect.y))
+    # 光晕半径大约是 downsample * 2 * (2**levels - 1)，两层金字塔时按 spread 定缩小倍数
+    return bloom(surface, emit, clipped, threshold=0, strength=strength, downsample=max(2, spread // 3), levels=2)
@@ -0,0 +1,167 @@
+import argparse
+import functools
+import time
+import numpy as np
+import pandas as pd
+import cloud_data
+
+# ====== 可修改参数 ======
+CLIMATE_FILE = None           # 多年数据（CSV / 归档 / shm:），None 时用 cloud_data.CSV_FILE
+CLIMATE_YEARS = None          # 只用这几年算气候值，如 (1991, 2020)
+CLIMATE_STATION = None        # 多站点时视图用哪个站点的气候值，None 为第一个
+WINDOW_DAYS = 15              # 每个日期前后合起来取多少天一起算（平滑掉单日的噪声）
+PERCENTILES = (10, 25, 50, 75, 90)
+MIN_STD = 1.0                 # 标准差下限，防止某几天几乎没变化时标准分爆掉
+ANOMALY_LIMIT = 30            # 上色时距平（百分点）截到 ±这个值
+ZSCORE_LIMIT = 2.5            # 上色时标准分截到 ±这个值
+
+# 多年气候值和距平：每个站点、每个"年内第几天"（按闰年算，2 月 29 日单独一天，共 366 天）的
+# 均值、标准差和百分位，全部用 bincount / 一次排序的整列运算，不按组循环。
+# 每个观测按 WINDOW_DAYS 复制到前后相邻的日期上一起统计（首尾跨年循环），
+# 算好的结果按数据源缓存；视图用 anomaly / zscore 把当天的值换成和多年同期比的距平，交给原来的配色函数。
+
+DAYS_IN_YEAR = 366
+_MONTH_START = np.concatenate([[0], np.cumsum([31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[:-1]])
+
+
+def day_of_year(months, days):
+    # 闰年日历里的第几天（0~365），平年的 3 月 1 日也是 60，这样同一月日在每年都落在同一格
+    return _MONTH_START[np.asarray(months, dtype=int) - 1] + np.asarray(days, dtype=int) - 1
+
+
+def _group_percentiles(keys, values, n_groups, qs):
+    # 按组求百分位（和 numpy 默认的线性插值一致）：组号和值（0~100）拼成一个键一次排序，
+    # 再按每组的起点和个数取位置
+    sorted_values = np.sort(keys * 256.0 + values) % 256
+    counts = np.bincount(keys, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    out = {}
+    for q in qs:
+        pos = (counts - 1).clip(0) * q / 100
+        lo = np.floor(pos).astype(int)
+        hi = np.minimum(lo + 1, (counts - 1).clip(0))
+        frac = pos - lo
+        idx_lo = (starts + lo).clip(0, max(len(sorted_values) - 1, 0))
+        idx_hi = (starts + hi).clip(0, max(len(sorted_values) - 1, 0))
+        result = sorted_values[idx_lo] * (1 - frac) + sorted_values[idx_hi] * frac if len(sorted_values) else np.zeros(n_groups)
+        out[q] = np.where(counts > 0, result, np.nan)
+    return out
+
+
+class Climatology:
+    # mean / std / count: (站点数, 366)；percentiles: {q: (站点数, 366)}
+    def __init__(self, stations, mean, std, count, percentiles, years):
+        self.stations = list(stations)
+        self.mean = mean
+        self.std = std
+        self.count = count
+        self.percentiles = percentiles
+        self.years = years
+
+    @classmethod
+    def from_frame(cls, df, window=WINDOW_DAYS, percentiles=PERCENTILES, years=None):
+        # df：cloud_data.clean_frame 的结果；补出来的值不算进气候值
+        df = df[df['value'].notna() & ~df['filled'].astype(bool)]
+        if years is not None:
+            df = df[(df['year'] >= years[0]) & (df['year'] <= years[1])]
+        if 'station' in df.columns:
+            codes, stations = pd.factorize(df['station'], sort=True)
+        else:
+            codes, stations = np.zeros(len(df), dtype=int), ['station']
+        n = len(stations)
+        doy = day_of_year(df['month'].to_numpy(), df['day'].to_numpy())
+        values = df['value'].to_numpy(float)
+
+        # 每个观测复制到 [doy - half, doy + half] 上（跨年循环）
+        half = window // 2
+        offsets = np.arange(-half, half + 1)
+        keys = (codes[:, None] * DAYS_IN_YEAR + (doy[:, None] + offsets) % DAYS_IN_YEAR).ravel()
+        pooled = np.repeat(values, len(offsets))
+
+        size = n * DAYS_IN_YEAR
+        count = np.bincount(keys, minlength=size)
+        total = np.bincount(keys, weights=pooled, minlength=size)
+        squares = np.bincount(keys, weights=pooled * pooled, minlength=size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            std = np.sqrt(np.maximum(squares / count - mean * mean, 0))
+        pct = _group_percentiles(keys, pooled, size, percentiles)
+        shape = (n, DAYS_IN_YEAR)
+        span = (int(df['year'].min()), int(df['year'].max())) if len(df) else None
+        return cls(stations, mean.reshape(shape), std.reshape(shape), count.reshape(shape),
+                   {q: p.reshape(shape) for q, p in pct.items()}, span)
+
+    def station_index(self, station=None):
+        if station is None:
+            return 0
+        return self.stations.index(station)
+
+    def expected(self, months, days, station=None):
+        # 这些月日的多年均值
+        return self.mean[self.station_index(station), day_of_year(months, days)]
+
+    def anomaly(self, values, months, days, station=None):
+        return np.asarray(values, dtype=float) - self.expected(months, days, station)
+
+    def zscore(self, values, months, days, station=None):
+        s = self.station_index(station)
+        doy = day_of_year(months, days)
+        return (np.asarray(values, dtype=float) - self.mean[s, doy]) / np.maximum(self.std[s, doy], MIN_STD)
+
+    def percentile(self, q, months, days, station=None):
+        return self.percentiles[q][self.station_index(station), day_of_year(months, days)]
+
+
+@functools.lru_cache(maxsize=8)
+def load(source=None, years=None, window=WINDOW_DAYS):
+    # 同一个数据源只算一次
+    source = source or CLIMATE_FILE or cloud_data.CSV_FILE
+    return Climatology.from_frame(cloud_data.load_clean(source), window, PERCENTILES, years)
+
+def scores(days, mode, climate=None, station=None):
+    # days：cloud_data.load_days() 那样的列表；mode 为 'anomaly'（百分点）或 'zscore'
+    climate = climate or load(years=CLIMATE_YEARS)
+    station = station or CLIMATE_STATION
+    columns = getattr(days, 'columns', None)
+    if columns is not None:
+        # cloud_shared.SharedDays：直接用共享内存上的列
+        months, day, values = columns['month'].astype(int), columns['day'].astype(int), columns['value']
+    else:
+        months = np.fromiter((d['month'] for d in days), dtype=int, count=len(days))
+        day = np.fromiter((d['day'] for d in days), dtype=int, count=len(days))
+        values = np.fromiter((d['value'] for d in days), dtype=float, count=len(days))
+    if mode == 'anomaly':
+        return climate.anomaly(values, months, day, station)
+    if mode == 'zscore':
+        return climate.zscore(values, months, day, station)
+    raise ValueError(f"未知的距平方式：{mode}")
+
+def palette_values(days, mode, lo, hi, climate=None):
+    # 把距平 / 标准分换算到 [lo, hi]（视图原来的云量范围）：0 距平落在中间，
+    # 这样视图原来按 min_value~max_value 上色的函数不用改，直接拿它代替云量
+    limit = ANOMALY_LIMIT if mode == 'anomaly' else ZSCORE_LIMIT
+    s = np.nan_to_num(scores(days, mode, climate), nan=0.0)
+    return (lo + (np.clip(s, -limit, limit) + limit) / (2 * limit) * (hi - lo)).tolist()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='多年气候值（按年内日期的均值、标准差、百分位）')
+    parser.add_argument('source', nargs='?', default=cloud_data.CSV_FILE, help='CSV / 归档 / shm:名字')
+    parser.add_argument('--years', help='如 1991-2020')
+    parser.add_argument('--station')
+    args = parser.parse_args(argv)
+    years = tuple(int(y) for y in args.years.split('-')) if args.years else None
+    start = time.perf_counter()
+    climate = load(args.source, years)
+    elapsed = time.perf_counter() - start
+    s = climate.station_index(args.station)
+    print(f"{len(climate.stations)} 个站点，{climate.years[0]}~{climate.years[1]} 年，用时 {elapsed:.2f} 秒")
+    qs = list(climate.percentiles)
+    print('month-day  mean   std  ' + '  '.join(f"p{q:<3d}" for q in qs))
+    for month in range(1, 13):
+        doy = day_of_year([month], [15])[0]
+        row = '  '.join(f"{climate.percentiles[q][s, doy]:4.0f}" for q in qs)
+        print(f"{month:02d}-15     {climate.mean[s, doy]:5.1f} {climate.std[s, doy]:5.1f}  {row}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import time
+
+# ====== 可修改参数 ======
+RENDER_FPS = 60   # 渲染帧率上限，和数据播放速度无关
+MAX_LAG = 0.5     # 卡顿超过这个秒数的部分直接丢弃，防止窗口拖动后疯狂追帧
+
+
+# 固定步长动画时钟：
+# 每一步 = 一个固定的模拟时间（比如一天），渲染慢的时候一帧里补跑多步（自动跳帧），
+# 渲染快的时候用 alpha 在两步之间插值，播放速度只取决于 steps_per_second。
+class AnimationClock:
+    def __init__(self, steps_per_second, max_lag=MAX_LAG, time_func=time.perf_counter):
+        self.time_func = time_func
+        self.max_lag = max_lag
+        self.steps_per_second = steps_per_second
+        self.accumulator = 0.0
+        self.steps = 0            # 累计模拟步数
+        self.sim_seconds = 0.0    # 累计模拟时间：按每一步当时的步长累加，中途改速度不会跳
+        self.frames_skipped = 0   # 因为负载被跳过、没有渲染出来的步数
+        self.last = None
+
+    @property
+    def step_time(self):
+        return 1.0 / self.steps_per_second
+
+    def set_rate(self, steps_per_second):
+        # 改变播放速度时保留当前步内的进度
+        alpha = self.alpha
+        before = self.time
+        self.steps_per_second = steps_per_second
+        self.accumulator = alpha * self.step_time
+        # 步内进度按新步长换算后模拟时间会变，差值并进累计时间里，time 保持连续
+        self.sim_seconds += before - self.time
+
+    def tick(self):
+        # 返回这一帧需要推进的模拟步数
+        now = self.time_func()
+        if self.last is None:
+            self.last = now
+            return 0
+        elapsed = min(now - self.last, self.max_lag)
+        self.last = now
+        self.accumulator += elapsed
+        n = int(self.accumulator / self.step_time)
+        self.accumulator -= n * self.step_time
+        self.steps += n
+        self.sim_seconds += n * self.step_time
+        if n > 1:
+            self.frames_skipped += n - 1
+        return n
+
+    @property
+    def alpha(self):
+        # 当前步到下一步之间的插值系数，0~1
+        return min(1.0, self.accumulator / self.step_time)
+
+    @property
+    def time(self):
+        # 连续的模拟时间（秒）
+        return self.sim_seconds + self.alpha * self.step_time
@@ -0,0 +1,178 @@
+import functools
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+
+# ====== 可修改参数 ======
+CSV_FILE = 'cloud.csv'
+COMPLETE_CODES = ('C',)   # 天文台 data Completeness：C = 完整，# = 不完整，*** = 没有数据
+FILL_METHOD = None        # 缺测日期的补法：None（不补，视图里不画这几天）/ 'ffill' / 'linear' / 'climatology'；补出来的天 filled 为 True
+DATE_RANGE = None         # 只读这段日期，如 ('2020-03-01', '2020-05-31')；归档文件（.cca）只解压用到的块。要在视图导入前设好
+
+# 同一个进程里每个 CSV 只解析一次，所有视图共用结果（只读，不要原地修改）。
+# 缓存按文件和清洗设置（补值方法、完整度代码、日期范围）区分：设置参数为 None 时用调用时模块里的值，改了设置不会拿到旧结果。
+# CSV_FILE 也可以指向云量归档（cloud_archive，'xxx.cca' 或 'xxx.cca#站点'），
+# 或者另一个进程发布到共享内存里的数据（cloud_shared，'shm:名字'），十个视图都照常用
+
+def get_col(cols, candidates):
+    for c in candidates:
+        if c in cols:
+            return c
+    raise Exception(f"列名不匹配，请检查csv文件！候选：{candidates}")
+
+def _date_range(date_range):
+    date_range = date_range or DATE_RANGE
+    return tuple(date_range) if date_range else None
+
+def load_frame(csv_file=CSV_FILE, date_range=None):
+    return _load_frame(csv_file, _date_range(date_range))
+
+@functools.lru_cache(maxsize=None)
+def _load_frame(csv_file, date_range):
+    # cloud_archive / cloud_shared 自己要用 cloud_data 的读取和设置，用到时才导入，免得模块互相导入
+    import cloud_archive
+    if cloud_archive.is_archive(csv_file):
+        return cloud_archive.read_frame(csv_file, date_range)
+    df = normalize_columns(pd.read_csv(csv_file, encoding='utf-8'))
+    if date_range:
+        dates = pd.to_datetime(df[['year', 'month', 'day']], errors='coerce')
+        df = df[(dates >= pd.Timestamp(date_range[0])) & (dates <= pd.Timestamp(date_range[1]))]
+    return df
+
+def normalize_columns(df):
+    # 天文台的中英文列名（'年/Year'）和简单列名（'Year'）统一成 year / month / day / value
+    df.columns = [col.strip().lstrip('\ufeff').lower().replace(' ', '_') for col in df.columns]
+    cols = list(df.columns)
+    df = df.rename(columns={
+        get_col(cols, ['year', '年/year']): 'year',
+        get_col(cols, ['month', '月/month']): 'month',
+        get_col(cols, ['day', '日/day']): 'day',
+        get_col(cols, ['value', '數值/value']): 'value',
+    })
+    # 天文台的完整度列是 '數據完整性/data Completeness'
+    return df.rename(columns={c: 'data_completeness' for c in cols if c.endswith('/data_completeness')})
+
+# ====== 数据质量 ======
+# 全部是整列运算：按完整度代码标记行，对照完整日历找出缺测日期，再按需要补值。
+# 结果列：[station,] date, year, month, day, value, quality('ok' / 'incomplete' / 'gap'), filled
+
+def clean_frame(df, keep_codes=None, fill=FILL_METHOD):
+    # keep_codes 为 None 时用调用时的 COMPLETE_CODES（改了模块里的设置马上生效）
+    keep_codes = keep_codes or COMPLETE_CODES
+    keys = ['station'] if 'station' in df.columns else []
+    df = df.copy()
+    df['date'] = pd.to_datetime(df[['year', 'month', 'day']], errors='coerce')
+    df = df.dropna(subset=['date']).drop_duplicates(keys + ['date'], keep='last')
+    if df.empty:
+        # 日期范围里没有数据或日期都不合法：返回同样列的空表，不去补日历
+        return pd.DataFrame({c: pd.Series(dtype=t) for c, t in [(k, object) for k in keys] + [
+            ('date', 'datetime64[ns]'), ('value', float), ('quality', object),
+            ('year', int), ('month', int), ('day', int), ('filled', bool)]})
+    value = pd.to_numeric(df['value'], errors='coerce').astype(float)
+    if 'data_completeness' in df.columns:
+        codes = df['data_completeness'].astype(str).str.strip()
+        bad = ~codes.isin(keep_codes) | value.isna()
+    else:
+        bad = value.isna()
+    df['value'] = value.where(~bad)
+    df['quality'] = np.where(bad, 'incomplete', 'ok')
+
+    # 对照完整日历补齐缺失的日期（多站点时每个站点按自己的起止日期）
+    if keys:
+        spans = df.groupby('station')['date'].agg(['min', 'max'])
+        ranges = [pd.date_range(lo, hi) for lo, hi in zip(spans['min'], spans['max'])]
+        index = pd.MultiIndex.from_arrays([
+            np.repeat(spans.index.to_numpy(), [len(r) for r in ranges]),
+            np.concatenate([r.to_numpy() for r in ranges]),
+        ], names=['station', 'date'])
+    else:
+        index = pd.date_range(df['date'].min(), df['date'].max(), name='date')
+    full = df.set_index(keys + ['date'])[['value', 'quality']].reindex(index).reset_index()
+    full['quality'] = full['quality'].fillna('gap')
+    full['year'] = full['date'].dt.year
+    full['month'] = full['date'].dt.month
+    full['day'] = full['date'].dt.day
+
+    missing = full['value'].isna()
+    if fill:
+        full['value'] = fill_values(full, fill, keys)
+    full['filled'] = missing & full['value'].notna()
+    return full
+
+def fill_values(full, method, keys=()):
+    value = full['value']
+    grouped = value.groupby([full[k] for k in keys]) if keys else None
+    if method == 'ffill':
+        return grouped.ffill() if keys else value.ffill()
+    if method == 'climatology':
+        # 同一站点、同一月日的多年平均值
+        by = [full[k] for k in keys] + [full['month'], full['day']]
+        value = value.fillna(value.groupby(by).transform('mean'))
+        method = 'linear'
+    if method == 'linear':
+        if keys:
+            return grouped.transform(lambda s: s.interpolate(limit_direction='both'))
+        return value.interpolate(limit_direction='both')
+    raise ValueError(f"未知的补值方法：{method}")
+
+def clean_cache_path(csv_file, fill, keep_codes):
+    # 文件名带上所有清洗设置的摘要：改了补值方法或完整度代码就用另一个缓存文件
+    digest = hashlib.sha1(repr((fill, tuple(keep_codes))).encode('utf-8')).hexdigest()[:8]
+    return f"{os.path.splitext(csv_file)[0]}.clean-{fill or 'none'}-{digest}.pkl"
+
+def load_clean(csv_file=CSV_FILE, fill=FILL_METHOD, keep_codes=None, date_range=None):
+    return _load_clean(csv_file, fill, tuple(keep_codes or COMPLETE_CODES), _date_range(date_range))
+
+@functools.lru_cache(maxsize=None)
+def _load_clean(csv_file, fill, keep_codes, date_range):
+    import cloud_shared
+    if cloud_shared.is_shared(csv_file):
+        # 发布进程已经清洗好了
+        return cloud_shared.attach(cloud_shared.shared_name(csv_file)).frame()
+    import cloud_archive
+    # 清洗结果缓存在原始 CSV 旁边，CSV 更新后自动失效；归档本身读得快，只读一段日期时结果也不一样，都不缓存
+    if cloud_archive.is_archive(csv_file) or date_range:
+        return clean_frame(_load_frame(csv_file, date_range), keep_codes, fill)
+    cache = clean_cache_path(csv_file, fill, keep_codes)
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(csv_file):
+        return pd.read_pickle(cache)
+    df = clean_frame(_load_frame(csv_file, date_range), keep_codes, fill)
+    try:
+        df.to_pickle(cache)
+    except OSError:
+        pass
+    return df
+
+def load_days(csv_file=CSV_FILE, fill=FILL_METHOD, keep_codes=None, date_range=None):
+    # [{'year', 'month', 'day', 'value', 'filled'}, ...]，按日期排序；FILL_METHOD 为 None 时缺测的日期不在里面。
+    # 'shm:名字' 返回 cloud_shared.SharedDays，直接用共享内存上的数组，不复制
+    import cloud_shared
+    if cloud_shared.is_shared(csv_file):
+        return cloud_shared.attach(cloud_shared.shared_name(csv_file)).days()
+    return _load_days(csv_file, fill, tuple(keep_codes or COMPLETE_CODES), _date_range(date_range))
+
+@functools.lru_cache(maxsize=None)
+def _load_days(csv_file, fill, keep_codes, date_range):
+    return frame_days(_load_clean(csv_file, fill, keep_codes, date_range))
+
+def frame_days(df):
+    df = df[df['value'].notna()]
+    return [{'year': y, 'month': m, 'day': d, 'value': v, 'filled': f}
+            for y, m, d, v, f in zip(df['year'].tolist(), df['month'].tolist(), df['day'].tolist(),
+                                     df['value'].tolist(), df['filled'].tolist())]
+
+def load_series(csv_file=CSV_FILE, fill=FILL_METHOD, keep_codes=None, date_range=None):
+    # (['2025-01-01', ...], [88.0, ...])，折线图和云朵网格用
+    return _load_series(csv_file, fill, tuple(keep_codes or COMPLETE_CODES), _date_range(date_range))
+
+@functools.lru_cache(maxsize=None)
+def _load_series(csv_file, fill, keep_codes, date_range):
+    df = _load_clean(csv_file, fill, keep_codes, date_range)
+    df = df[df['value'].notna()]
+    return df['date'].dt.strftime('%Y-%m-%d').tolist(), df['value'].tolist()
+
+def clear_caches():
+    # 源文件变了（cloud_shared 的发布进程）：下次重新读
+    for cached in (_load_frame, _load_clean, _load_days, _load_series):
+        cached.cache_clear()
@@ -0,0 +1,170 @@
+import math
+import zlib
+import numpy as np
+import pygame
+
+# ====== 可修改参数 ======
+GROW_SECONDS = 0.6   # 环上追加日期后，从旧天数过渡到新天数用的时间
+FRAME_CACHE_BYTES = 32 * 1024 * 1024  # 每个视图压缩后的帧缓存最多占多少内存，0 为不缓存
+FRAME_CACHE_LEVEL = 1                 # zlib 压缩级别：只压一次、每帧都要解压，要快不要小
+
+# 脏矩形绘制（环形视图 cloud002 / cloud009 / cloud010）：
+# 背景、标题、趋势环、所有（不高亮的）圆点、图例这些不变的东西只画一次，存成静态层。
+# 每帧先用静态层把上一帧画过动态内容的矩形盖回去，再画这一帧的动态内容（高亮圆点、中间日期、悬停提示），
+# 最后只把这两组矩形交给 pygame.display.update()。
+#
+# 帧缓存：没有悬停、选中，环也没在变长时，动态内容只由当前日期决定，而动画是按天数一圈一圈循环的。
+# 第一圈画的时候把每帧动态矩形里的像素用 zlib 压缩存起来（按日期索引），之后几圈直接解压 blit，
+# 不再做泛光和文字。超出 FRAME_CACHE_BYTES 就不再存新的帧（循环播放时按 LRU 淘汰一帧也命中不了），
+# 静态层重画（数据、布局、配色变了）时整个清空。
+
+
+def ring_positions(center, ring_radius, angle_step, n, unit=None):
+    # 第 i 个圆点在正上方起顺时针第 i 个角度上。
+    # unit：共享内存里发布好的单位圆坐标 (cos, sin)（cloud_shared），步长正好是 2π/n 时直接缩放
+    if unit is not None and angle_step == 2 * math.pi / max(n, 1):
+        return np.column_stack((center[0] + ring_radius * unit[0], center[1] + ring_radius * unit[1]))
+    return [(center[0] + ring_radius * math.cos(i * angle_step - math.pi / 2),
+             center[1] + ring_radius * math.sin(i * angle_step - math.pi / 2)) for i in range(n)]
+
+def circle_rects(positions, radii):
+    # 每个圆点的包围盒，用来找和高亮区域重叠、需要补画的圆点
+    return [pygame.Rect(int(x) - int(r), int(y) - int(r), int(r) * 2 + 1, int(r) * 2 + 1)
+            for (x, y), r in zip(positions, radii)]
+
+def grow_scales(shown, n):
+    # 过渡中还没"长出来"的新圆点按比例缩小：第 i 个在 shown 从 i 涨到 i+1 的过程中从 0 长到原大小
+    return [min(1.0, max(0.0, shown - i)) for i in range(n)]
+
+
+class RingGrowth:
+    # 跟随模式下环上的天数变多时，角度步长不跳变：显示用的天数（可以是小数）
+    # 按动画时钟的时间在 GROW_SECONDS 内从旧值涨到新值，导出时跟着模拟时间走
+    def __init__(self, clock, n=0, seconds=GROW_SECONDS):
+        self.clock = clock
+        self.seconds = seconds
+        self.shown = float(n)
+        self.target = n
+        self.start = float(n)
+        self.start_time = None
+
+    def reset(self, n):
+        # 整份换数据：直接跳到新天数
+        self.shown = self.start = float(n)
+        self.target = n
+        self.start_time = None
+
+    def grow(self, n):
+        self.start = self.shown
+        self.target = n
+        self.start_time = self.clock.time_func()
+
+    @property
+    def growing(self):
+        return self.shown != self.target
+
+    @property
+    def angle_step(self):
+        return 2 * math.pi / max(self.shown, 1)
+
+    def step(self):
+        # 推进过渡，返回显示的天数是否变了
+        if not self.growing:
+            return False
+        t = (self.clock.time_func() - self.start_time) / self.seconds if self.seconds > 0 else 1
+        t = min(1.0, max(0.0, t))
+        # 先快后慢
+        self.shown = self.start + (self.target - self.start) * (1 - (1 - t) ** 3)
+        if t >= 1:
+            self.shown = float(self.target)
+        return True
+
+
+class FrameCache:
+    # 帧 key -> [(矩形, 压缩后的 RGB 像素)]
+    def __init__(self, budget=FRAME_CACHE_BYTES):
+        self.budget = budget
+        self.frames = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.frames.clear()
+        self.size = 0
+
+    def get(self, key):
+        patches = self.frames.get(key)
+        if patches is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return patches
+
+    def store(self, key, surface, rects):
+        if self.size >= self.budget:
+            return
+        patches = [(rect, zlib.compress(pygame.image.tobytes(surface.subsurface(rect), 'RGB'), FRAME_CACHE_LEVEL))
+                   for rect in rects]
+        self.frames[key] = patches
+        self.size += sum(len(data) for _, data in patches)
+
+    def blit(self, surface, patches):
+        for rect, data in patches:
+            surface.blit(pygame.image.frombuffer(zlib.decompress(data), rect.size, 'RGB'), rect)
+        return [rect for rect, _ in patches]
+
+
+class DirtyLayer:
+    # build(surface) 画静态层；draw_dynamic(surface) 画动态内容并返回它碰过的矩形列表
+    def __init__(self, build, draw_dynamic, cache_bytes=FRAME_CACHE_BYTES):
+        self.build = build
+        self.draw_dynamic = draw_dynamic
+        self.static = None
+        self.previous = []
+        self.frames = FrameCache(cache_bytes) if cache_bytes > 0 else None
+
+    def static_for(self, surface):
+        if self.static is None or self.static.get_size() != surface.get_size():
+            self.static = pygame.Surface(surface.get_size(), 0, surface)
+            self.build(self.static)
+            self.previous = []
+            if self.frames is not None:
+                self.frames.clear()
+        return self.static
+
+    def invalidate(self):
+        # 数据或配色变了之后调用，下一帧重画静态层（缓存的帧也一起作废）
+        self.static = None
+
+    def draw(self, surface, key=None):
+        # 整帧：静态层 + 动态内容。key 为帧缓存的键（只由它决定动态内容时才给，如当前日期），None 不走缓存
+        surface.blit(self.static_for(surface), (0, 0))
+        self.previous = self._draw_frame(surface, key)
+
+    def draw_dirty(self, surface, key=None):
+        # 只重画变化的区域，返回要更新到屏幕上的矩形；静态层刚重建时整帧都算脏
+        if self.static is None or self.static.get_size() != surface.get_size():
+            self.draw(surface, key)
+            return [surface.get_rect()]
+        for rect in self.previous:
+            surface.blit(self.static, rect, rect)
+        current = self._draw_frame(surface, key)
+        rects = self.previous + current
+        self.previous = current
+        return rects
+
+    def _draw_frame(self, surface, key):
+        # 缓存里有就解压 blit，没有就画，画完按 key 存起来
+        if key is None or self.frames is None:
+            return self._clip(surface, self.draw_dynamic(surface))
+        patches = self.frames.get(key)
+        if patches is not None:
+            return self.frames.blit(surface, patches)
+        rects = self._clip(surface, self.draw_dynamic(surface))
+        self.frames.store(key, surface, rects)
+        return rects
+
+    def _clip(self, surface, rects):
+        bounds = surface.get_rect()
+        return [r for r in (pygame.Rect(rect).clip(bounds) for rect in rects) if r.width and r.height]
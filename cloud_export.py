@@ -0,0 +1,172 @@
+import argparse
+import importlib
+import queue
+import shutil
+import struct
+import subprocess
+import threading
+import time
+import zlib
+import numpy as np
+import pygame
+from cloud_views import ALL_VIEWS
+from dashboard import view_size
+
+# ====== 可修改参数 ======
+EXPORT_FPS = 30
+EXPORT_SECONDS = 10
+QUEUE_SIZE = 32          # 渲染和编码之间最多缓存多少帧
+FFMPEG_ARGS = ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-preset', 'veryfast']
+
+# 导出流程：主线程渲染 -> 原始 RGB 字节放进有界队列 -> 写线程编码
+# 两边并行，总吞吐取决于较慢的一边，而不是两者相加
+
+
+class FFmpegWriter:
+    # 通过管道把原始 RGB 帧交给本机的 ffmpeg
+    def __init__(self, path, size, fps):
+        self.path = path
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{size[0]}x{size[1]}', '-r', str(fps),
+               '-i', '-'] + FFMPEG_ARGS + [path]
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        self.proc.stdin.write(frame)
+
+    def close(self):
+        self.proc.stdin.close()
+        if self.proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg 退出码 {self.proc.returncode}")
+
+
+def _png_chunk(kind, payload):
+    return struct.pack('>I', len(payload)) + kind + payload + struct.pack('>I', zlib.crc32(kind + payload) & 0xFFFFFFFF)
+
+
+class APNGWriter:
+    # 没有 ffmpeg 时的后备：边渲染边写动画 PNG，不需要额外的库
+    def __init__(self, path, size, fps, n_frames):
+        if n_frames < 1:
+            # 没有 IDAT 的 PNG 是坏文件
+            raise ValueError(f"动画 PNG 至少要 1 帧：{n_frames}")
+        self.path = path
+        self.size = size
+        self.fps = fps
+        self.seq = 0
+        self.count = 0
+        self.file = open(path, 'wb')
+        self.file.write(b'\x89PNG\r\n\x1a\n')
+        self.file.write(_png_chunk(b'IHDR', struct.pack('>IIBBBBB', size[0], size[1], 8, 2, 0, 0, 0)))
+        self.file.write(_png_chunk(b'acTL', struct.pack('>II', n_frames, 0)))
+
+    def write(self, frame):
+        w, h = self.size
+        rows = np.frombuffer(frame, dtype=np.uint8).reshape(h, w * 3)
+        # 每行前面加一个过滤类型字节（0 = 不过滤）
+        raw = np.hstack([np.zeros((h, 1), dtype=np.uint8), rows]).tobytes()
+        data = zlib.compress(raw, 6)
+        self.file.write(_png_chunk(b'fcTL', struct.pack('>IIIIIHHBB', self.seq, w, h, 0, 0, 1, self.fps, 0, 0)))
+        self.seq += 1
+        if self.count == 0:
+            self.file.write(_png_chunk(b'IDAT', data))
+        else:
+            self.file.write(_png_chunk(b'fdAT', struct.pack('>I', self.seq) + data))
+            self.seq += 1
+        self.count += 1
+
+    def close(self):
+        self.file.write(_png_chunk(b'IEND', b''))
+        self.file.close()
+
+
+def open_writer(path, size, fps, n_frames):
+    if not path.lower().endswith('.png') and shutil.which('ffmpeg'):
+        return FFmpegWriter(path, size, fps)
+    if not path.lower().endswith('.png'):
+        path = path.rsplit('.', 1)[0] + '.png'
+        print(f"没有找到 ffmpeg，改为输出动画 PNG：{path}")
+    return APNGWriter(path, size, fps, n_frames)
+
+
+def _drain(frames, writer, errors):
+    # 写线程：一直取到 None 为止；出错后继续取帧丢掉，避免渲染线程卡在 put 上
+    while True:
+        frame = frames.get()
+        if frame is None:
+            break
+        if errors:
+            continue
+        try:
+            writer.write(frame)
+        except Exception as e:
+            errors.append(e)
+    try:
+        writer.close()
+    except Exception as e:
+        errors.append(e)
+
+
+def use_sim_time(module):
+    # 用导出时间驱动视图的动画时钟，保证每一帧都和实时播放时一致；改返回列表里的值来推进时间
+    sim_time = [0.0]
+    if hasattr(module, 'anim_clock'):
+        module.anim_clock.time_func = lambda: sim_time[0]
+        module.anim_clock.last = None
+    return sim_time
+
+
+def export_module(module, path, seconds=EXPORT_SECONDS, fps=EXPORT_FPS, queue_size=QUEUE_SIZE):
+    # 导出一个已经导入的视图模块，返回 (帧数, 实际写出的文件)
+    size = view_size(module)
+    surface = pygame.Surface(size)
+    n_frames = int(seconds * fps)
+    if n_frames < 1:
+        # 在打开输出文件之前就拒绝，不留下空文件
+        raise ValueError(f"{seconds} 秒 × {fps} 帧/秒不到 1 帧，加长 --seconds 或提高 --fps")
+    sim_time = use_sim_time(module)
+
+    writer = open_writer(path, size, fps, n_frames)
+    frames = queue.Queue(maxsize=queue_size)
+    errors = []
+    thread = threading.Thread(target=_drain, args=(frames, writer, errors), daemon=True)
+    thread.start()
+
+    frame = None
+    for i in range(n_frames):
+        sim_time[0] = i / fps
+        # 状态没变时直接复用上一帧的字节
+        if module.update() or frame is None:
+            module.draw(surface)
+            frame = pygame.image.tobytes(surface, 'RGB')
+        frames.put(frame)
+    frames.put(None)
+    thread.join()
+    if errors:
+        raise errors[0]
+    return n_frames, writer.path
+
+
+def export_view(name, path, seconds=EXPORT_SECONDS, fps=EXPORT_FPS, queue_size=QUEUE_SIZE):
+    pygame.font.init()
+    module = importlib.import_module(name)
+    start = time.perf_counter()
+    n_frames, path = export_module(module, path, seconds, fps, queue_size)
+    elapsed = time.perf_counter() - start
+    print(f"{name} -> {path}: {n_frames} 帧, {elapsed:.1f} 秒, {n_frames / elapsed:.1f} 帧/秒")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='把可视化动画导出成视频（ffmpeg）或动画 PNG')
+    parser.add_argument('view', choices=ALL_VIEWS)
+    parser.add_argument('output', help='输出文件，如 cloud002.mp4；没有 ffmpeg 或以 .png 结尾时输出动画 PNG')
+    parser.add_argument('--seconds', type=float, default=EXPORT_SECONDS)
+    parser.add_argument('--fps', type=int, default=EXPORT_FPS)
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE)
+    args = parser.parse_args(argv)
+    if int(args.seconds * args.fps) < 1:
+        parser.error(f"{args.seconds} 秒 × {args.fps} 帧/秒不到 1 帧")
+    export_view(args.view, args.output, args.seconds, args.fps, args.queue_size)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import functools
+import json
+import os
+import pygame
+
+# ====== 可修改参数 ======
+_HERE = os.path.dirname(os.path.abspath(__file__))
+FONT_REGISTRY = os.path.join(_HERE, '.fonts.json')   # 字体名 -> 字体文件，装了新字体后删掉它重新查找
+FALLBACK_FONTS = ['arial']
+# 中文标签（cloud001 / cloud002）用的字体：请求的是其中任何一个时，按顺序找能显示中文的替代字体
+CJK_FONTS = ['simhei', 'microsoftyahei', 'pingfangsc', 'heitisc', 'notosanscjksc', 'notosanscjk',
+             'notosanssc', 'sourcehansanssc', 'wenquanyimicrohei', 'wenquanyizenhei', 'droidsansfallback']
+BUNDLED_CJK_FONT = os.path.join(_HERE, 'fonts', 'NotoSansSC-Regular.otf')  # 可选：系统里没有中文字体时放一个在这里
+
+# 字体和文字缓存：同一个进程里所有视图共用，避免重复扫描系统字体、每帧重复渲染同样的文字。
+# SysFont 每个进程第一次调用都要扫描一遍系统字体（Linux 上是 fc-list），而且找不到时静悄悄地退回默认字体。
+# 这里把"字体名 -> 字体文件"的查找结果存到磁盘，之后启动直接 pygame.font.Font(path, size)，不再扫描。
+
+_registry = None
+
+def _ensure_init():
+    if not pygame.font.get_init():
+        pygame.font.init()
+
+def _simplename(name):
+    # 和 pygame 的字体名规则一致：只保留字母数字，转小写
+    return ''.join(c.lower() for c in name if c.isalnum())
+
+def _load_registry():
+    global _registry
+    if _registry is None:
+        try:
+            with open(FONT_REGISTRY, encoding='utf-8') as f:
+                _registry = json.load(f)
+        except (OSError, ValueError):
+            _registry = {}
+    return _registry
+
+def _save_registry():
+    # 先写临时文件再替换，批量渲染时多个进程同时写也不会读到半个文件
+    tmp = f'{FONT_REGISTRY}.{os.getpid()}.tmp'
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(_registry, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, FONT_REGISTRY)
+    except OSError:
+        pass
+
+def _candidates(name):
+    names = [name]
+    if _simplename(name) in CJK_FONTS:
+        names += CJK_FONTS
+    return names + FALLBACK_FONTS
+
+def _match(name, bold):
+    # 返回 {'path', 'fake_bold'}；path 为 None 表示用 pygame 自带的默认字体
+    for candidate in _candidates(name):
+        path = pygame.font.match_font(candidate, bold)
+        if path:
+            # 没有单独的粗体文件时 match_font 会退回常规体，和 SysFont 一样改用模拟粗体
+            fake_bold = bold and path == pygame.font.match_font(candidate, False)
+            return {'path': path, 'fake_bold': fake_bold}
+    if _simplename(name) in CJK_FONTS and os.path.exists(BUNDLED_CJK_FONT):
+        return {'path': BUNDLED_CJK_FONT, 'fake_bold': bold}
+    return {'path': None, 'fake_bold': bold}
+
+def resolve_font(name, bold=False):
+    registry = _load_registry()
+    key = f'{_simplename(name)}|{int(bold)}'
+    entry = registry.get(key)
+    if entry is None or (entry['path'] and not os.path.exists(entry['path'])):
+        entry = _match(name, bold)
+        registry[key] = entry
+        _save_registry()
+    return entry
+
+def clear_registry():
+    global _registry
+    _registry = {}
+    get_font.cache_clear()
+    try:
+        os.remove(FONT_REGISTRY)
+    except OSError:
+        pass
+
+@functools.lru_cache(maxsize=None)
+def get_font(name, size, bold=False):
+    _ensure_init()
+    entry = resolve_font(name, bold)
+    try:
+        font = pygame.font.Font(entry['path'], size)
+    except (OSError, pygame.error):
+        font = pygame.font.Font(None, size)
+    if entry['fake_bold']:
+        font.set_bold(True)
+    return font
+
+@functools.lru_cache(maxsize=4096)
+def render_text(font, text, color, antialias=True):
+    # 返回的 Surface 是共享的，只能 blit，不要在上面画东西
+    return font.render(text, antialias, color)
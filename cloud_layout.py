@@ -0,0 +1,89 @@
+# 日历气泡图（cloud004）和折线图（cloud008）的版式与配色
+# 不依赖 pygame：窗口视图和静态报表（cloud_report）共用同一套常量
+
+# ====== 日历气泡（cloud004） ======
+CALENDAR_SIZE = (900, 900)
+CALENDAR_LEFT_MARGIN = 120
+CALENDAR_TOP_MARGIN = 110
+CALENDAR_CELL_W = 55
+CALENDAR_CELL_H = 24
+CALENDAR_BG = (240, 248, 255)  # AliceBlue
+CALENDAR_TITLE_COLOR = (30, 80, 120)
+CALENDAR_LABEL_COLOR = (40, 60, 80)
+CALENDAR_TITLE = 'Average cloud cover in Hong Kong (percentage)'
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+               "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+def value_ratio(value, min_value, max_value):
+    return (value - min_value) / (max_value - min_value) if max_value > min_value else 0
+
+def calendar_cell(month, day):
+    # 某月某日气泡的中心
+    x = CALENDAR_LEFT_MARGIN + (month-1)*CALENDAR_CELL_W + CALENDAR_CELL_W//2
+    y = CALENDAR_TOP_MARGIN + (day-1)*CALENDAR_CELL_H + CALENDAR_CELL_H//2
+    return x, y
+
+def calendar_color(ratio, alpha=255):
+    # 蓝色渐变
+    r = int(120 + ratio * 80)
+    g = int(180 + ratio * 50)
+    b = int(255 - ratio * 60)
+    return (r, g, b, alpha)
+
+def calendar_radius(ratio):
+    return 5 + ratio * 10  # 更小的气泡
+
+# ====== 折线图（cloud008） ======
+CHART_SIZE = (1200, 700)
+CHART_LEFT_MARGIN = 120
+CHART_RIGHT_MARGIN = 80
+CHART_TOP_MARGIN = 100
+CHART_BOTTOM_MARGIN = 120
+CHART_BG = (10, 10, 20)
+CHART_TITLE_COLOR = (255, 255, 255)
+CHART_AXIS_COLOR = (180, 180, 180)
+CHART_LABEL_COLOR = (220, 220, 220)
+CHART_POINT_RADIUS = 7
+CHART_LINE_WIDTH = 3
+CHART_TITLE = 'The average daily cloud content in Hong Kong'
+CHART_Y_TICKS = 5
+CHART_X_TICKS = 8
+
+# 渐变色（低云量到高云量）
+CHART_COLOR_LOW = (255, 120, 80)   # 橙色
+CHART_COLOR_HIGH = (80, 180, 255)  # 蓝色
+
+# 趋势叠加层（滑动均值 + 百分位带）
+CHART_TREND_COLOR = (255, 255, 255)
+CHART_BAND_COLOR = (120, 160, 220, 60)
+
+CHART_PLOT_WIDTH = CHART_SIZE[0] - CHART_LEFT_MARGIN - CHART_RIGHT_MARGIN
+CHART_PLOT_HEIGHT = CHART_SIZE[1] - CHART_TOP_MARGIN - CHART_BOTTOM_MARGIN
+
+def chart_x(i, n_points):
+    return CHART_LEFT_MARGIN + int(i * CHART_PLOT_WIDTH / max(1, n_points - 1))
+
+def chart_y(val, min_val, max_val):
+    return CHART_TOP_MARGIN + int((max_val - val) * CHART_PLOT_HEIGHT / (max_val - min_val + 1e-6))
+
+def lerp_color(c1, c2, t):
+    return (
+        int(c1[0] + (c2[0] - c1[0]) * t),
+        int(c1[1] + (c2[1] - c1[1]) * t),
+        int(c1[2] + (c2[2] - c1[2]) * t)
+    )
+
+def smooth_curve(points, smoothness=0.2):
+    # 用贝塞尔曲线平滑折线
+    result = []
+    for i in range(len(points)-1):
+        p0 = points[i]
+        p1 = points[i+1]
+        result.append(p0)
+        # 插入中点
+        for t in [smoothness, 1-smoothness]:
+            x = int(p0[0] * (1-t) + p1[0] * t)
+            y = int(p0[1] * (1-t) + p1[1] * t)
+            result.append((x, y))
+    result.append(points[-1])
+    return result
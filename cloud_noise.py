@@ -0,0 +1,76 @@
+import numpy as np
+
+# ====== 可修改参数 ======
+NOISE_SEED = 2025
+
+# 确定性噪声：按 (元素编号, 帧号, 通道) 哈希得到 [0, 1) 的值，
+# 同样的输入永远得到同样的输出，可以整批数组一起算，不需要 random 模块。
+_MASK = np.uint64(0xFFFFFFFF)
+
+
+def _hash(element, frame, channel, seed):
+    e = np.atleast_1d(np.asarray(element, dtype=np.int64)).astype(np.uint64) & _MASK
+    f = np.atleast_1d(np.asarray(frame, dtype=np.int64)).astype(np.uint64) & _MASK
+    h = (e * np.uint64(0x9E3779B1)) & _MASK
+    h = h ^ ((f * np.uint64(0x85EBCA77)) & _MASK)
+    h ^= np.uint64((int(channel) * 0xC2B2AE3D + int(seed)) & 0xFFFFFFFF)
+    # lowbias32 混合
+    h ^= h >> np.uint64(16)
+    h = (h * np.uint64(0x7FEB352D)) & _MASK
+    h ^= h >> np.uint64(15)
+    h = (h * np.uint64(0x846CA68B)) & _MASK
+    h ^= h >> np.uint64(16)
+    return h
+
+
+def _result(out, element, frame):
+    if np.ndim(element) == 0 and np.ndim(frame) == 0:
+        return out[0].item()
+    return out
+
+
+def uniform(element, frame, low=0.0, high=1.0, channel=0, seed=NOISE_SEED):
+    # 对应 random.uniform(low, high)
+    u = _hash(element, frame, channel, seed).astype(np.float64) / 4294967296.0
+    return _result(low + (high - low) * u, element, frame)
+
+
+def randint(element, frame, low, high, channel=0, seed=NOISE_SEED):
+    # 对应 random.randint(low, high)，包含两端
+    h = _hash(element, frame, channel, seed)
+    out = low + (h % np.uint64(high - low + 1)).astype(np.int64)
+    return _result(out, element, frame)
+
+
+def smooth(element, t, low=0.0, high=1.0, channel=0, seed=NOISE_SEED):
+    # 连续噪声：整数帧之间平滑插值，t 可以是小数
+    t = np.asarray(t, dtype=np.float64)
+    t0 = np.floor(t)
+    a = uniform(element, t0.astype(np.int64), channel=channel, seed=seed)
+    b = uniform(element, t0.astype(np.int64) + 1, channel=channel, seed=seed)
+    w = t - t0
+    w = w * w * (3 - 2 * w)
+    out = low + (high - low) * (a + (b - a) * w)
+    if np.ndim(out) == 0:
+        return float(out)
+    return out
+
+
+class NoiseTable:
+    # 预先算好 period 帧 x n_elements 个元素的噪声表，每帧只做查表
+    # integer=True 时等价于 randint(low, high)
+    def __init__(self, n_elements, period, low=0.0, high=1.0, channel=0, seed=NOISE_SEED, integer=False):
+        self.period = period
+        frames = np.arange(period)[:, None]
+        elements = np.arange(n_elements)[None, :]
+        if integer:
+            self.table = randint(elements, frames, low, high, channel, seed).astype(np.int32)
+        else:
+            self.table = uniform(elements, frames, low, high, channel, seed).astype(np.float32)
+
+    def frame(self, frame):
+        return self.table[frame % self.period]
+
+    def __getitem__(self, key):
+        frame, element = key
+        return self.table[frame % self.period, element]
@@ -0,0 +1,31 @@
+import numpy as np
+
+# ====== 可修改参数 ======
+# 环形视图按云量上色用的渐变：[(位置 0~1, 颜色), ...]，相邻两个之间线性插值。
+# 视图用它算单个颜色；共享内存的发布进程（cloud_shared）用它把整列颜色一次算好，
+# 查看进程的配色和这里的一样时直接用发布好的颜色。
+PALETTES = {
+    'cloud002': [(0.0, (0, 51, 102)), (1.0, (255, 255, 255))],
+    'cloud009': [(0.0, (30, 60, 180)), (0.5, (120, 255, 255)), (1.0, (255, 255, 255))],
+    'cloud010': [(0.0, (75, 107, 3)), (0.25, (148, 192, 0)), (0.5, (78, 144, 245)),
+                 (0.75, (158, 190, 237)), (1.0, (243, 246, 243))],
+}
+
+
+def color(ratio, stops):
+    # ratio 落在哪一段就在那一段的两个颜色之间插值，各分量取整（截断）
+    k = 0
+    while k < len(stops) - 2 and ratio >= stops[k + 1][0]:
+        k += 1
+    (p1, c1), (p2, c2) = stops[k], stops[k + 1]
+    t = (ratio - p1) / (p2 - p1)
+    return tuple(int(a + (b - a) * t) for a, b in zip(c1, c2))
+
+def colors(ratios, stops):
+    # color() 的整列版本，返回 (n, 3) 的 uint8；算法和 color() 逐项一致，结果完全相同
+    ratios = np.asarray(ratios, dtype=float)
+    points = np.array([p for p, _ in stops])
+    rgb = np.array([c for _, c in stops], dtype=float)
+    k = np.clip(np.searchsorted(points[1:-1], ratios, side='right'), 0, len(stops) - 2)
+    t = (ratios - points[k]) / (points[k + 1] - points[k])
+    return (rgb[k] + (rgb[k + 1] - rgb[k]) * t[:, None]).astype(np.uint8)
@@ -0,0 +1,151 @@
+import math
+import numpy as np
+import pygame
+import cloud_fonts
+import cloud_sprites
+
+# ====== 可修改参数 ======
+MIN_HIT_RADIUS = 6                # 很小的圆点也至少有这么大的可点范围
+TOOLTIP_BG = (20, 20, 30, 210)
+TOOLTIP_COLOR = (255, 255, 255)
+TOOLTIP_PADDING = 6
+TOOLTIP_OFFSET = (14, 14)         # 提示框相对鼠标的偏移
+
+# 鼠标拾取：每个元素的包围盒放进均匀网格，查询时只看鼠标所在的那个格子，
+# 和元素总数无关。布局（位置、半径）不变时索引一直复用，只有布局键变化才重建。
+
+
+class SpatialIndex:
+    # keys 与 boxes 一一对应；boxes 为 (x0, y0, x1, y1)。circles 给出时按圆心距离精确判断
+    def __init__(self, keys, boxes, circles=None, cell_size=None):
+        self.keys = list(keys)
+        self.boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        self.circles = None if circles is None else np.asarray(circles, dtype=float).reshape(-1, 3)
+        self.slots = {k: i for i, k in enumerate(self.keys)}
+        if cell_size is None:
+            # 按元素较短的一边定格子大小：细长的柱子会跨多个格子，但每个格子里的元素很少
+            sides = np.minimum(self.boxes[:, 2] - self.boxes[:, 0], self.boxes[:, 3] - self.boxes[:, 1])
+            cell_size = max(1.0, float(np.median(sides)) * 2) if len(sides) else 1.0
+        self.cell = cell_size
+        self.grid = {}
+        lo = np.floor(self.boxes[:, :2] / self.cell).astype(int).tolist()
+        hi = np.floor(self.boxes[:, 2:] / self.cell).astype(int).tolist()
+        for i, ((gx0, gy0), (gx1, gy1)) in enumerate(zip(lo, hi)):
+            for gx in range(gx0, gx1 + 1):
+                for gy in range(gy0, gy1 + 1):
+                    self.grid.setdefault((gx, gy), []).append(i)
+
+    @classmethod
+    def from_circles(cls, keys, centers, radii, min_radius=MIN_HIT_RADIUS):
+        circles = [(x, y, max(r, min_radius)) for (x, y), r in zip(centers, radii)]
+        boxes = [(x - r, y - r, x + r, y + r) for x, y, r in circles]
+        return cls(keys, boxes, circles)
+
+    @classmethod
+    def from_rects(cls, keys, rects):
+        # rects 为 (x, y, w, h)
+        return cls(keys, [(x, y, x + w, y + h) for x, y, w, h in rects])
+
+    def query(self, pos):
+        # 返回鼠标下的元素；几个元素重叠时取中心离鼠标最近的
+        px, py = pos
+        best, best_d = None, math.inf
+        for i in self.grid.get((int(px // self.cell), int(py // self.cell)), ()):
+            x0, y0, x1, y1 = self.boxes[i]
+            if not (x0 <= px <= x1 and y0 <= py <= y1):
+                continue
+            if self.circles is not None:
+                cx, cy, r = self.circles[i]
+                d = math.hypot(px - cx, py - cy)
+                if d > r:
+                    continue
+            else:
+                d = math.hypot(px - (x0 + x1) / 2, py - (y0 + y1) / 2)
+            if d < best_d:
+                best, best_d = i, d
+        return None if best is None else self.keys[best]
+
+    def bounds(self, key):
+        x0, y0, x1, y1 = self.boxes[self.slots[key]]
+        return pygame.Rect(int(x0), int(y0), int(x1 - x0), int(y1 - y0))
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def ring_index(center, ring_radius, angle_step, radii):
+    # 环形视图（cloud002/009/010）：第 i 个圆点在正上方起顺时针第 i 个角度上
+    centers = [(center[0] + ring_radius * math.cos(i * angle_step - math.pi / 2),
+                center[1] + ring_radius * math.sin(i * angle_step - math.pi / 2)) for i in range(len(radii))]
+    return SpatialIndex.from_circles(range(len(radii)), centers, radii)
+
+
+class Picker:
+    # 悬停和点击选中：build() 按当前布局生成 SpatialIndex，layout_key 变了才重新生成
+    def __init__(self, build):
+        self.build = build
+        self.layout_key = None
+        self.index = None
+        self.hover = None
+        self.selected = None
+        self.changed = False
+
+    def index_for(self, layout_key):
+        if self.index is None or layout_key != self.layout_key:
+            self.index = self.build()
+            self.layout_key = layout_key
+        return self.index
+
+    def relayout(self):
+        # 布局变了但还是同一份数据：下次查询重建索引，悬停/选中保留
+        self.index = None
+
+    def invalidate(self):
+        # 数据换了：下次查询重建索引，已经不存在的悬停/选中去掉
+        self.index = None
+        self.hover = None
+        self.selected = None
+        self.changed = True
+
+    def handle_event(self, event, layout_key):
+        if event.type == pygame.MOUSEMOTION:
+            hover = self.index_for(layout_key).query(event.pos)
+            if hover != self.hover:
+                self.hover = hover
+                self.changed = True
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            # 点中元素就选中它，再点一次或点空白处取消
+            hit = self.index_for(layout_key).query(event.pos)
+            self.selected = None if hit == self.selected else hit
+            self.changed = True
+        elif event.type == pygame.WINDOWLEAVE:
+            # 同一批事件里前面的点击等已经记下的变化不能丢
+            self.changed |= self.hover is not None
+            self.hover = None
+
+    def poll(self):
+        # 上次查询之后悬停或选中是否变过（用来决定要不要重绘）
+        changed, self.changed = self.changed, False
+        return changed
+
+    def active(self):
+        # 悬停优先，其次是选中的元素
+        return self.hover if self.hover is not None else self.selected
+
+
+def draw_tooltip(surface, anchor, lines, font, color=TOOLTIP_COLOR):
+    # 在 anchor 右下方画一个半透明提示框，放不下时翻到另一边；返回提示框占的矩形
+    texts = [cloud_fonts.render_text(font, line, color) for line in lines]
+    w = max(t.get_width() for t in texts) + TOOLTIP_PADDING * 2
+    h = sum(t.get_height() for t in texts) + TOOLTIP_PADDING * 2
+    x, y = anchor[0] + TOOLTIP_OFFSET[0], anchor[1] + TOOLTIP_OFFSET[1]
+    if x + w > surface.get_width():
+        x = anchor[0] - TOOLTIP_OFFSET[0] - w
+    if y + h > surface.get_height():
+        y = anchor[1] - TOOLTIP_OFFSET[1] - h
+    box = surface.blit(cloud_sprites.box_sprite(w, h, TOOLTIP_BG), (x, y))
+    y += TOOLTIP_PADDING
+    for t in texts:
+        surface.blit(t, (x + TOOLTIP_PADDING, y))
+        y += t.get_height()
+    return box
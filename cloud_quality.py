@@ -0,0 +1,75 @@
+import collections
+import time
+from cloud_clock import RENDER_FPS
+
+# ====== 可修改参数 ======
+ADAPTIVE_QUALITY = False      # 打开后按实测绘制耗时自动增减粒子数、发光层数、浮点数、毛刺数
+QUALITY_LEVELS = (0.25, 0.4, 0.55, 0.7, 0.85, 1.0)   # 可选的画质档位（效果数量的倍数）
+MIN_LEVEL = 0                 # 最低降到第几档
+MAX_LEVEL = len(QUALITY_LEVELS) - 1
+FRAME_BUDGET = 0.8 / RENDER_FPS  # 每帧绘制耗时预算，留两成给 flip 和事件
+RAISE_HEADROOM = 0.6          # 平均耗时低于预算的这个比例才升档；降档只要超预算，中间一段不动
+SAMPLE_FRAMES = 30            # 按最近多少帧的平均耗时判断
+HOLD_FRAMES = 60              # 换档后至少保持这么多帧，防止来回跳
+LOG_CHANGES = True            # 换档时打印一行（视图名、新档位、平均耗时）
+
+# 画质调节：每个视图一个 QualityGovernor，draw() 前后各调用一次 begin()/end()，
+# 画的时候通过 count()/glow_step() 拿到当前档位下的效果数量。
+# 两个阈值之间是死区，加上换档后的保持期，画质不会在两档之间来回抖动。
+
+
+class QualityGovernor:
+    def __init__(self, name, budget=FRAME_BUDGET, min_level=MIN_LEVEL, max_level=MAX_LEVEL):
+        self.name = name
+        self.budget = budget
+        self.min_level = min_level
+        self.max_level = max_level
+        self.level = max_level
+        self.samples = collections.deque(maxlen=SAMPLE_FRAMES)
+        self.hold = 0
+        self.changes = 0
+        self.start = None
+
+    @property
+    def quality(self):
+        # 当前档位的倍数；没打开时始终是满画质
+        return QUALITY_LEVELS[self.level] if ADAPTIVE_QUALITY else 1.0
+
+    def count(self, n, minimum=1):
+        # 按当前画质缩放一个效果数量（粒子数、浮点数、毛刺数）
+        return max(minimum, int(n * self.quality))
+
+    def glow_step(self, step=2):
+        # 发光层的半径步长：画质越低步长越大、层数越少
+        return max(step, round(step / self.quality))
+
+    def begin(self):
+        self.start = time.perf_counter()
+
+    def end(self):
+        if not ADAPTIVE_QUALITY or self.start is None:
+            return
+        self.samples.append(time.perf_counter() - self.start)
+        self.start = None
+        if self.hold > 0:
+            self.hold -= 1
+            return
+        if len(self.samples) < self.samples.maxlen:
+            return
+        mean = sum(self.samples) / len(self.samples)
+        if mean > self.budget and self.level > self.min_level:
+            self.set_level(self.level - 1, mean)
+        elif mean < self.budget * RAISE_HEADROOM and self.level < self.max_level:
+            self.set_level(self.level + 1, mean)
+
+    def set_level(self, level, mean=None):
+        self.level = min(self.max_level, max(self.min_level, level))
+        self.samples.clear()
+        self.hold = HOLD_FRAMES
+        self.changes += 1
+        if LOG_CHANGES:
+            detail = f"（平均 {mean * 1000:.1f} ms/帧）" if mean is not None else ''
+            print(f"{self.name}: 画质 {self.level} 档 x{QUALITY_LEVELS[self.level]:.2f}{detail}")
+
+    def __str__(self):
+        return f"{self.name} quality={self.quality:.2f} level={self.level}/{self.max_level}"
@@ -0,0 +1,367 @@
+import argparse
+import collections
+import collections.abc
+import csv
+import email.utils
+import hashlib
+import http.server
+import io
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import numpy as np
+import pandas as pd
+import cloud_data
+import cloud_shared
+
+# ====== 可修改参数 ======
+REFRESH_SOURCE = None    # None = 不刷新；本地 CSV 路径、天文台开放数据接口那样的 http(s) 地址（CSV 或 JSON），或 'shm:名字'（cloud_shared）
+REFRESH_SECONDS = 60     # 多久拉一次
+REFRESH_FOLLOW = False   # True = 跟随模式：本地 CSV 只读新追加的行，视图在原有数据后面追加
+HTTP_TIMEOUT = 10
+HKO_PATH = '/weatherAPI/opendata/opendata.php'   # 本地替身服务器模仿的接口路径
+HKO_FIELDS = ['年/Year', '月/Month', '日/Day', '數值/Value', '數據完整性/data Completeness']
+SERVE_PORT = 8000
+
+# 后台刷新：一个守护线程按间隔拉数据，没变化就什么都不做；有变化就在后台线程里解析、清洗，
+# 打包成一份不可变的 Dataset，用一次赋值换上去。渲染线程在两帧之间调用 poll()，
+# 只读一个引用，不加锁、不等 I/O，拿到新数据再交给视图的 set_data()。
+
+# days 是 tuple，元素和 cloud_data.load_days() 一样是 {'year', 'month', 'day', 'value', 'filled'}（只读，不要原地修改）；
+# 跟随模式追加过之后是 DaysView（只读，用法和 tuple 一样）；数据源是共享内存（cloud_shared）时是 SharedDays，视图直接用它的 columns。
+# generation 只在整份数据被替换时加一；同一 generation 里后面的版本只是在末尾多了几天。
+# appended 由 poll() 填：比上次 poll() 拿到的多出的天数（就是 days 末尾那几天），整份替换时为 None
+Dataset = collections.namedtuple('Dataset', ['version', 'source', 'loaded_at', 'days', 'generation', 'appended'])
+
+
+class DaysView(collections.abc.Sequence):
+    # 只追加的列表的前 n 项：后台线程之后再往列表末尾追加，已经发布出去的这份看到的还是原来那几天。
+    # 追加一次不用复制整份，取末尾几天（days[-appended:]）也只复制那几天
+    __slots__ = ('items', 'n')
+
+    def __init__(self, items, n):
+        self.items = items
+        self.n = n
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.items[j] for j in range(*i.indices(self.n))]
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError('DaysView index out of range')
+        return self.items[i]
+
+
+def parse_frame(text):
+    # 天文台开放数据：CSV（表头前可能有标题行、数据后有注释行）或 JSON（{"fields": [...], "data": [[...], ...]}）
+    text = text.lstrip('\ufeff').lstrip()
+    if text.startswith('{'):
+        payload = json.loads(text)
+        df = pd.DataFrame(payload['data'], columns=payload['fields'])
+    else:
+        lines = text.splitlines()
+        start = next((i for i, line in enumerate(lines) if 'year' in line.lower()), 0)
+        df = pd.read_csv(io.StringIO('\n'.join(lines[start:])), dtype=str, on_bad_lines='skip')
+    df = cloud_data.normalize_columns(df)
+    for col in ('year', 'month', 'day'):
+        df[col] = pd.to_numeric(df[col], errors='coerce')   # 注释行在这里变成 NaN，清洗时丢掉
+    return df.dropna(subset=['year', 'month', 'day'])
+
+def parse_text(text):
+    df = parse_frame(text)
+    if df.empty:
+        return ()
+    return tuple(cloud_data.frame_days(cloud_data.clean_frame(df)))
+
+
+class FileSource:
+    # 本地文件：修改时间和大小都没变就不重新读
+    def __init__(self, path):
+        self.name = path
+        self.path = path
+        self.stamp = None
+
+    def fetch(self):
+        st = os.stat(self.path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self.stamp:
+            return None
+        with open(self.path, encoding='utf-8-sig') as f:
+            text = f.read()
+        self.stamp = stamp
+        return text
+
+
+class HttpSource:
+    # HTTP 接口：带上 ETag / Last-Modified 做条件请求；服务器不支持时按内容摘要判断有没有变
+    def __init__(self, url):
+        self.name = url
+        self.url = url
+        self.etag = None
+        self.modified = None
+        self.digest = None
+
+    def fetch(self):
+        headers = {'User-Agent': 'cloud-visualization'}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.modified:
+            headers['If-Modified-Since'] = self.modified
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.url, headers=headers), timeout=HTTP_TIMEOUT) as resp:
+                body = resp.read()
+                charset = resp.headers.get_content_charset() or 'utf-8'
+                self.etag = resp.headers.get('ETag')
+                self.modified = resp.headers.get('Last-Modified')
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+        digest = hashlib.sha1(body).digest()
+        if digest == self.digest:
+            return None
+        self.digest = digest
+        return body.decode(charset, errors='replace')
+
+
+class TailSource:
+    # 跟随模式：记住已经读到的字节位置，每次只读后面追加的完整行（写了一半的行留到下次）。
+    # fetch() 返回 (reset, text)：文件第一次读、变短或被换掉时 reset 为 True，text 是整个文件
+    def __init__(self, path):
+        self.name = path
+        self.path = path
+        self.offset = 0
+        self.inode = None
+
+    def fetch(self):
+        st = os.stat(self.path)
+        reset = self.inode != st.st_ino or st.st_size < self.offset
+        if reset:
+            self.offset = 0
+        elif st.st_size == self.offset:
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read(st.st_size - self.offset)
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            return None
+        self.offset += end
+        self.inode = st.st_ino
+        return reset, chunk[:end].decode('utf-8-sig' if reset else 'utf-8', errors='replace')
+
+
+class TailParser:
+    # 把追加的几行接到已有数据后面，结果和整份重新清洗一致：
+    # 上一个有效日期作为锚点和新行一起清洗（锚点和新日期之间缺的天照常补），
+    # 末尾还没有有效值的行先留着，等后面来了有效值再一起补，不往后外推
+    def __init__(self):
+        self.header = None
+        self.tail = None     # 锚点 + 还没输出的行（原始列）
+
+    def feed(self, reset, text):
+        # 返回 (reset, 新的天列表)；追加的行和已有日期重叠（改了旧数据）时也按整份替换处理
+        if reset:
+            lines = text.lstrip('\ufeff').splitlines()
+            start = next((i for i, line in enumerate(lines) if 'year' in line.lower()), 0)
+            self.header = lines[start]
+            self.tail = None
+        elif self.header is None:
+            return False, []
+        else:
+            text = self.header + '\n' + text
+        df = parse_frame(text)
+        df['date'] = pd.to_datetime(df[['year', 'month', 'day']], errors='coerce')
+        df = df.dropna(subset=['date'])
+        if self.tail is not None:
+            if not df.empty and df['date'].min() <= self.tail['date'].iloc[0]:
+                return None
+            df = pd.concat([self.tail, df], ignore_index=True)
+        if df.empty:
+            return reset, []
+        clean = cloud_data.clean_frame(df.drop(columns='date'))
+        ok = clean.index[clean['quality'] == 'ok']
+        if len(ok) == 0:
+            self.tail = df
+            return reset, []
+        last = clean['date'][ok[-1]]
+        anchor = self.tail['date'].iloc[0] if self.tail is not None else None
+        self.tail = df[df['date'] >= last].reset_index(drop=True)
+        emit = clean[clean['date'] <= last]
+        if anchor is not None:
+            emit = emit[emit['date'] > anchor]
+        return reset, cloud_data.frame_days(emit)
+
+
+def make_source(source, follow=False):
+    if cloud_shared.is_shared(source):
+        return cloud_shared.SharedSource(source)
+    if urllib.parse.urlparse(source).scheme in ('http', 'https'):
+        return HttpSource(source)
+    return TailSource(source) if follow else FileSource(source)
+
+
+class Refresher:
+    def __init__(self, source, interval=REFRESH_SECONDS, follow=False):
+        self.source = make_source(source, follow)
+        self.interval = interval
+        self.latest = None     # 后台线程写、渲染线程读；只整体替换，不修改
+        self.seen = None       # 上次 poll() 返回的 Dataset
+        self.appending = None  # 跟随模式这一代追加用的列表，只在后台线程里往末尾加
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='cloud-refresh', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _publish(self, days, replace):
+        latest = self.latest
+        if replace or latest is None:
+            generation = latest.generation + 1 if latest else 1
+            self.appending = None
+        else:
+            # 同一代里第一次追加时复制一份，之后只往末尾加，发布的是前 n 项的 DaysView
+            if self.appending is None:
+                self.appending = list(latest.days)
+            self.appending.extend(days)
+            generation, days = latest.generation, DaysView(self.appending, len(self.appending))
+        self.latest = Dataset(latest.version + 1 if latest else 1, self.source.name, time.time(), days, generation, None)
+
+    def _run(self):
+        parser = TailParser() if isinstance(self.source, TailSource) else None
+        replace = False
+        while not self._stop.is_set():
+            try:
+                fetched = self.source.fetch()
+                if fetched is not None and parser is not None:
+                    result = parser.feed(*fetched)
+                    if result is None:
+                        # 旧数据被改了：下一轮从头读
+                        self.source.offset = 0
+                        self.source.inode = None
+                        continue
+                    reset, days = result
+                    replace = replace or reset
+                    if days:
+                        self._publish(tuple(days), replace)
+                        replace = False
+                elif fetched is not None:
+                    days = parse_text(fetched) if isinstance(fetched, str) else fetched
+                    if days and (self.latest is None or days != self.latest.days):
+                        self._publish(days, True)
+                self.error = None
+            except Exception as e:
+                # 网络或文件出错时保留旧数据，下个周期再试
+                self.error = e
+                print(f"数据刷新失败（{self.source.name}）：{e}")
+            self._stop.wait(self.interval)
+
+    def poll(self):
+        # 渲染线程在两帧之间调用：有还没取过的新数据就返回 Dataset，否则返回 None
+        latest, seen = self.latest, self.seen
+        if latest is None or (seen is not None and latest.version == seen.version):
+            return None
+        self.seen = latest
+        if seen is not None and latest.generation == seen.generation:
+            return latest._replace(appended=len(latest.days) - len(seen.days))
+        return latest
+
+def start(source=None, interval=None, follow=None):
+    # 没配置数据源时返回 None，视图照常只用启动时读的数据
+    source = source or REFRESH_SOURCE
+    if not source:
+        return None
+    follow = REFRESH_FOLLOW if follow is None else follow
+    return Refresher(source, interval or REFRESH_SECONDS, follow).start()
+
+
+# ====== 本地替身服务器 ======
+# 把一个 CSV 按天文台开放数据接口的样子提供出来，用来在本机测试 HTTP 刷新：
+#   http://localhost:8000/weatherAPI/opendata/opendata.php?dataType=CLMCLD&rformat=csv
+
+class HkoStandIn(http.server.BaseHTTPRequestHandler):
+    csv_file = cloud_data.CSV_FILE
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        if url.path != HKO_PATH:
+            self.send_error(404)
+            return
+        fmt = urllib.parse.parse_qs(url.query).get('rformat', ['json'])[0]
+        st = os.stat(self.csv_file)
+        modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        with open(self.csv_file, encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.reader(f))[1:]
+        if fmt == 'csv':
+            out = io.StringIO()
+            out.write('每日平均雲量/Daily Mean Amount of Cloud\n')
+            writer = csv.writer(out, lineterminator='\n')
+            writer.writerow(HKO_FIELDS)
+            writer.writerows(rows)
+            out.write('*** 沒有數據/unavailable\n')
+            body, ctype = out.getvalue().encode('utf-8'), 'text/csv; charset=utf-8'
+        else:
+            body = json.dumps({'fields': HKO_FIELDS, 'data': rows}, ensure_ascii=False).encode('utf-8')
+            ctype = 'application/json; charset=utf-8'
+        self.send_response(200)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Last-Modified', modified)
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+def serve(csv_file, port=SERVE_PORT):
+    HkoStandIn.csv_file = csv_file
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port), HkoStandIn)
+    print(f"http://127.0.0.1:{port}{HKO_PATH}?rformat=csv  <- {csv_file}")
+    server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='后台刷新云量数据：本地替身服务器 / 查看刷新结果')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('serve', help='把 CSV 按天文台开放数据接口的格式提供出来')
+    p.add_argument('csv', nargs='?', default=cloud_data.CSV_FILE)
+    p.add_argument('--port', type=int, default=SERVE_PORT)
+    p = sub.add_parser('watch', help='按间隔拉取数据源，每次有新数据时打印一行')
+    p.add_argument('source', help='本地 CSV 路径或 http(s) 地址')
+    p.add_argument('--seconds', type=float, default=REFRESH_SECONDS)
+    p.add_argument('--follow', action='store_true', help='只读本地 CSV 新追加的行')
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        serve(args.csv, args.port)
+        return
+    refresher = start(args.source, args.seconds, args.follow)
+    try:
+        while True:
+            dataset = refresher.poll()
+            if dataset is not None:
+                values = np.array([d['value'] for d in dataset.days])
+                last = dataset.days[-1]
+                added = f"+{dataset.appended}" if dataset.appended else '整份'
+                print(f"v{dataset.version} ({added}): {len(values)} 天, {values.min():.0f}~{values.max():.0f}%, "
+                      f"最后一天 {last['month']:02d}-{last['day']:02d} {last['value']:.0f}%")
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        refresher.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+import argparse
+import functools
+import struct
+import time
+import zlib
+from xml.sax.saxutils import escape
+import numpy as np
+import cloud_data
+import cloud_layout
+import cloud_stats
+
+# ====== 可修改参数 ======
+REPORTS = ['calendar', 'chart']   # calendar = cloud004 的日历气泡，chart = cloud008 的折线图
+PNG_LEVEL = 1                     # PNG 的 zlib 压缩级别：批量出图时速度优先
+SHOW_TREND = True
+FONT_FAMILY = 'Arial'
+
+# 静态报表：不导入 pygame、不初始化显示，直接用 cloud_layout 里的版式生成
+# SVG 字符串（带文字），或者 numpy RGB 数组 / PNG（只有图形，没有文字）。
+# 数据按 CSV 缓存在 cloud_data 里，同一进程连续出图时只解析一次。
+
+def _rgb(color):
+    return f'rgb({color[0]},{color[1]},{color[2]})'
+
+def _svg_text(x, y, text, size, color, anchor='start', baseline='hanging', family=FONT_FAMILY, bold=False):
+    weight = ' font-weight="bold"' if bold else ''
+    return (f'<text x="{x}" y="{y}" font-family="{family}" font-size="{size}"{weight} fill="{_rgb(color)}" '
+            f'text-anchor="{anchor}" dominant-baseline="{baseline}">{escape(str(text))}</text>')
+
+def _svg_document(size, bg, body):
+    w, h = size
+    return '\n'.join([f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}">',
+                      f'<rect width="{w}" height="{h}" fill="{_rgb(bg)}"/>'] + body + ['</svg>\n'])
+
+# ====== 日历气泡（cloud004） ======
+
+def _calendar_bubbles(days):
+    # [(x, y, radius, color), ...]，全部气泡都已浮现、不呼吸
+    values = [d['value'] for d in days]
+    lo, hi = min(values), max(values)
+    bubbles = []
+    for d in days:
+        ratio = cloud_layout.value_ratio(d['value'], lo, hi)
+        x, y = cloud_layout.calendar_cell(d['month'], d['day'])
+        bubbles.append((x, y, int(cloud_layout.calendar_radius(ratio)), cloud_layout.calendar_color(ratio)[:3]))
+    return bubbles, lo, hi
+
+def _calendar_legend():
+    # 图例里 80 个渐变小圆，和 cloud004 同一位置
+    legend_x, legend_y = cloud_layout.CALENDAR_SIZE[0]-220, cloud_layout.CALENDAR_SIZE[1]-80
+    return legend_x, legend_y, [(legend_x+20+i, legend_y, 8, cloud_layout.calendar_color(i/80)[:3]) for i in range(80)]
+
+def calendar_svg(days):
+    bubbles, lo, hi = _calendar_bubbles(days)
+    w, h = cloud_layout.CALENDAR_SIZE
+    body = [_svg_text(w//2, 28, cloud_layout.CALENDAR_TITLE, 28, cloud_layout.CALENDAR_TITLE_COLOR, 'middle', family='Arial Black')]
+    for m, name in enumerate(cloud_layout.MONTH_NAMES):
+        x = cloud_layout.CALENDAR_LEFT_MARGIN + m*cloud_layout.CALENDAR_CELL_W + cloud_layout.CALENDAR_CELL_W//2
+        body.append(_svg_text(x, cloud_layout.CALENDAR_TOP_MARGIN-32, name, 18, cloud_layout.CALENDAR_LABEL_COLOR, 'middle'))
+    for d in range(1, 32):
+        y = cloud_layout.CALENDAR_TOP_MARGIN + (d-1)*cloud_layout.CALENDAR_CELL_H + cloud_layout.CALENDAR_CELL_H//4
+        body.append(_svg_text(cloud_layout.CALENDAR_LEFT_MARGIN-32, y, d, 18, cloud_layout.CALENDAR_LABEL_COLOR, baseline='central'))
+    for x, y, r, color in bubbles:
+        body.append(f'<circle cx="{x}" cy="{y}" r="{r}" fill="{_rgb(color)}"/>')
+    legend_x, legend_y, legend = _calendar_legend()
+    for x, y, r, color in legend:
+        body.append(f'<circle cx="{x}" cy="{y}" r="{r}" fill="{_rgb(color)}"/>')
+    body.append(_svg_text(legend_x+10, legend_y+18, f"{lo:.0f}%", 12, cloud_layout.CALENDAR_LABEL_COLOR))
+    body.append(_svg_text(legend_x+80, legend_y+18, f"{hi:.0f}%", 12, cloud_layout.CALENDAR_LABEL_COLOR))
+    body.append(_svg_text(legend_x, legend_y+34, "Cloud cover (bubble size & color)", 12, cloud_layout.CALENDAR_LABEL_COLOR))
+    return _svg_document(cloud_layout.CALENDAR_SIZE, cloud_layout.CALENDAR_BG, body)
+
+def calendar_raster(days):
+    bubbles, lo, hi = _calendar_bubbles(days)
+    img = _canvas(cloud_layout.CALENDAR_SIZE, cloud_layout.CALENDAR_BG)
+    for x, y, r, color in bubbles + _calendar_legend()[2]:
+        _fill_circle(img, x, y, r, color)
+    return img
+
+# ====== 折线图（cloud008） ======
+
+def _chart_geometry(dates, values, trend):
+    n = len(values)
+    lo, hi = min(values), max(values)
+    points = [(cloud_layout.chart_x(i, n), cloud_layout.chart_y(v, lo, hi)) for i, v in enumerate(values)]
+    colors = [cloud_layout.lerp_color(cloud_layout.CHART_COLOR_LOW, cloud_layout.CHART_COLOR_HIGH, (v - lo) / (hi - lo + 1e-6)) for v in values]
+    geo = {
+        'n': n, 'lo': lo, 'hi': hi, 'points': points, 'colors': colors,
+        'smooth': cloud_layout.smooth_curve(points, smoothness=0.3),
+    }
+    if trend:
+        stats = cloud_stats.RollingStats.from_values(values)
+        lo_q, hi_q = cloud_stats.BAND_PERCENTILES
+        geo['upper'] = [(cloud_layout.chart_x(i, n), cloud_layout.chart_y(v, lo, hi)) for i, v in enumerate(stats.bands[hi_q])]
+        geo['lower'] = [(cloud_layout.chart_x(i, n), cloud_layout.chart_y(v, lo, hi)) for i, v in enumerate(stats.bands[lo_q])]
+        geo['mean'] = [(cloud_layout.chart_x(i, n), cloud_layout.chart_y(v, lo, hi)) for i, v in enumerate(stats.mean)]
+    return geo
+
+def _segment_colors(geo):
+    # 和 cloud008 一样：第 i 段平滑曲线按第 min(i, n-1) 个数据点着色
+    n, colors = geo['n'], geo['colors']
+    return [colors[min(i, n-1)] for i in range(len(geo['smooth']) - 1)]
+
+def chart_svg(dates, values, trend=SHOW_TREND):
+    geo = _chart_geometry(dates, values, trend)
+    w, h = cloud_layout.CHART_SIZE
+    left, right = cloud_layout.CHART_LEFT_MARGIN, w - cloud_layout.CHART_RIGHT_MARGIN
+    top, bottom = cloud_layout.CHART_TOP_MARGIN, h - cloud_layout.CHART_BOTTOM_MARGIN
+    axis = _rgb(cloud_layout.CHART_AXIS_COLOR)
+    body = [_svg_text(w//2, top//2, cloud_layout.CHART_TITLE, 36, cloud_layout.CHART_TITLE_COLOR, 'middle', 'central', bold=True),
+            f'<polyline points="{left},{top} {left},{bottom} {right},{bottom}" fill="none" stroke="{axis}" stroke-width="2"/>']
+
+    # Y轴刻度
+    for i in range(cloud_layout.CHART_Y_TICKS + 1):
+        val = int(geo['lo'] + i * (geo['hi'] - geo['lo']) / cloud_layout.CHART_Y_TICKS)
+        y = cloud_layout.chart_y(val, geo['lo'], geo['hi'])
+        body.append(_svg_text(left - 50, y - 10, val, 16, cloud_layout.CHART_LABEL_COLOR))
+        body.append(f'<line x1="{left-8}" y1="{y}" x2="{left+8}" y2="{y}" stroke="{axis}" stroke-width="2"/>')
+    body.append(_svg_text(left - 90, top - 40, 'Cloud Content (%)', 20, cloud_layout.CHART_LABEL_COLOR))
+
+    # X轴刻度
+    step = max(1, geo['n'] // cloud_layout.CHART_X_TICKS)
+    for i in range(0, geo['n'], step):
+        x = cloud_layout.chart_x(i, geo['n'])
+        body.append(_svg_text(x, bottom + 25, dates[i], 16, cloud_layout.CHART_LABEL_COLOR, 'middle', 'central'))
+        body.append(f'<line x1="{x}" y1="{bottom-8}" x2="{x}" y2="{bottom+8}" stroke="{axis}" stroke-width="2"/>')
+    body.append(_svg_text(right - 60, bottom + 50, 'Date', 20, cloud_layout.CHART_LABEL_COLOR))
+
+    if trend:
+        band = ' '.join(f'{x},{y}' for x, y in geo['upper'] + geo['lower'][::-1])
+        body.append(f'<polygon points="{band}" fill="{_rgb(cloud_layout.CHART_BAND_COLOR)}" fill-opacity="{cloud_layout.CHART_BAND_COLOR[3]/255:.3f}"/>')
+
+    smooth = geo['smooth']
+    for (x1, y1), (x2, y2), color in zip(smooth, smooth[1:], _segment_colors(geo)):
+        body.append(f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="{_rgb(color)}" stroke-width="{cloud_layout.CHART_LINE_WIDTH}"/>')
+    for (x, y), color in zip(geo['points'], geo['colors']):
+        body.append(f'<circle cx="{x}" cy="{y}" r="{cloud_layout.CHART_POINT_RADIUS}" fill="{_rgb(color)}"/>')
+
+    if trend:
+        lo_q, hi_q = cloud_stats.BAND_PERCENTILES
+        mean = ' '.join(f'{x},{y}' for x, y in geo['mean'])
+        body.append(f'<polyline points="{mean}" fill="none" stroke="{_rgb(cloud_layout.CHART_TREND_COLOR)}" stroke-width="2"/>')
+        body.append(_svg_text(right, top - 40, f'{cloud_stats.TREND_WINDOW}-day mean & {lo_q}-{hi_q}% band',
+                              18, cloud_layout.CHART_TREND_COLOR, 'end'))
+
+    # 图例（渐变条）
+    legend_x, legend_y = left, bottom + 70
+    body.append(f'<defs><linearGradient id="legend"><stop offset="0" stop-color="{_rgb(cloud_layout.CHART_COLOR_LOW)}"/>'
+                f'<stop offset="1" stop-color="{_rgb(cloud_layout.CHART_COLOR_HIGH)}"/></linearGradient></defs>')
+    body.append(f'<rect x="{legend_x}" y="{legend_y}" width="220" height="18" fill="url(#legend)"/>')
+    body.append(_svg_text(legend_x - 10, legend_y + 23, 'Lower', 18, cloud_layout.CHART_COLOR_LOW))
+    body.append(_svg_text(legend_x + 160, legend_y + 23, 'Higher', 18, cloud_layout.CHART_COLOR_HIGH))
+    body.append(_svg_text(legend_x + 50, legend_y - 28, 'Cloud Content (%)', 18, cloud_layout.CHART_LABEL_COLOR))
+    return _svg_document(cloud_layout.CHART_SIZE, cloud_layout.CHART_BG, body)
+
+def chart_raster(dates, values, trend=SHOW_TREND):
+    geo = _chart_geometry(dates, values, trend)
+    w, h = cloud_layout.CHART_SIZE
+    left, right = cloud_layout.CHART_LEFT_MARGIN, w - cloud_layout.CHART_RIGHT_MARGIN
+    top, bottom = cloud_layout.CHART_TOP_MARGIN, h - cloud_layout.CHART_BOTTOM_MARGIN
+    img = _canvas(cloud_layout.CHART_SIZE, cloud_layout.CHART_BG)
+
+    _draw_lines(img, [(left, top), (left, bottom), (right, bottom)], [cloud_layout.CHART_AXIS_COLOR] * 2, 2)
+    for i in range(cloud_layout.CHART_Y_TICKS + 1):
+        val = int(geo['lo'] + i * (geo['hi'] - geo['lo']) / cloud_layout.CHART_Y_TICKS)
+        y = cloud_layout.chart_y(val, geo['lo'], geo['hi'])
+        _draw_lines(img, [(left - 8, y), (left + 8, y)], [cloud_layout.CHART_AXIS_COLOR], 2)
+    for i in range(0, geo['n'], max(1, geo['n'] // cloud_layout.CHART_X_TICKS)):
+        x = cloud_layout.chart_x(i, geo['n'])
+        _draw_lines(img, [(x, bottom - 8), (x, bottom + 8)], [cloud_layout.CHART_AXIS_COLOR], 2)
+
+    if trend:
+        _fill_band(img, geo['upper'], geo['lower'], cloud_layout.CHART_BAND_COLOR)
+    _draw_lines(img, geo['smooth'], _segment_colors(geo), cloud_layout.CHART_LINE_WIDTH)
+    for (x, y), color in zip(geo['points'], geo['colors']):
+        _fill_circle(img, x, y, cloud_layout.CHART_POINT_RADIUS, color)
+    if trend:
+        _draw_lines(img, geo['mean'], [cloud_layout.CHART_TREND_COLOR] * (len(geo['mean']) - 1), 2)
+
+    t = np.arange(220) / 220
+    low, high = np.array(cloud_layout.CHART_COLOR_LOW), np.array(cloud_layout.CHART_COLOR_HIGH)
+    img[bottom + 70:bottom + 88, left:left + 220] = (low + (high - low) * t[:, None]).astype(np.uint8)
+    return img
+
+# ====== numpy 光栅化 ======
+
+@functools.lru_cache(maxsize=8)
+def _background(size, bg):
+    img = np.empty((size[1], size[0], 3), dtype=np.uint8)
+    img[:] = bg
+    img.flags.writeable = False
+    return img
+
+def _canvas(size, bg):
+    # 纯色底图只生成一次，之后每张图整块复制
+    return _background(size, tuple(bg)).copy()
+
+@functools.lru_cache(maxsize=64)
+def _disc(r):
+    yy, xx = np.ogrid[-r:r + 1, -r:r + 1]
+    return xx * xx + yy * yy <= r * r
+
+def _fill_circle(img, cx, cy, r, color):
+    h, w = img.shape[:2]
+    if cx - r < 0 or cy - r < 0 or cx + r >= w or cy + r >= h:
+        return  # 报表里的圆都在画布内，越界的直接跳过
+    img[cy - r:cy + r + 1, cx - r:cx + r + 1][_disc(r)] = color[:3]
+
+def _blend(pixels, color):
+    # 整数 alpha 混合，color 为 (r, g, b, a)
+    a = color[3]
+    return ((pixels.astype(np.uint16) * (255 - a) + np.array(color[:3], dtype=np.uint16) * a) // 255).astype(np.uint8)
+
+def _draw_lines(img, points, colors, width):
+    # 所有线段一次性采样：每段按长度取点，再按线宽盖一个方块
+    p = np.asarray(points, dtype=float)
+    if len(p) < 2:
+        return
+    a, b = p[:-1], p[1:]
+    counts = np.ceil(np.hypot(*(b - a).T)).astype(int) + 1
+    seg = np.repeat(np.arange(len(a)), counts)
+    t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) / np.repeat(np.maximum(counts - 1, 1), counts)
+    xy = np.rint(a[seg] + (b[seg] - a[seg]) * t[:, None]).astype(int)
+    rgb = np.asarray(colors, dtype=np.uint8)[seg]
+    h, w = img.shape[:2]
+    for dy in range(-(width // 2), width - width // 2):
+        for dx in range(-(width // 2), width - width // 2):
+            x, y = xy[:, 0] + dx, xy[:, 1] + dy
+            ok = (x >= 0) & (x < w) & (y >= 0) & (y < h)
+            img[y[ok], x[ok]] = rgb[ok]
+
+def _fill_band(img, upper, lower, color):
+    # 上下边界的 x 单调递增：按列插值，只收集带内的像素再一次混合
+    up, low = np.asarray(upper, dtype=float), np.asarray(lower, dtype=float)
+    xs = np.arange(int(up[0, 0]), int(up[-1, 0]) + 1)
+    y_top = np.ceil(np.interp(xs, up[:, 0], up[:, 1])).astype(int)
+    y_bottom = np.floor(np.interp(xs, low[:, 0], low[:, 1])).astype(int)
+    heights = np.maximum(y_bottom - y_top + 1, 0)
+    cols = np.repeat(xs, heights)
+    rows = np.repeat(y_top, heights) + np.arange(heights.sum()) - np.repeat(np.cumsum(heights) - heights, heights)
+    img[rows, cols] = _blend(img[rows, cols], color)
+
+def _png_chunk(kind, payload):
+    return struct.pack('>I', len(payload)) + kind + payload + struct.pack('>I', zlib.crc32(kind + payload) & 0xFFFFFFFF)
+
+def png_bytes(img, level=PNG_LEVEL):
+    h, w = img.shape[:2]
+    # 每行前面加一个过滤类型字节（0 = 不过滤）
+    raw = np.hstack([np.zeros((h, 1), dtype=np.uint8), img.reshape(h, w * 3)]).tobytes()
+    return (b'\x89PNG\r\n\x1a\n'
+            + _png_chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0))
+            + _png_chunk(b'IDAT', zlib.compress(raw, level))
+            + _png_chunk(b'IEND', b''))
+
+# ====== 入口 ======
+
+def render(report, csv_file=cloud_data.CSV_FILE, fmt='svg'):
+    # 返回 SVG 字符串或 RGB 数组
+    if report == 'calendar':
+        days = cloud_data.load_days(csv_file)
+        return calendar_svg(days) if fmt == 'svg' else calendar_raster(days)
+    if report == 'chart':
+        dates, values = cloud_data.load_series(csv_file)
+        return chart_svg(dates, values) if fmt == 'svg' else chart_raster(dates, values)
+    raise ValueError(f"未知报表：{report}")
+
+def write_report(report, path, csv_file=cloud_data.CSV_FILE):
+    # 按扩展名输出 .svg 或 .png
+    if path.lower().endswith('.png'):
+        data = png_bytes(render(report, csv_file, 'raster'))
+    else:
+        data = render(report, csv_file, 'svg').encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='不开窗口，直接把日历气泡图 / 折线图输出成 SVG 或 PNG')
+    parser.add_argument('report', choices=REPORTS)
+    parser.add_argument('output', help='输出文件，.svg（带文字）或 .png（只有图形）')
+    parser.add_argument('--csv', default=cloud_data.CSV_FILE)
+    parser.add_argument('--repeat', type=int, default=1, help='重复生成的次数，用来测吞吐')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        write_report(args.report, args.output, args.csv)
+    elapsed = time.perf_counter() - start
+    print(f"{args.report}: {args.repeat} 张, {elapsed:.2f} 秒, {args.repeat * 60 / elapsed:.0f} 张/分钟")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+import pygame
+import cloud_bloom
+import cloud_climate
+import cloud_dirty
+import cloud_palettes
+import cloud_picking
+import cloud_refresh
+import cloud_shared
+import cloud_stats
+from cloud_clock import AnimationClock, RENDER_FPS
+
+# 环形视图（cloud002 / cloud009 / cloud010）共用的部分：数据和派生的颜色、布局，脏矩形绘制，拾取，主循环。
+# 每天一个圆点，从正上方起顺时针排成一圈，颜色和大小按云量，当前日期高亮，环内一圈滑动均值。
+# 视图文件里只留常量、配色，和各自不同的几块，交给 Ring 的回调：
+#     background(surface)          静态层里圆点之下的部分（背景、标题）
+#     foreground(surface)          静态层里圆点之上的部分（信息框、图例）
+#     label(surface, day) -> [Rect]  中间的日期和云量，返回画过的矩形
+#     tooltip(day) -> [str]        悬停 / 选中时提示框里的几行
+
+
+class Ring:
+    def __init__(self, center, ring_radius, palette, dot_radius, days_per_second, trend_radii, trend_color,
+                 background, foreground, label, tooltip, tooltip_font,
+                 glow_color=None, glow_spread=6, select_color=(255, 255, 255), show_trend=True, color_by='value'):
+        # dot_radius：(最小半径, 最大比最小多多少)；trend_radii：趋势环的 (最小, 最大) 半径；
+        # glow_color 为 None 时高亮光晕用圆点自己的颜色
+        self.center = center
+        self.ring_radius = ring_radius
+        self.palette = palette
+        self.dot_radius = dot_radius
+        self.trend_radii = trend_radii
+        self.trend_color = trend_color
+        self.background = background
+        self.foreground = foreground
+        self.label = label
+        self.tooltip = tooltip
+        self.tooltip_font = tooltip_font
+        self.glow_color = glow_color
+        self.glow_spread = glow_spread
+        self.select_color = select_color
+        self.show_trend = show_trend
+        self.color_by = color_by    # 'anomaly'：按和多年同期均值的差上色；'zscore'：按标准分上色（半径仍按云量）
+        self.current = 0
+        self.clock = AnimationClock(days_per_second)
+        self.growth = cloud_dirty.RingGrowth(self.clock)
+        self.picker = cloud_picking.Picker(self.build_index)
+        self.layer = cloud_dirty.DirtyLayer(self.draw_static, self.draw_dynamic)
+        self.set_data([])
+
+    def ratio(self, value):
+        span = self.max_value - self.min_value
+        return (value - self.min_value) / span if span > 0 else 0
+
+    def color(self, value):
+        # 云量越大，颜色越亮
+        return cloud_palettes.color(self.ratio(value), self.palette)
+
+    def radius(self, value):
+        # 云量越大，圆点越大
+        if self.max_value == self.min_value:
+            return self.dot_radius[0]
+        return self.dot_radius[0] + (value - self.min_value) / (self.max_value - self.min_value) * self.dot_radius[1]
+
+    def build_index(self):
+        return cloud_picking.ring_index(self.center, self.ring_radius, self.angle_step, self.dot_radii)
+
+    def handle_event(self, event):
+        # 鼠标悬停显示提示，点击选中某一天
+        self.picker.handle_event(event, self.num_days)
+
+    def update(self):
+        # 推进时钟，只有日期变化时才需要重绘
+        steps = self.clock.tick()
+        self.current = (self.current + steps) % self.num_days if self.num_days else 0
+        # 追加日期后环还在变大
+        grew = self.growth.step()
+        if grew:
+            self.relayout()
+        return self.picker.poll() or steps > 0 or grew
+
+    def draw_static(self, surface):
+        # 不随日期变化的部分：背景、趋势环、所有圆点、图例等
+        self.background(surface)
+
+        # 滑动均值趋势环
+        if self.show_trend and len(self.trend_points) > 1:
+            pygame.draw.lines(surface, self.trend_color, True, self.trend_points, 2)
+
+        # 绘制所有圆点
+        for (x, y), color, radius in zip(self.dot_positions, self.dot_colors, self.dot_radii):
+            pygame.draw.circle(surface, color, (int(x), int(y)), int(radius))
+
+        self.foreground(surface)
+
+    def draw_highlight(self, surface, i):
+        # 高亮当前日期：圆点周围一小块做泛光，再画描边；之后画的、压在它上面的圆点补画一遍
+        positions, colors, radii = self.dot_positions, self.dot_colors, self.dot_radii
+        x, y = positions[i]
+        radius = radii[i]
+        glow = colors[i] if self.glow_color is None else self.glow_color
+        rect = cloud_bloom.glow_circle(surface, (x, y), radius, glow, spread=self.glow_spread)
+        pygame.draw.circle(surface, colors[i], (int(x), int(y)), int(radius))
+        pygame.draw.circle(surface, (255, 255, 255), (int(x), int(y)), int(radius), 2)
+        # 只在光晕范围内补画，范围外的像素保持静态层原样
+        surface.set_clip(rect)
+        for j in rect.collidelistall(self.dot_rects):
+            if j > i:
+                pygame.draw.circle(surface, colors[j], (int(positions[j][0]), int(positions[j][1])), int(radii[j]))
+        surface.set_clip(None)
+        return rect
+
+    def draw_dynamic(self, surface):
+        # 每帧变化的部分，返回画过的矩形
+        if not self.num_days:
+            return []
+        return [self.draw_highlight(surface, self.current)] + self.draw_overlay(surface)
+
+    def draw_overlay(self, surface):
+        # 中间文字和悬停提示，返回画过的矩形
+        if not self.num_days:
+            return []
+        rects = self.label(surface, self.data[self.current])
+
+        # 悬停/选中的日期
+        picked = self.picker.active()
+        if picked is not None:
+            rect = self.picker.index_for(self.num_days).bounds(picked)
+            if picked == self.picker.selected:
+                rects.append(pygame.draw.circle(surface, self.select_color, rect.center, rect.width // 2 + 2, 2))
+            rects.append(cloud_picking.draw_tooltip(surface, rect.center, self.tooltip(self.data[picked]), self.tooltip_font))
+        return rects
+
+    def draw_scaled(self, scene, s):
+        # 动态分辨率（cloud_scaling）降了档时整帧重画，不走静态层和帧缓存：
+        # 趋势环、圆点和高亮光晕的坐标、半径乘 s 画到缩小的画布上，文字之后用 draw_overlay 按原始分辨率画
+        if self.show_trend and len(self.trend_points) > 1:
+            pygame.draw.lines(scene, self.trend_color, True, [(x * s, y * s) for x, y in self.trend_points], max(1, round(2 * s)))
+        for i, ((x, y), color, radius) in enumerate(zip(self.dot_positions, self.dot_colors, self.dot_radii)):
+            x, y, radius = x * s, y * s, radius * s
+            if i == self.current:
+                glow = color if self.glow_color is None else self.glow_color
+                cloud_bloom.glow_circle(scene, (x, y), radius, glow, spread=max(1, round(self.glow_spread * s)))
+                pygame.draw.circle(scene, color, (int(x), int(y)), int(radius))
+                pygame.draw.circle(scene, (255, 255, 255), (int(x), int(y)), int(radius), max(1, round(2 * s)))
+            else:
+                pygame.draw.circle(scene, color, (int(x), int(y)), int(radius))
+
+    def frame_key(self):
+        # 没有悬停、选中，环也没在变长时，这一帧只由当前日期决定，走帧缓存
+        if self.picker.active() is None and not self.growth.growing:
+            return self.current
+        return None
+
+    def draw(self, surface):
+        self.layer.draw(surface, self.frame_key())
+
+    def restyle(self, start=0):
+        # 颜色只和数值、归一化范围有关：范围没变时只给新追加的几天算颜色
+        data = self.data
+        colors = data.colors(self.palette) if self.color_by == 'value' and isinstance(data, cloud_shared.SharedDays) else None
+        if colors is not None:
+            # 共享内存里发布进程按同一套配色算好的整列颜色，直接用
+            self.dot_colors = colors
+            return
+        if self.color_by == 'value':
+            shown = self.values[start:]
+        else:
+            # 距平 / 标准分换算到云量范围，沿用原来的配色
+            shown = cloud_climate.palette_values(data[start:], self.color_by, self.min_value, self.max_value)
+        self.dot_colors = (self.dot_colors[:start] if start else []) + [self.color(v) for v in shown]
+
+    def relayout(self):
+        # 角度步长、范围或天数变了：重算位置、半径（新圆点按过渡进度缩小）、趋势环，静态层和拾取索引下一帧重建
+        self.angle_step = self.growth.angle_step
+        self.trend_points = cloud_stats.ring_points(self.center, self.trend.mean, self.min_value, self.max_value,
+                                                    *self.trend_radii, self.angle_step)
+        unit = self.data.ring_unit if isinstance(self.data, cloud_shared.SharedDays) else None
+        self.dot_positions = cloud_dirty.ring_positions(self.center, self.ring_radius, self.angle_step, self.num_days, unit)
+        scales = cloud_dirty.grow_scales(self.growth.shown, self.num_days)
+        self.dot_radii = [self.radius(v) * s for v, s in zip(self.values, scales)]
+        self.dot_rects = cloud_dirty.circle_rects(self.dot_positions, self.dot_radii)
+        self.layer.invalidate()
+        self.picker.relayout()
+
+    def set_data(self, days):
+        # 换一份数据：重算派生的数值、布局和颜色。
+        # 启动时调用一次；后台刷新（cloud_refresh）拿到新数据后在两帧之间再调用
+        if isinstance(days, cloud_shared.SharedDays):
+            # 共享内存里的数据：直接用只读的列和发布进程算好的趋势，不复制
+            self.data, self.values = days, days.columns['value']
+            self.min_value, self.max_value = days.min_value, days.max_value
+            self.trend = cloud_stats.RollingStats.from_mean(days.columns['trend'])
+        else:
+            self.data = list(days)
+            self.values = [d['value'] for d in self.data]
+            self.min_value = min(self.values, default=0)
+            self.max_value = max(self.values, default=0)
+            self.trend = cloud_stats.RollingStats.from_values(self.values, [(d['year'], d['month']) for d in self.data])
+        self.num_days = len(self.data)
+        self.current = self.current % self.num_days if self.num_days else 0
+        self.growth.reset(self.num_days)
+        self.restyle()
+        self.relayout()
+        self.picker.invalidate()
+
+    def append_days(self, days):
+        # 跟随模式：新的几天接在末尾，极值和趋势增量更新；
+        # 极值变了才重算所有颜色，环的天数在 GROW_SECONDS 内平滑涨上去
+        start = self.num_days
+        new_values = [d['value'] for d in days]
+        self.data.extend(days)
+        self.values.extend(new_values)
+        for d in days:
+            self.trend.append(d['value'], (d['year'], d['month']))
+        rescaled = min(new_values) < self.min_value or max(new_values) > self.max_value
+        self.min_value = min(self.min_value, min(new_values))
+        self.max_value = max(self.max_value, max(new_values))
+        self.num_days = len(self.data)
+        self.restyle(0 if rescaled else start)
+        self.growth.grow(self.num_days)
+        self.relayout()
+
+    def apply_dataset(self, dataset):
+        # 后台刷新拿到的数据：只多了末尾几天就追加，否则整份换（共享内存上的数组不能原地追加）
+        if dataset.appended and isinstance(self.data, list):
+            self.append_days(dataset.days[-dataset.appended:])
+        else:
+            self.set_data(dataset.days)
+
+
+def main(view):
+    # 单独运行一个环形视图。view 是视图模块：经由它的 update / draw / handle_event 调用，
+    # 别的工具（cloud_alloc）换掉模块上的这些函数时照样生效
+    ring = view.ring
+    pygame.init()
+    screen = pygame.display.set_mode((view.WIDTH, view.HEIGHT))
+    pygame.display.set_caption(view.CAPTION)
+    clock = pygame.time.Clock()
+    refresher = cloud_refresh.start()
+
+    running = True
+    needs_redraw = True
+    while running:
+        # 只有日期变化时才重绘，空闲帧只处理事件
+        if needs_redraw:
+            if view.DIRTY_RECTS:
+                pygame.display.update(ring.layer.draw_dirty(screen, ring.frame_key()))
+            else:
+                view.draw(screen)
+                pygame.display.flip()
+        clock.tick(RENDER_FPS)
+
+        needs_redraw = view.update()
+        # 后台刷新换上了新数据：只在两帧之间换，换完整帧重画
+        dataset = refresher.poll() if refresher else None
+        if dataset is not None:
+            view.apply_dataset(dataset)
+            needs_redraw = True
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            else:
+                view.handle_event(event)
+
+    pygame.quit()
@@ -0,0 +1,72 @@
+import collections
+import time
+import pygame
+from cloud_clock import RENDER_FPS
+
+# ====== 可修改参数 ======
+DYNAMIC_RESOLUTION = False    # 打开后重的视图按实测耗时降低场景的内部分辨率，再放大到窗口
+MIN_SCALE = 0.5
+MAX_SCALE = 1.0
+SCALE_STEP = 0.125
+SCENE_BUDGET = 0.8 / RENDER_FPS  # 场景（含放大）每帧的耗时预算，留两成给文字和 flip
+RAISE_HEADROOM = 0.7          # 预计升一档后的耗时低于预算的这个比例才升，避免来回跳
+SAMPLE_FRAMES = 20            # 按最近多少帧的平均耗时调整
+
+# 动态分辨率：场景（粒子、圆点、发光）先画到一张按 scale 缩小的离屏画布上，
+# 再 smoothscale 到窗口大小；标题、日期、图例文字等在放大之后直接画在窗口上，保持清晰。
+# 视图里的用法：
+#     scene = scaler.begin(surface)     # scale 为 1 时就是 surface 本身
+#     ...  坐标和半径都乘上 scaler.scale 画到 scene 上
+#     scaler.present(surface)
+#     ...  文字和 HUD 按原始坐标画到 surface 上
+
+
+class ResolutionScaler:
+    def __init__(self, size, budget=SCENE_BUDGET, min_scale=MIN_SCALE, max_scale=MAX_SCALE):
+        self.size = size
+        self.budget = budget
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.scale = max_scale
+        self.samples = collections.deque(maxlen=SAMPLE_FRAMES)
+        self.scene = None
+        self.start = None
+
+    @property
+    def active(self):
+        return DYNAMIC_RESOLUTION and self.scale < 1.0
+
+    def begin(self, surface):
+        # 返回这一帧画场景用的画布
+        self.start = time.perf_counter()
+        if not self.active:
+            return surface
+        size = (max(1, int(self.size[0] * self.scale)), max(1, int(self.size[1] * self.scale)))
+        if self.scene is None or self.scene.get_size() != size:
+            self.scene = pygame.Surface(size, 0, surface)
+        return self.scene
+
+    def present(self, surface):
+        # 把缩小的场景放大到 surface，并记录这一帧场景的耗时
+        if self.active:
+            pygame.transform.smoothscale(self.scene, surface.get_size(), surface)
+        if DYNAMIC_RESOLUTION and self.start is not None:
+            self.samples.append(time.perf_counter() - self.start)
+            self.adjust()
+        self.start = None
+
+    def adjust(self):
+        if len(self.samples) < self.samples.maxlen:
+            return
+        mean = sum(self.samples) / len(self.samples)
+        if mean > self.budget and self.scale > self.min_scale:
+            self.set_scale(self.scale - SCALE_STEP)
+        elif self.scale < self.max_scale:
+            # 像素数按边长的平方增长，预计升一档后还有余量才升
+            target = min(self.max_scale, self.scale + SCALE_STEP)
+            if mean * (target / self.scale) ** 2 < self.budget * RAISE_HEADROOM:
+                self.set_scale(target)
+
+    def set_scale(self, scale):
+        self.scale = min(self.max_scale, max(self.min_scale, scale))
+        self.samples.clear()
@@ -0,0 +1,316 @@
+import argparse
+import collections.abc
+import functools
+import math
+import os
+import signal
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+import pandas as pd
+import cloud_data
+import cloud_palettes
+import cloud_stats
+
+# ====== 可修改参数 ======
+SHARED_PREFIX = 'shm:'   # 视图的 CSV_FILE / 刷新数据源写成 'shm:名字' 就从共享内存读
+SHARED_NAME = 'cloud'
+PUBLISH_SECONDS = 10     # 发布进程多久检查一次源文件有没有变
+KEEP_VERSIONS = 2        # 保留最近几个版本的数据段，正在切换的查看进程还能连上
+COLUMNS = [('year', '<u2'), ('month', 'u1'), ('day', 'u1'), ('value', '<f8'), ('filled', '?'), ('ratio', '<f4')]
+ALIGN = 64
+STALE_SCAN = 64          # 启动时往前找多少个版本的残留数据段（/dev/shm 列不出来的系统上用）
+
+# 多进程共用一份数据（一台机器上好几块屏幕各跑一个视图进程）：
+# 发布进程读一次 CSV / 归档、清洗好，把各列写进 multiprocessing.shared_memory；
+# 查看进程按名字连上去，直接在共享内存上建只读 NumPy 数组，不复制，加多少块屏幕数据都只占一份内存。
+# 视图要的派生数据也由发布进程算一次放进去（DERIVED）：趋势环的滑动均值、环上的单位圆坐标、
+# cloud_palettes 里各环形视图的整列颜色，查看进程不再各算一遍、各存一份。
+#
+# 两段共享内存：
+#   '名字'       头：MAGIC + 当前版本号（u64，发布进程最后才写它）
+#   '名字.版本'  数据：MAGIC + 行数 + 最小值 + 最大值，之后按 COLUMNS + DERIVED 的顺序一列一列放（每列 64 字节对齐）
+# 换数据时先写好新版本的数据段再改版本号；查看进程看到版本号变了再连新数据段，旧的连接不受影响。
+
+MAGIC = b'CLDSHM01'
+HEADER = struct.Struct('<8sQ')
+DATA_HEADER = struct.Struct('<8sQdd')
+DERIVED = [('trend', '<f8'), ('ring_x', '<f8'), ('ring_y', '<f8')] + \
+          [(f'color.{name}', '3u1') for name in cloud_palettes.PALETTES]
+
+# 本进程自己发布的段：同一个进程里既发布又查看时（测试、单进程演示），连接时不能把发布方的登记也取消了
+_created = set()
+
+
+def is_shared(spec):
+    return spec.startswith(SHARED_PREFIX)
+
+def shared_name(spec):
+    return spec[len(SHARED_PREFIX):] or SHARED_NAME
+
+def _attach(name):
+    # 查看进程只连接、不负责删除：3.13 之前连接时也会登记到 resource_tracker，进程退出时会把段删掉，这里取消登记
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if name not in _created:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+def _layout(rows):
+    # 每列在数据段里的偏移，和数据段总大小
+    offsets, pos = [], DATA_HEADER.size
+    for _, dtype in COLUMNS + DERIVED:
+        pos = (pos + ALIGN - 1) // ALIGN * ALIGN
+        offsets.append(pos)
+        pos += rows * np.dtype(dtype).itemsize
+    return offsets, max(pos, 1)
+
+def _create(name, size):
+    _created.add(name)
+    return shared_memory.SharedMemory(name=name, create=True, size=size)
+
+def _unlink(name, shm=None):
+    # shm：手上已经有的段；没有时按名字连上再删，不存在就算了
+    _created.discard(name)
+    if shm is None:
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            return
+    shm.close()
+    shm.unlink()
+
+def _stale_versions(name):
+    # 上次的发布进程没退干净时留下的 '名字.版本'：能列 /dev/shm 就照着列，否则从头里记的版本往前找
+    try:
+        return sorted(int(f.rpartition('.')[2]) for f in os.listdir('/dev/shm')
+                      if f.startswith(name + '.') and f.rpartition('.')[2].isdigit())
+    except OSError:
+        pass
+    try:
+        header = _attach(name)
+    except FileNotFoundError:
+        return []
+    magic, version = HEADER.unpack(bytes(header.buf[:HEADER.size]))
+    header.close()
+    return list(range(max(1, version - STALE_SCAN), version + 1)) if magic == MAGIC else []
+
+def derive(values, lo, hi):
+    # 发布进程替所有查看进程算一次的派生列
+    n = len(values)
+    span = hi - lo
+    ratio = (values - lo) / span if span > 0 else np.zeros(n)
+    # 角度和 cloud_dirty.ring_positions 一样逐个用 math 算，查看进程缩放后和自己算的位置完全相同
+    step = 2 * math.pi / max(n, 1)
+    columns = {
+        'trend': cloud_stats.rolling_mean(values, cloud_stats.TREND_WINDOW),
+        'ring_x': np.array([math.cos(i * step - math.pi / 2) for i in range(n)]),
+        'ring_y': np.array([math.sin(i * step - math.pi / 2) for i in range(n)]),
+    }
+    for name, stops in cloud_palettes.PALETTES.items():
+        columns[f'color.{name}'] = cloud_palettes.colors(ratio, stops)
+    return columns
+
+
+class Publisher:
+    def __init__(self, name=SHARED_NAME):
+        self.name = name
+        self.version = 0
+        self.segments = []
+        # 上次没退干净留下的数据段和头
+        for version in _stale_versions(name):
+            _unlink(f'{name}.{version}')
+        _unlink(name)
+        self.header = _create(name, HEADER.size)
+        self.header.buf[:HEADER.size] = HEADER.pack(MAGIC, 0)
+
+    def publish(self, df):
+        # df：cloud_data.clean_frame 的结果（只用有值的行）
+        df = df[df['value'].notna()]
+        values = df['value'].to_numpy(float)
+        lo, hi = (float(values.min()), float(values.max())) if len(values) else (0.0, 0.0)
+        columns = {
+            'year': df['year'], 'month': df['month'], 'day': df['day'], 'value': values,
+            'filled': df['filled'], 'ratio': (values - lo) / (hi - lo) if hi > lo else np.zeros(len(values)),
+        }
+        columns.update(derive(values, lo, hi))
+        rows = len(values)
+        offsets, size = _layout(rows)
+        version = self.version + 1
+        shm = _create(f'{self.name}.{version}', size)
+        shm.buf[:DATA_HEADER.size] = DATA_HEADER.pack(MAGIC, rows, lo, hi)
+        for (col, dtype), offset in zip(COLUMNS + DERIVED, offsets):
+            np.ndarray(rows, dtype, buffer=shm.buf, offset=offset)[:] = np.asarray(columns[col])
+        # 数据写完才改版本号
+        self.header.buf[:HEADER.size] = HEADER.pack(MAGIC, version)
+        self.version = version
+        self.segments.append(shm)
+        while len(self.segments) > KEEP_VERSIONS:
+            old = self.segments.pop(0)
+            _unlink(old.name, old)
+        return version
+
+    def close(self):
+        for shm in self.segments + [self.header]:
+            _unlink(shm.name, shm)
+        self.segments = []
+
+
+class SharedDataset:
+    # 查看进程这边：columns 里是直接建在共享内存上的只读数组
+    def __init__(self, name=SHARED_NAME):
+        self.name = name
+        self.header = _attach(name)
+        self.segment = None
+        self.version = 0
+        self.columns = {}
+        self.min_value = self.max_value = 0.0
+        if not self.refresh():
+            raise RuntimeError(f"共享数据 {name} 还没有发布")
+
+    def current_version(self):
+        magic, version = HEADER.unpack(bytes(self.header.buf[:HEADER.size]))
+        if magic != MAGIC:
+            raise ValueError(f"不是云量共享数据：{self.name}")
+        return version
+
+    def refresh(self):
+        # 发布进程换了新版本就连过去，返回是否换了
+        version = self.current_version()
+        if version == self.version or version == 0:
+            return False
+        try:
+            segment = _attach(f'{self.name}.{version}')
+        except FileNotFoundError:
+            # 刚好又发了一版、这一版已经删了，下次再来
+            return False
+        magic, rows, lo, hi = DATA_HEADER.unpack(bytes(segment.buf[:DATA_HEADER.size]))
+        offsets, _ = _layout(rows)
+        columns = {}
+        for (col, dtype), offset in zip(COLUMNS + DERIVED, offsets):
+            array = np.ndarray(rows, dtype, buffer=segment.buf, offset=offset)
+            array.flags.writeable = False
+            columns[col] = array
+        # 旧数据段不主动 close：别处可能还拿着它上面的数组，没人引用后自然释放
+        self.segment, self.version, self.columns = segment, version, columns
+        self.min_value, self.max_value = lo, hi
+        return True
+
+    def __len__(self):
+        return len(self.columns['value'])
+
+    def frame(self):
+        # 和 cloud_data.load_clean 同样的列（会复制一份），给要 DataFrame 的地方：气候值、load_series；视图用 days()
+        c = self.columns
+        date = pd.to_datetime(pd.DataFrame({'year': c['year'], 'month': c['month'], 'day': c['day']}))
+        return pd.DataFrame({'date': date, 'year': c['year'], 'month': c['month'], 'day': c['day'],
+                             'value': c['value'], 'quality': 'ok', 'filled': c['filled']})
+
+    def days(self):
+        # 当前版本的天列表，不复制
+        return SharedDays(self.columns, self.min_value, self.max_value, self.version, self.segment)
+
+
+class SharedDays(collections.abc.Sequence):
+    # load_days() 那种天列表的共享内存版：columns 就是共享内存上的只读数组，视图直接拿整列用；
+    # 按下标取一天时才临时拼一个 dict，切片还是 SharedDays（数组视图，极值沿用整份的）。
+    # 数组不持有数据段：segment 引用着它，数据段要等最后一个用它的 SharedDays 没了才关，
+    # SharedDataset 已经换到新版本时旧的天列表也照样能用
+    def __init__(self, columns, min_value, max_value, version=0, segment=None):
+        self.columns = columns
+        self.min_value = min_value
+        self.max_value = max_value
+        self.version = version
+        self.segment = segment
+
+    def __len__(self):
+        return len(self.columns['value'])
+
+    def __getitem__(self, i):
+        c = self.columns
+        if isinstance(i, slice):
+            return SharedDays({k: a[i] for k, a in c.items()}, self.min_value, self.max_value, self.version, self.segment)
+        return {'year': int(c['year'][i]), 'month': int(c['month'][i]), 'day': int(c['day'][i]),
+                'value': float(c['value'][i]), 'filled': bool(c['filled'][i])}
+
+    def colors(self, stops):
+        # 发布进程按同一套配色算好的颜色 (n, 3)；视图改了配色、没有对应的列时返回 None
+        for name, published in cloud_palettes.PALETTES.items():
+            if list(published) == list(stops):
+                return self.columns[f'color.{name}']
+        return None
+
+    @property
+    def ring_unit(self):
+        # 环上第 i 天的 (cos, sin)，交给 cloud_dirty.ring_positions
+        return self.columns['ring_x'], self.columns['ring_y']
+
+
+class SharedSource:
+    # cloud_refresh 的数据源：版本号变了就返回新的 SharedDays（已经解析好，不用再 parse_text）
+    def __init__(self, spec):
+        self.name = spec
+        self.dataset = None
+        self.spec = spec
+
+    def fetch(self):
+        if self.dataset is None:
+            self.dataset = SharedDataset(shared_name(self.spec))
+        elif not self.dataset.refresh():
+            return None
+        return self.dataset.days()
+
+
+@functools.lru_cache(maxsize=None)
+def attach(name=SHARED_NAME):
+    # 每个进程每个名字只连一次
+    return SharedDataset(name)
+
+
+def _stamp(path):
+    st = os.stat(path.partition('#')[0])
+    return st.st_mtime_ns, st.st_size
+
+def publish_file(csv_file, name=SHARED_NAME, interval=PUBLISH_SECONDS):
+    # 读一次、发布，之后源文件变了就重新读、发布新版本；Ctrl+C 或被 kill 时删掉共享内存
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    publisher = Publisher(name)
+    stamp = None
+    try:
+        while True:
+            current = _stamp(csv_file)
+            if current != stamp:
+                stamp = current
+                cloud_data.clear_caches()
+                df = cloud_data.load_clean(csv_file)
+                version = publisher.publish(df)
+                print(f"{SHARED_PREFIX}{name} v{version}：{df['value'].notna().sum()} 天 <- {csv_file}")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        publisher.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='把云量数据放进共享内存，多个视图进程共用一份')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('publish', help='读 CSV / 归档并发布，源文件变了自动发布新版本')
+    p.add_argument('csv', nargs='?', default=cloud_data.CSV_FILE)
+    p.add_argument('--name', default=SHARED_NAME)
+    p.add_argument('--seconds', type=float, default=PUBLISH_SECONDS)
+    p = sub.add_parser('info', help='查看已发布的数据')
+    p.add_argument('--name', default=SHARED_NAME)
+    args = parser.parse_args(argv)
+    if args.command == 'publish':
+        publish_file(args.csv, args.name, args.seconds)
+    else:
+        dataset = SharedDataset(args.name)
+        print(f"{SHARED_PREFIX}{args.name} v{dataset.version}：{len(dataset)} 天，"
+              f"{dataset.min_value:.0f}~{dataset.max_value:.0f}%，{dataset.segment.size} 字节")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+import functools
+import pygame
+
+# 带透明度的小图形缓存：同样半径和颜色的圆点只画一次，之后直接 blit
+
+@functools.lru_cache(maxsize=4096)
+def circle_sprite(radius, color):
+    surf = pygame.Surface((radius*2, radius*2), pygame.SRCALPHA)
+    pygame.draw.circle(surf, color, (radius, radius), radius)
+    return surf
+
+@functools.lru_cache(maxsize=256)
+def box_sprite(width, height, color):
+    surf = pygame.Surface((width, height), pygame.SRCALPHA)
+    surf.fill(color)
+    return surf
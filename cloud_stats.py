@@ -0,0 +1,147 @@
+import bisect
+import math
+from collections import deque
+import numpy as np
+
+# ====== 可修改参数 ======
+TREND_WINDOW = 15            # 滑动窗口天数
+BAND_PERCENTILES = (25, 75)  # 趋势带的上下百分位
+
+# ====== 整段计算（向量化） ======
+# 窗口都是"截至当天"的尾随窗口，开头不足一个窗口时用已有的天数
+
+def rolling_mean(values, window=TREND_WINDOW):
+    v = np.asarray(values, dtype=float)
+    csum = np.concatenate([[0.0], np.cumsum(v)])
+    idx = np.arange(len(v))
+    lo = np.maximum(0, idx - window + 1)
+    return (csum[idx + 1] - csum[lo]) / (idx + 1 - lo)
+
+def rolling_percentile(values, q, window=TREND_WINDOW):
+    # 开头不足一个窗口的几天单独算，其余整块向量化（带 NaN 的 nanpercentile 会退化成逐行计算）
+    v = np.asarray(values, dtype=float)
+    out = np.empty(len(v))
+    head = min(window - 1, len(v))
+    for i in range(head):
+        out[i] = np.percentile(v[:i + 1], q)
+    if len(v) >= window:
+        out[head:] = np.percentile(np.lib.stride_tricks.sliding_window_view(v, window), q, axis=1)
+    return out
+
+def rolling_median(values, window=TREND_WINDOW):
+    return rolling_percentile(values, 50, window)
+
+def monthly_summary(months, values):
+    # {月份: {'count', 'mean', 'min', 'max'}}；months 也可以是 (年, 月) 这样的组合键，跨年的数据不会把各年同月混在一起
+    months = np.asarray(months)
+    v = np.asarray(values, dtype=float)
+    if months.ndim > 1:
+        keys, inverse = np.unique(months, axis=0, return_inverse=True)
+        labels = [tuple(k) for k in keys.tolist()]
+    else:
+        keys, inverse = np.unique(months, return_inverse=True)
+        labels = keys.tolist()
+    inverse = inverse.ravel()
+    count = np.bincount(inverse)
+    total = np.bincount(inverse, weights=v)
+    vmin = np.full(len(keys), np.inf)
+    vmax = np.full(len(keys), -np.inf)
+    np.minimum.at(vmin, inverse, v)
+    np.maximum.at(vmax, inverse, v)
+    return {k: {'count': c, 'mean': t / c, 'min': lo, 'max': hi}
+            for k, c, t, lo, hi in zip(labels, count.tolist(), total.tolist(), vmin.tolist(), vmax.tolist())}
+
+# ====== 增量计算 ======
+
+def _sorted_percentile(sorted_values, q):
+    # 和 numpy 默认的线性插值一致
+    pos = (len(sorted_values) - 1) * q / 100
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+class RollingStats:
+    # 滑动均值、中位数、百分位带和月度汇总。
+    # 初始数据整段向量化算好；之后每追加一天只更新末尾：
+    # 均值 O(1)，百分位在固定大小的有序窗口里二分插入/删除，和数据总长度无关。
+    def __init__(self, window=TREND_WINDOW, percentiles=BAND_PERCENTILES):
+        self.window = window
+        self.percentiles = percentiles
+        self.recent = deque()
+        self.sorted_recent = []
+        self.total = 0.0
+        self.mean = []
+        self.median = []
+        self.bands = {q: [] for q in percentiles}
+        self.months = {}
+
+    @classmethod
+    def from_values(cls, values, months=None, window=TREND_WINDOW, percentiles=BAND_PERCENTILES):
+        stats = cls(window, percentiles)
+        values = [float(v) for v in values]
+        if not values:
+            return stats
+        stats.mean = rolling_mean(values, window).tolist()
+        stats.median = rolling_median(values, window).tolist()
+        stats.bands = {q: rolling_percentile(values, q, window).tolist() for q in percentiles}
+        tail = values[-window:]
+        stats.recent = deque(tail)
+        stats.sorted_recent = sorted(tail)
+        stats.total = sum(tail)
+        if months is not None:
+            for k, s in monthly_summary(months, values).items():
+                stats.months[k] = [s['count'], s['mean'] * s['count'], s['min'], s['max']]
+        return stats
+
+    @classmethod
+    def from_mean(cls, mean, window=TREND_WINDOW):
+        # 别处已经算好的滑动均值（cloud_shared 发布的 trend 列）：只拿来画趋势，不复制，也不再往后追加
+        stats = cls(window, ())
+        stats.mean = mean
+        return stats
+
+    def append(self, value, month=None):
+        value = float(value)
+        self.recent.append(value)
+        self.total += value
+        bisect.insort(self.sorted_recent, value)
+        if len(self.recent) > self.window:
+            old = self.recent.popleft()
+            self.total -= old
+            del self.sorted_recent[bisect.bisect_left(self.sorted_recent, old)]
+        self.mean.append(self.total / len(self.recent))
+        self.median.append(_sorted_percentile(self.sorted_recent, 50))
+        for q in self.percentiles:
+            self.bands[q].append(_sorted_percentile(self.sorted_recent, q))
+        if month is not None:
+            s = self.months.get(month)
+            if s is None:
+                self.months[month] = [1, value, value, value]
+            else:
+                s[0] += 1
+                s[1] += value
+                s[2] = min(s[2], value)
+                s[3] = max(s[3], value)
+
+    def monthly(self):
+        return {k: {'count': c, 'mean': t / c, 'min': lo, 'max': hi}
+                for k, (c, t, lo, hi) in sorted(self.months.items())}
+
+    def __len__(self):
+        return len(self.mean)
+
+# ====== 叠加层辅助 ======
+
+def ring_points(center, trend, min_value, max_value, r_min, r_max, angle_step):
+    # 把趋势值映射成环形视图里的一圈折线点，起点在正上方；不到两天连不成线，返回空列表
+    if len(trend) < 2:
+        return []
+    span = max_value - min_value
+    points = []
+    for i, v in enumerate(trend):
+        ratio = (v - min_value) / span if span > 0 else 0
+        r = r_min + ratio * (r_max - r_min)
+        angle = i * angle_step - math.pi / 2
+        points.append((center[0] + r * math.cos(angle), center[1] + r * math.sin(angle)))
+    return points
@@ -0,0 +1,172 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+import cloud_archive
+
+# ====== 可修改参数 ======
+SYNTH_YEARS = (1991, 2020)   # 起止年份（含）
+SYNTH_STATIONS = 1           # 站点数；多于 1 个时 CSV 按站点各写一个文件
+HOURLY = False               # True 时每天 24 个数值，CSV 多一列 Hour
+MEAN_VALUE = 65              # 多年平均云量（%）
+SEASONAL_AMPLITUDE = 18      # 季节变化的幅度（%），香港春夏云多、秋冬云少
+PEAK_DAY = 110               # 一年里云量最多的是第几天
+DIURNAL_AMPLITUDE = 8        # 逐小时数据的日变化幅度（%），午后最多
+NOISE = 22                   # 天气波动的标准差（%）
+AUTOCORRELATION = 0.7        # 相邻两个数值（逐日或逐小时）波动的相关系数，0~1
+STATION_SPREAD = 8           # 各站点平均云量相差多少（标准差，%）
+MISSING_RATE = 0.02          # 缺测的比例
+MISSING_RUN = 3              # 缺测平均连续几个数值（仪器故障往往一连几天）
+SEED = 0
+BLOCK = 64                   # 算自相关波动时分块的长度
+
+# 合成数据（规模测试、长时间运行测试用）：按 Year,Month,Day,Value,data Completeness 的格式写 CSV，
+# 和天文台的文件一样（缺测写 ***），或者直接写云量归档（cloud_archive，.cca）。
+# 数值 = 多年平均 + 站点偏差 + 季节（+ 日变化）+ AR(1) 天气波动，截到 0~100 取整。
+# 按站点、按年一块一块生成、一块一块写，写多大的文件内存都只占一年的量；同样的参数和 SEED 生成的文件完全一样。
+
+MISSING_TEXT = '***'
+
+
+def ar1(noise, phi, state):
+    # x[t] = phi * x[t-1] + noise[t]，state 为上一块最后一个值；返回 (x, 最后一个值)。
+    # 块内用下三角矩阵一次乘出来，只在块之间按顺序递推，不逐个数值循环
+    n = len(noise)
+    if n == 0:
+        return noise, state
+    blocks = -(-n // BLOCK)
+    padded = np.zeros(blocks * BLOCK)
+    padded[:n] = noise
+    lags = np.arange(BLOCK)
+    powers = phi ** lags
+    weights = np.tril(phi ** np.maximum(lags[:, None] - lags[None, :], 0))
+    within = padded.reshape(blocks, BLOCK) @ weights.T
+    carry = np.empty(blocks)
+    last = state
+    for b in range(blocks):
+        carry[b] = last
+        last = within[b, -1] + phi ** BLOCK * last
+    x = (within + carry[:, None] * (phi * powers)[None, :]).ravel()[:n]
+    return x, x[-1]
+
+def missing_mask(rng, n, rate=MISSING_RATE, run=MISSING_RUN):
+    # 每段缺测的起点按 rate / run 的概率出现，长度按几何分布，平均 run 个
+    if rate <= 0 or n == 0:
+        return np.zeros(n, dtype=bool)
+    starts = np.flatnonzero(rng.random(n) < rate / run)
+    ends = np.minimum(starts + rng.geometric(1 / run, len(starts)), n)
+    edges = np.zeros(n + 1, dtype=int)
+    np.add.at(edges, starts, 1)
+    np.add.at(edges, ends, -1)
+    return np.cumsum(edges[:n]) > 0
+
+
+class Station:
+    # 一个站点的参数和跨年接续的波动状态
+    def __init__(self, name, rng, hourly=HOURLY, autocorrelation=AUTOCORRELATION, noise=NOISE,
+                 amplitude=SEASONAL_AMPLITUDE, missing_rate=MISSING_RATE):
+        self.name = name
+        self.rng = rng
+        self.per_day = 24 if hourly else 1
+        self.phi = min(max(autocorrelation, 0.0), 0.999)
+        self.sigma = noise * np.sqrt(1 - self.phi ** 2)   # 让波动本身的标准差是 noise
+        self.amplitude = amplitude
+        self.missing_rate = missing_rate
+        self.mean = MEAN_VALUE + rng.normal(0, STATION_SPREAD)
+        self.peak = PEAK_DAY + rng.normal(0, 10)
+        self.state = rng.normal(0, noise)
+
+    def year(self, year):
+        # 这一年的 (日期, 数值 (天数, per_day)，缺测为 NaN)
+        dates = np.arange(np.datetime64(f'{year}-01-01'), np.datetime64(f'{year + 1}-01-01'))
+        doy = (dates - dates[0]).astype(int)
+        t = (doy[:, None] + np.arange(self.per_day)[None, :] / self.per_day).ravel()
+        base = self.mean + self.amplitude * np.cos(2 * np.pi * (t - self.peak) / 365.25)
+        if self.per_day > 1:
+            # 日变化：下午两点左右最多
+            hour = np.tile(np.arange(self.per_day), len(dates))
+            base = base + DIURNAL_AMPLITUDE * np.cos(2 * np.pi * (hour - 14) / 24)
+        weather, self.state = ar1(self.rng.normal(0, self.sigma, len(t)), self.phi, self.state)
+        values = np.clip(np.round(base + weather), 0, 100)
+        values[missing_mask(self.rng, len(values), self.missing_rate)] = np.nan
+        return dates, values.reshape(len(dates), self.per_day)
+
+
+def make_stations(count=SYNTH_STATIONS, seed=SEED, **options):
+    # 每个站点用自己的随机数流：多加几个站点不会改变前面站点的数据
+    seeds = np.random.SeedSequence(seed).spawn(count)
+    width = len(str(count))
+    return [Station(f'S{i + 1:0{width}d}', np.random.default_rng(s), **options) for i, s in enumerate(seeds)]
+
+def year_frame(dates, values):
+    # 一年的数据 -> CSV 的各列（逐小时时多一列 Hour）
+    days, per_day = values.shape
+    dates = pd.DatetimeIndex(np.repeat(dates, per_day))
+    flat = values.ravel()
+    missing = np.isnan(flat)
+    text = np.where(missing, MISSING_TEXT, np.nan_to_num(flat).astype(int).astype(str))
+    columns = {'Year': dates.year, 'Month': dates.month, 'Day': dates.day}
+    if per_day > 1:
+        columns['Hour'] = np.tile(np.arange(per_day), days)
+    columns['Value'] = text
+    columns['data Completeness'] = np.where(missing, MISSING_TEXT, 'C')
+    return pd.DataFrame(columns)
+
+def write_csv(path, station, years=SYNTH_YEARS):
+    # 一年一块追加写；带 BOM，和天文台下载的文件一样
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('\ufeff')   # 不用 utf-8-sig：它每写一次都要检查一遍，大文件慢不少
+        header = True
+        for year in range(years[0], years[1] + 1):
+            year_frame(*station.year(year)).to_csv(f, header=header, index=False)
+            header = False
+
+def write_archive(path, stations, years=SYNTH_YEARS):
+    # 直接写云量归档：所有站点在一个文件里，一块一块交给 ArchiveWriter，不经过 CSV
+    with cloud_archive.ArchiveWriter(path) as writer:
+        for station in stations:
+            for year in range(years[0], years[1] + 1):
+                dates, values = station.year(year)
+                cloud_archive.add_series(writer, station.name, dates, values, station.per_day)
+
+def generate(path, years=SYNTH_YEARS, stations=SYNTH_STATIONS, seed=SEED, **options):
+    # path 以 .cca 结尾写归档；否则一个站点写一个 CSV，多个站点时 path 是目录，每站一个 CSV。返回写出的文件
+    group = make_stations(stations, seed, **options)
+    if cloud_archive.is_archive(path):
+        write_archive(path, group, years)
+        return [path]
+    if len(group) == 1:
+        write_csv(path, group[0], years)
+        return [path]
+    os.makedirs(path, exist_ok=True)
+    files = []
+    for station in group:
+        files.append(os.path.join(path, f'{station.name}.csv'))
+        write_csv(files[-1], station, years)
+    return files
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成合成云量数据（天文台 CSV 格式或云量归档），用来做规模和长时间运行测试')
+    parser.add_argument('path', help='输出：xxx.csv；多个站点时为目录；xxx.cca 写归档')
+    parser.add_argument('--years', default=f'{SYNTH_YEARS[0]}-{SYNTH_YEARS[1]}', help='如 1991-2020')
+    parser.add_argument('--stations', type=int, default=SYNTH_STATIONS)
+    parser.add_argument('--hourly', action='store_true', default=HOURLY, help='逐小时数据')
+    parser.add_argument('--amplitude', type=float, default=SEASONAL_AMPLITUDE, help='季节变化幅度（%%）')
+    parser.add_argument('--noise', type=float, default=NOISE, help='天气波动的标准差（%%）')
+    parser.add_argument('--autocorrelation', type=float, default=AUTOCORRELATION, help='相邻数值的相关系数')
+    parser.add_argument('--missing', type=float, default=MISSING_RATE, help='缺测比例')
+    parser.add_argument('--seed', type=int, default=SEED)
+    args = parser.parse_args(argv)
+    years = tuple(int(y) for y in args.years.split('-'))
+    years = (years[0], years[-1])
+    start = time.perf_counter()
+    files = generate(args.path, years, args.stations, args.seed, hourly=args.hourly, amplitude=args.amplitude,
+                     noise=args.noise, autocorrelation=args.autocorrelation, missing_rate=args.missing)
+    elapsed = time.perf_counter() - start
+    size = sum(os.path.getsize(f) for f in files)
+    print(f"{len(files)} 个文件，{args.stations} 个站点，{years[0]}~{years[1]} 年，"
+          f"{size / 1e6:.1f} MB，用时 {elapsed:.1f} 秒")
+
+if __name__ == '__main__':
+    main()
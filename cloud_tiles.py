@@ -0,0 +1,160 @@
+import collections
+import queue
+import threading
+import traceback
+import pygame
+
+# ====== 可修改参数 ======
+TILE_SIZE = 256        # 每块瓦片的宽度（像素）；高度是整条时间轴的高度
+MAX_TILES = 192        # 内存里最多留多少块（最粗一级不算，一直留着当占位）
+PREFETCH_TILES = 1     # 视口左右各多预先生成几块，平移时少露出占位
+
+# 可缩放时间轴的瓦片金字塔：第 level 级的横向比例是第 0 级的 2^level 倍，每级切成 TILE_SIZE 宽的瓦片。
+# 瓦片按需在后台线程里画（最后请求的先画），画好的放进有上限的 LRU；
+# 视口里的瓦片还没画好时，拿已有的更粗一级瓦片对应的一段横向拉伸后先顶上。
+# 第 0 级在主线程里直接画、一直留着（invalidate 之后缺哪块当场补画），所以总有占位可用，静态导出（cloud_batch）也不依赖后台线程。
+# 平移、缩放只是换一批瓦片 blit；数据变了用 invalidate() 整个丢掉。
+#
+# 坐标：第 level 级的世界坐标 x 从第一天的位置（0）算起，可以为负（最左一列点的半径）；
+# 第 i 块瓦片覆盖 [i * TILE_SIZE, (i + 1) * TILE_SIZE)。上一级的第 i >> k 块就包含这一块。
+
+
+class TilePyramid:
+    def __init__(self, render, height, tile=TILE_SIZE, max_tiles=MAX_TILES, bg=(0, 0, 0)):
+        # render(surface, level, x0)：把第 level 级世界坐标从 x0 开始的一段画到 surface 上（已经填好背景色）
+        self.render = render
+        self.height = height
+        self.tile = tile
+        self.max_tiles = max_tiles
+        self.bg = bg
+        self.tiles = collections.OrderedDict()   # (level, i) -> Surface，最近用过的在后面
+        self.pending = set()
+        self.wanted = set()      # 最近一次 blit 需要的瓦片，排队中但已经不需要的就不画了
+        self.done = []
+        self.failed = set()      # 画的时候出错的瓦片，invalidate 之前不再排队
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.queue = queue.LifoQueue()
+        self.thread = None
+
+    def _render(self, key):
+        level, i = key
+        surface = pygame.Surface((self.tile, self.height))
+        surface.fill(self.bg)
+        self.render(surface, level, i * self.tile)
+        return surface
+
+    def _store(self, key, surface):
+        self.tiles[key] = surface
+        self.tiles.move_to_end(key)
+        # 超出上限时从最久没用的开始丢，第 0 级留着
+        excess = sum(1 for level, _ in self.tiles if level > 0) - self.max_tiles
+        for old in list(self.tiles):
+            if excess <= 0:
+                break
+            if old[0] > 0:
+                del self.tiles[old]
+                excess -= 1
+
+    def _work(self):
+        while True:
+            generation, key = self.queue.get()
+            with self.lock:
+                skip = generation != self.generation or key not in self.wanted
+                if skip:
+                    self.pending.discard(key)
+            if skip:
+                continue
+            try:
+                surface = self._render(key)
+            except Exception:
+                # 画的时候数据刚好换了（invalidate 过）：这一块作废，下次需要时再排队；
+                # 数据没换还出错就是 render 本身的问题，打出来，这一块也不再反复重画
+                surface = None
+                with self.lock:
+                    stale = generation != self.generation
+                    if not stale:
+                        self.failed.add(key)
+                if not stale:
+                    traceback.print_exc()
+            with self.lock:
+                self.pending.discard(key)
+                if surface is not None and generation == self.generation:
+                    self.done.append((key, surface))
+
+    def request(self, key):
+        # 排队在后台画；第 0 级直接画
+        if key in self.tiles:
+            return
+        if key[0] == 0:
+            self._store(key, self._render(key))
+            return
+        with self.lock:
+            if key in self.pending or key in self.failed:
+                return
+            self.pending.add(key)
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._work, name='cloud-tiles', daemon=True)
+            self.thread.start()
+        self.queue.put((self.generation, key))
+
+    def poll(self):
+        # 把后台画好的瓦片收进缓存；返回是否有新的（有就要重画）
+        with self.lock:
+            done, self.done = self.done, []
+        for key, surface in done:
+            self._store(key, surface)
+        return bool(done)
+
+    def invalidate(self):
+        # 数据或配色变了：缓存、排队中的和画到一半的都不要了
+        with self.lock:
+            self.generation += 1
+            self.pending.clear()
+            self.failed.clear()
+            self.done = []
+        self.tiles.clear()
+
+    def stand_in(self, level, i):
+        # 更粗一级里对应的那一段横向拉伸 2^k 倍。一块都没有时（刚 invalidate 过）
+        # 当场画出覆盖它的第 0 级瓦片（第 0 级本来就在主线程里画），不让时间轴空着等后台
+        if level == 0:
+            return None
+        for k in range(1, level + 1):
+            if (level - k, i >> k) in self.tiles:
+                break
+        else:
+            self.request((0, i >> level))
+        parent = self.tiles[(level - k, i >> k)]
+        width = self.tile >> k
+        x = i * self.tile // (1 << k) - (i >> k) * self.tile
+        piece = parent.subsurface((x, 0, max(1, width), self.height))
+        return pygame.transform.scale(piece, (self.tile, self.height))
+
+    def blit(self, surface, rect, level, origin):
+        # 把第 level 级世界坐标 origin 起、rect 那么宽的一段画到 surface 的 rect 里
+        origin = int(origin)
+        first = origin // self.tile
+        last = (origin + rect.width - 1) // self.tile
+        visible = [(level, i) for i in range(first, last + 1)]
+        nearby = [(level, i) for i in range(first - PREFETCH_TILES, first)] + \
+                 [(level, i) for i in range(last + 1, last + 1 + PREFETCH_TILES)]
+        with self.lock:
+            self.wanted = set(visible + nearby)
+        # 后进先出：先排预取的，再排看得见的，看得见的先画
+        for key in nearby + visible:
+            self.request(key)
+        clip = surface.get_clip()
+        surface.set_clip(rect)
+        for key in visible:
+            tile = self.tiles.get(key)
+            if tile is not None:
+                self.tiles.move_to_end(key)
+            else:
+                tile = self.stand_in(*key)
+            if tile is not None:
+                surface.blit(tile, (rect.x + key[1] * self.tile - origin, rect.y))
+        surface.set_clip(clip)
+
+    def loading(self):
+        return bool(self.pending)
@@ -0,0 +1,5 @@
+# 所有视图模块的名字：dashboard、cloud_alloc、cloud_batch、cloud_export 共用这一份，加新视图只改这里
+# （单独一个模块：dashboard 导入 cloud_alloc，放在任何一边都会互相导入）
+
+ALL_VIEWS = ['cloud001', 'cloud002', 'cloud003', 'cloud004', 'cloud005',
+             'cloud006', 'cloud007', 'cloud008', 'cloud009', 'cloud010']
@@ -0,0 +1,198 @@
+import argparse
+import importlib
+import math
+import time
+import pygame
+import cloud_alloc
+import cloud_quality
+import cloud_refresh
+import cloud_scaling
+from cloud_clock import RENDER_FPS
+from cloud_views import ALL_VIEWS
+
+# ====== 可修改参数 ======
+DASHBOARD_SIZE = (1600, 900)
+CAPTION = 'Hong Kong cloud cover dashboard'
+BG_COLOR = (0, 0, 0)
+GAP = 4
+VIEW_FPS = 30                               # 每个视图默认的刷新频率上限
+VIEW_RATES = {'cloud006': 15, 'cloud007': 15}  # 重的视图单独降频
+FORWARD_EVENTS = (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEWHEEL, pygame.KEYDOWN)
+
+# 所有视图在同一个进程、同一个窗口里：数据、字体、文字和小图形缓存都只有一份
+# （cloud_data / cloud_fonts / cloud_sprites 里的缓存按进程共享）
+
+def view_size(module):
+    if hasattr(module, 'WIDTH'):
+        return module.WIDTH, module.HEIGHT
+    return module.WINDOW_WIDTH, module.WINDOW_HEIGHT
+
+def grid_cells(n, size, columns=0):
+    # 按网格切分窗口，返回每个格子的 Rect
+    columns = columns or math.ceil(math.sqrt(n))
+    rows = math.ceil(n / columns)
+    cell_w = (size[0] - GAP * (columns + 1)) // columns
+    cell_h = (size[1] - GAP * (rows + 1)) // rows
+    cells = []
+    for i in range(n):
+        col, row = i % columns, i // columns
+        cells.append(pygame.Rect(GAP + col * (cell_w + GAP), GAP + row * (cell_h + GAP), cell_w, cell_h))
+    return cells
+
+def fit_rect(native, cell):
+    # 保持视图原始宽高比，居中放进格子
+    scale = min(cell.width / native[0], cell.height / native[1])
+    rect = pygame.Rect(0, 0, int(native[0] * scale), int(native[1] * scale))
+    rect.center = cell.center
+    return rect
+
+def build_views(screen, names, columns=0):
+    views = []
+    for name, cell in zip(names, grid_cells(len(names), screen.get_size(), columns)):
+        module = importlib.import_module(name)
+        native = view_size(module)
+        rect = fit_rect(native, cell)
+        target = screen.subsurface(rect)
+        # 尺寸正好时直接画进子表面，否则先画到原尺寸画布再缩放
+        canvas = target if rect.size == native else pygame.Surface(native).convert()
+        views.append({
+            'name': name,
+            'module': module,
+            'rect': rect,
+            'target': target,
+            'canvas': canvas,
+            'interval': 1.0 / VIEW_RATES.get(name, VIEW_FPS),
+            'next_time': 0.0,
+            'drawn': False,
+        })
+    return views
+
+def share_budgets(views):
+    # 所有视图画在同一帧里：画质调节（cloud_quality）和动态分辨率（cloud_scaling）的每帧预算按视图个数平分，
+    # 否则每个视图都只看自己有没有超预算，合起来能超好几倍
+    for view in views:
+        module = view['module']
+        if hasattr(module, 'governor'):
+            module.governor.budget = cloud_quality.FRAME_BUDGET / len(views)
+        if hasattr(module, 'scaler'):
+            module.scaler.budget = cloud_scaling.SCENE_BUDGET / len(views)
+
+_pointer_view = None  # 上一个收到鼠标事件的视图，鼠标移走时通知它
+
+def view_at(views, pos):
+    for view in views:
+        if view['rect'].collidepoint(pos):
+            return view
+    return None
+
+def forward_event(views, event):
+    # 鼠标/键盘事件转给鼠标下的视图，坐标换算成视图原始尺寸下的坐标
+    global _pointer_view
+    pos = getattr(event, 'pos', None) or pygame.mouse.get_pos()
+    view = view_at(views, pos)
+    if _pointer_view is not None and view is not _pointer_view:
+        if hasattr(_pointer_view['module'], 'handle_event'):
+            _pointer_view['module'].handle_event(pygame.event.Event(pygame.WINDOWLEAVE))
+    _pointer_view = view
+    if view is None or not hasattr(view['module'], 'handle_event'):
+        return
+    native = view_size(view['module'])
+    rect = view['rect']
+    sx, sy = native[0] / rect.width, native[1] / rect.height
+    attrs = dict(event.dict)
+    attrs['pos'] = (int((pos[0] - rect.x) * sx), int((pos[1] - rect.y) * sy))
+    if 'rel' in attrs:
+        attrs['rel'] = (int(attrs['rel'][0] * sx), int(attrs['rel'][1] * sy))
+    view['module'].handle_event(pygame.event.Event(event.type, attrs))
+
+def render_view(view):
+    view['module'].draw(view['canvas'])
+    if view['canvas'] is not view['target']:
+        scaled = pygame.transform.smoothscale(view['canvas'], view['rect'].size)
+        view['target'].blit(scaled, (0, 0))
+    view['drawn'] = True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='在一个窗口里同时运行多个云量可视化')
+    parser.add_argument('views', nargs='*', metavar='VIEW',
+                        help='要显示的视图，默认全部：' + ', '.join(ALL_VIEWS))
+    parser.add_argument('--size', default=f'{DASHBOARD_SIZE[0]}x{DASHBOARD_SIZE[1]}', help='窗口大小，如 1600x900')
+    parser.add_argument('--columns', type=int, default=0, help='每行视图数，0 为自动')
+    parser.add_argument('--dynamic-resolution', action='store_true',
+                        help='重的视图（cloud006/007）跟不上帧率时自动降低场景的内部分辨率')
+    parser.add_argument('--adaptive-quality', action='store_true',
+                        help='跟不上帧率时自动减少粒子、发光层、浮点和毛刺数量（cloud001/005/006）')
+    parser.add_argument('--refresh', metavar='SOURCE',
+                        help='后台定时重新拉数据（本地 CSV 或天文台开放数据那样的 http 地址），换上后环形视图跟着更新')
+    parser.add_argument('--refresh-seconds', type=float, default=cloud_refresh.REFRESH_SECONDS, help='多久拉一次数据')
+    parser.add_argument('--track-allocations', action='store_true',
+                        help=f'统计每个视图每帧新建的 Surface，每 {cloud_alloc.SNAPSHOT_SECONDS} 秒用 tracemalloc 打印分配最多的位置')
+    parser.add_argument('--follow', action='store_true',
+                        help='跟随模式：只读本地 CSV 新追加的行，环形视图在末尾追加、平滑变长')
+    parser.add_argument('--color-by', choices=['value', 'anomaly', 'zscore'], default='value',
+                        help='环形视图按云量、和多年同期均值的距平或标准分上色')
+    args = parser.parse_args(argv)
+    cloud_scaling.DYNAMIC_RESOLUTION = cloud_scaling.DYNAMIC_RESOLUTION or args.dynamic_resolution
+    cloud_quality.ADAPTIVE_QUALITY = cloud_quality.ADAPTIVE_QUALITY or args.adaptive_quality
+    names = args.views or ALL_VIEWS
+    unknown = [name for name in names if name not in ALL_VIEWS]
+    if unknown:
+        parser.error(f"未知视图：{', '.join(unknown)}")
+    size = tuple(int(v) for v in args.size.lower().split('x'))
+
+    if args.track_allocations:
+        cloud_alloc.install('dashboard')
+    pygame.init()
+    screen = pygame.display.set_mode(size)
+    pygame.display.set_caption(CAPTION)
+    screen.fill(BG_COLOR)
+    pygame.display.flip()
+    clock = pygame.time.Clock()
+    views = build_views(screen, names, args.columns)
+    share_budgets(views)
+    for view in views:
+        module = view['module']
+        if hasattr(module, 'COLOR_BY') and module.COLOR_BY != args.color_by:
+            # 视图导入时已经按默认方式上过色，换了方式重新上色、静态层重画
+            module.COLOR_BY = args.color_by
+            module.restyle()
+            module.layer.invalidate()
+    if args.track_allocations:
+        for view in views:
+            cloud_alloc.track_view(view['module'])
+    refresher = cloud_refresh.start(args.refresh, args.refresh_seconds, args.follow or None)
+
+    running = True
+    while running:
+        now = time.perf_counter()
+        dirty = []
+        # 后台刷新拿到新数据：在这一帧开始前交给支持换数据的视图（cloud002/009/010）
+        dataset = refresher.poll() if refresher else None
+        if dataset is not None:
+            for view in views:
+                if hasattr(view['module'], 'apply_dataset'):
+                    view['module'].apply_dataset(dataset)
+                    view['drawn'] = False
+        # 每个视图按自己的频率调度，只有状态变化时才重画
+        for view in views:
+            if now < view['next_time']:
+                continue
+            view['next_time'] = max(view['next_time'] + view['interval'], now)
+            if view['module'].update() or not view['drawn']:
+                render_view(view)
+                dirty.append(view['rect'])
+        if dirty:
+            pygame.display.update(dirty)
+        clock.tick(RENDER_FPS)
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type in FORWARD_EVENTS:
+                forward_event(views, event)
+
+    cloud_alloc.report()
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+import cloud_data
+
+CSV = ('\ufeffYear,Month,Day,Value,data Completeness\n'
+       '2025,1,1,80,C\n2025,1,2,***,***\n2025,1,3,60,#\n2025,1,4,40,C\n')
+
+
+def write_csv(tmp_path):
+    path = tmp_path / 'cloud.csv'
+    path.write_text(CSV, encoding='utf-8')
+    return str(path)
+
+
+def test_missing_days_are_dropped_by_default(tmp_path):
+    days = cloud_data.load_days(write_csv(tmp_path))
+    assert [(d['day'], d['value']) for d in days] == [(1, 80.0), (4, 40.0)]
+    assert not any(d['filled'] for d in days)
+
+
+def test_cache_follows_module_settings(tmp_path, monkeypatch):
+    path = write_csv(tmp_path)
+    assert len(cloud_data.load_days(path)) == 2
+    monkeypatch.setattr(cloud_data, 'COMPLETE_CODES', ('C', '#'))
+    assert [d['day'] for d in cloud_data.load_days(path)] == [1, 3, 4]
+    monkeypatch.setattr(cloud_data, 'DATE_RANGE', ('2025-01-03', '2025-01-04'))
+    assert [d['day'] for d in cloud_data.load_days(path)] == [3, 4]
@@ -0,0 +1,24 @@
+import pygame
+import cloud_picking
+
+
+def make_picker():
+    return cloud_picking.Picker(lambda: cloud_picking.SpatialIndex.from_circles([0], [(50, 50)], [10]))
+
+
+def test_click_then_window_leave_still_redraws():
+    picker = make_picker()
+    picker.handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(50, 50), button=1), 1)
+    picker.handle_event(pygame.event.Event(pygame.WINDOWLEAVE), 1)
+    assert picker.selected == 0
+    assert picker.poll()
+    assert not picker.poll()
+
+
+def test_window_leave_clears_hover():
+    picker = make_picker()
+    picker.handle_event(pygame.event.Event(pygame.MOUSEMOTION, pos=(52, 50)), 1)
+    assert picker.poll()
+    picker.handle_event(pygame.event.Event(pygame.WINDOWLEAVE), 1)
+    assert picker.hover is None
+    assert picker.poll()
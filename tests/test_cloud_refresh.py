@@ -0,0 +1,20 @@
+import cloud_refresh
+
+
+def day(n):
+    return {'year': 2024, 'month': 1, 'day': n, 'value': float(n), 'filled': False}
+
+
+def test_follow_appends_keep_published_snapshots():
+    refresher = cloud_refresh.Refresher('cloud.csv', follow=True)
+    refresher._publish((day(1), day(2)), True)
+    first = refresher.poll()
+    refresher._publish((day(3),), False)
+    second = refresher.poll()
+    refresher._publish((day(4), day(5)), False)
+    third = refresher.poll()
+    assert len(first.days) == 2 and len(second.days) == 3 and len(third.days) == 5
+    assert second.appended == 1 and third.appended == 2
+    assert third.days[-third.appended:] == [day(4), day(5)]
+    assert list(second.days) == [day(1), day(2), day(3)]
+    assert third.generation == first.generation
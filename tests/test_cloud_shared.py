@@ -0,0 +1,46 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import cloud_palettes
+import cloud_shared
+
+NAME = f'cloudtest{os.getpid()}'
+
+
+def frame(values):
+    n = len(values)
+    return pd.DataFrame({'year': [2025] * n, 'month': [1] * n, 'day': range(1, n + 1),
+                         'value': values, 'filled': [False] * n})
+
+
+@pytest.fixture
+def publisher():
+    publisher = cloud_shared.Publisher(NAME)
+    yield publisher
+    publisher.close()
+
+
+def test_days_are_views_on_shared_memory(publisher):
+    publisher.publish(frame([10.0, 40.0, 70.0, 100.0]))
+    days = cloud_shared.SharedDataset(NAME).days()
+    assert len(days) == 4
+    assert days[1] == {'year': 2025, 'month': 1, 'day': 2, 'value': 40.0, 'filled': False}
+    assert not days.columns['value'].flags.writeable
+    assert np.shares_memory(days[1:].columns['value'], days.columns['value'])
+    stops = cloud_palettes.PALETTES['cloud009']
+    assert [tuple(c) for c in days.colors(stops)] == [cloud_palettes.color((v - 10) / 90, stops) for v in (10, 40, 70, 100)]
+
+
+def test_restart_removes_stale_data_segments():
+    crashed = cloud_shared.Publisher(NAME)
+    for _ in range(3):
+        crashed.publish(frame([1.0, 2.0]))
+    # 上一个发布进程没 close 就没了：新的发布进程把它留下的头和数据段都清掉
+    publisher = cloud_shared.Publisher(NAME)
+    try:
+        for version in (2, 3):
+            with pytest.raises(FileNotFoundError):
+                cloud_shared._attach(f'{NAME}.{version}')
+    finally:
+        publisher.close()
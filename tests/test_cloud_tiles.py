@@ -0,0 +1,22 @@
+import time
+import pygame
+import cloud_tiles
+
+
+def test_tile_render_error_is_printed_once(capsys):
+    calls = []
+
+    def render(surface, level, x0):
+        calls.append((level, x0))
+        if level > 0:
+            raise ValueError('boom')
+
+    tiles = cloud_tiles.TilePyramid(render, 10)
+    for _ in range(3):
+        tiles.blit(pygame.Surface((256, 10)), pygame.Rect(0, 0, 256, 10), 1, 0)
+        time.sleep(0.1)
+        tiles.poll()
+    assert 'ValueError: boom' in capsys.readouterr().err
+    assert calls.count((1, 0)) == 1
+    tiles.invalidate()
+    assert not tiles.failed